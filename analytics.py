@@ -0,0 +1,204 @@
+"""
+Intake analytics over meals.csv and the app's food log.
+
+Rows are rolled up per user by day, week and month, and per user and month by
+category and meal type. The rollups are built once with vectorized groupbys; rows
+that arrive later are buffered and merged in batches, so a query reads a few
+precomputed rows no matter how long the log grows.
+"""
+import threading
+
+import pandas as pd
+
+from food_db import NUTRIENTS
+
+# Rollup name -> group keys; every rollup sums ROLLUP_COLUMNS
+ROLLUPS = {
+    'daily': ['user_id', 'date'],
+    'weekly': ['user_id', 'week'],
+    'monthly': ['user_id', 'month'],
+    'category': ['user_id', 'month', 'category'],
+    'meal_type': ['user_id', 'month', 'meal_type']
+}
+ROLLUP_COLUMNS = NUTRIENTS + ['entries']
+
+# Columns of meals.csv-shaped rows the rollups read
+INPUT_COLUMNS = ['date', 'user_id', 'category', 'meal_type'] + NUTRIENTS
+
+# Appended rows buffered before they are merged into the rollups
+COMPACT_ROWS = 5000
+
+# Food log entries carry no meal type; the hour they were logged stands in for it
+MEAL_TYPE_HOURS = [(11, 'Breakfast'), (16, 'Lunch'), (18, 'Snack'), (24, 'Dinner')]
+
+
+def _prepare(rows):
+    """Key and nutrient columns of meals.csv-shaped rows, with week and month starts added."""
+    date = pd.to_datetime(rows['date']).dt.normalize()
+    frame = pd.DataFrame({
+        'user_id': rows['user_id'].astype(str).to_numpy(),
+        'date': date.to_numpy(),
+        'week': (date - pd.to_timedelta(date.dt.weekday, unit='D')).to_numpy(),
+        'month': date.dt.to_period('M').dt.to_timestamp().to_numpy(),
+        'category': rows['category'].astype(str).to_numpy(),
+        'meal_type': rows['meal_type'].astype(str).to_numpy()
+    })
+    for nutrient in NUTRIENTS:
+        if nutrient in rows:
+            values = pd.to_numeric(rows[nutrient], errors='coerce').fillna(0.0)
+            # Round away float32 noise from the CSV dtypes; meals.csv has one decimal
+            frame[nutrient] = values.to_numpy(dtype='float64').round(2)
+        else:
+            frame[nutrient] = 0.0
+    frame['entries'] = 1
+    return frame
+
+
+def _rollup(frame, keys):
+    return frame.groupby(keys, sort=True)[ROLLUP_COLUMNS].sum()
+
+
+def meal_type_for(logged_at):
+    """Meal type a food logged at `logged_at` most likely belongs to."""
+    for hour, meal_type in MEAL_TYPE_HOURS:
+        if logged_at.hour < hour:
+            return meal_type
+    return MEAL_TYPE_HOURS[-1][1]
+
+
+def food_log_rows(records, database=None):
+    """
+    meals.csv-shaped rows for (user_id, logged_at, entry) food log records. Entries
+    without a category or meal type (the sidebar's) get the food database's category
+    and the meal type for the hour they were logged.
+    """
+    rows = []
+    for user_id, logged_at, entry in records:
+        if isinstance(logged_at, str):
+            logged_at = pd.Timestamp(logged_at)
+        category = entry.get('category')
+        if category is None:
+            profile = database.profile(entry.get('name', '')) if database is not None else None
+            category = profile['category'] if profile else 'Other'
+        rows.append({
+            'date': logged_at,
+            'user_id': user_id,
+            'food': entry.get('name', ''),
+            'category': category,
+            'meal_type': entry.get('meal_type') or meal_type_for(logged_at),
+            **{nutrient: entry.get(nutrient, 0) or 0 for nutrient in NUTRIENTS}
+        })
+    return pd.DataFrame(rows, columns=['date', 'user_id', 'food', 'category', 'meal_type'] + NUTRIENTS)
+
+
+class IntakeAnalytics:
+    """
+    Materialized intake rollups. The bulk lives in sorted rollups built once;
+    `append` and `remove` only add rows to a small buffer of recent changes, which
+    queries fold in per user and which is merged into the rollups once it grows
+    past `compact_rows`. Safe to share between sessions.
+    """
+
+    def __init__(self, rows, compact_rows=COMPACT_ROWS):
+        frame = _prepare(rows)
+        self.rollups = {name: _rollup(frame, keys) for name, keys in ROLLUPS.items()}
+        self.rows = len(frame)
+        self.compact_rows = compact_rows
+        self._recent = frame.iloc[:0]
+        self._lock = threading.Lock()
+
+    def append(self, rows, sign=1):
+        """Adds meals.csv-shaped rows to every rollup (sign=-1 subtracts them)."""
+        if len(rows) == 0:
+            return
+        frame = _prepare(rows)
+        if sign < 0:
+            frame[ROLLUP_COLUMNS] = -frame[ROLLUP_COLUMNS]
+        with self._lock:
+            self._recent = pd.concat([self._recent, frame], ignore_index=True)
+            self.rows += sign * len(frame)
+            if len(self._recent) >= self.compact_rows:
+                self._compact()
+
+    def remove(self, rows):
+        """Takes previously appended rows back out of the rollups."""
+        self.append(rows, sign=-1)
+
+    def compact(self):
+        """Merges the recent changes into the rollups now."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if self._recent.empty:
+            return
+        for name, keys in ROLLUPS.items():
+            merged = pd.concat([self.rollups[name], _rollup(self._recent, keys)])
+            merged = merged.groupby(level=keys, sort=True).sum()
+            self.rollups[name] = merged[merged['entries'] > 0]
+        self._recent = self._recent.iloc[:0]
+
+    def _user(self, name, user_id):
+        user_id = str(user_id)
+        keys = ROLLUPS[name][1:]
+        with self._lock:
+            rollup = self.rollups[name]
+            recent = self._recent[self._recent['user_id'] == user_id]
+        try:
+            totals = rollup.xs(user_id, level='user_id')
+        except KeyError:
+            totals = rollup.iloc[:0].droplevel('user_id')
+        if not recent.empty:
+            totals = pd.concat([totals, _rollup(recent, keys)]).groupby(level=keys, sort=True).sum()
+            totals = totals[totals['entries'] > 0]
+        return totals.astype({'entries': 'int64'})
+
+    def daily(self, user_id, days=None):
+        """
+        Daily totals of one user, indexed by date. With `days`, only the last
+        `days` days up to the user's latest logged day.
+        """
+        daily = self._user('daily', user_id)
+        if days is not None and not daily.empty:
+            daily = daily[daily.index > daily.index.max() - pd.Timedelta(days=days)]
+        return daily
+
+    def _per_day(self, name, user_id, period_of):
+        totals = self._user(name, user_id)
+        logged_days = self._user('daily', user_id).index.to_series().map(period_of).value_counts()
+        averages = totals[NUTRIENTS].div(logged_days.reindex(totals.index), axis=0)
+        averages['days'] = logged_days.reindex(totals.index).astype(int)
+        averages['entries'] = totals['entries']
+        return averages
+
+    def weekly(self, user_id):
+        """Per-day averages of one user for each week (Monday start) with days logged."""
+        return self._per_day('weekly', user_id, lambda day: day - pd.Timedelta(days=day.weekday()))
+
+    def monthly(self, user_id):
+        """Per-day averages of one user for each month with days logged."""
+        return self._per_day('monthly', user_id, lambda day: day.replace(day=1))
+
+    def breakdown(self, user_id, by='category', month=None):
+        """
+        One user's totals by 'category' or 'meal_type' for `month` (any timestamp in
+        it; the latest logged month by default), with each group's share of calories.
+        """
+        rollup = self._user(by, user_id)
+        if rollup.empty:
+            return rollup.droplevel('month')
+        month = rollup.index.get_level_values('month').max() if month is None \
+            else pd.Timestamp(month).to_period('M').to_timestamp()
+        if month not in rollup.index.get_level_values('month'):
+            return rollup.iloc[:0].droplevel('month')
+        totals = rollup.xs(month, level='month')
+        totals['calorie_share'] = totals['calories'] / totals['calories'].sum()
+        return totals.sort_values('calories', ascending=False)
+
+    def stats(self):
+        """Rows added so far, rows waiting to be merged and groups held by each rollup."""
+        with self._lock:
+            return {
+                'rows': self.rows, 'recent': len(self._recent),
+                **{name: len(rollup) for name, rollup in self.rollups.items()}
+            }
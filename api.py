@@ -0,0 +1,239 @@
+"""
+Asyncio HTTP API (ASGI, on Starlette) for the planner and the food log, for the
+mobile client, batch jobs and the Streamlit UI (app.py with PLANNER_API_URL set).
+
+    POST /plan                       profile JSON -> targets, meals, workouts, exercises
+    POST /users/{user_id}/food-log   {"food", "servings"} or {"name", "calories", ...} -> the entry
+    GET  /users/{user_id}/food-log   today's entries and calories
+    GET  /health                     liveness and the AI client's stats
+    GET  /metrics                    Prometheus text (see metrics.py)
+
+AI meal ideas are awaited on the event loop through AsyncLLMClient, so one worker
+keeps any number of plans in flight while OpenAI answers. Planning itself is CPU
+work on the loop, so run a worker per core; the RPM/TPM budgets are split between them.
+
+    python api.py --port 8000 --workers 4
+"""
+import argparse
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import metrics
+from food_db import load_food_database
+from food_search import portion_entry
+from meal_backends import AsyncOpenAIBackend, compose_failed, generate_batched_async
+from meal_cache import MealCache
+from planner import ProfileError, build_plan, meal_slots, targets, validate_profile
+from user_store import UserStore
+
+# Same settings, environment variables and files as app.py
+AI_MEAL_TIMEOUT = 20
+MEAL_BACKEND = os.getenv('MEAL_BACKEND', 'openai')
+MEAL_BACKEND_URL = os.getenv('MEAL_BACKEND_URL', 'http://127.0.0.1:8808/v1')
+AI_REQUESTS_PER_MINUTE = int(os.getenv('AI_REQUESTS_PER_MINUTE', 3500))
+AI_TOKENS_PER_MINUTE = int(os.getenv('AI_TOKENS_PER_MINUTE', 200000))
+AI_MEAL_CACHE_PATH = 'meal_cache.db'
+AI_MEAL_CACHE_TTL = 7 * 24 * 3600
+AI_MEAL_CACHE_MAX_ENTRIES = 5000
+AI_MEAL_CACHE_VARIANTS = 3
+USER_DB_PATH = 'user_data.db'
+
+# Worker processes sharing the AI budgets; main() sets it for the workers it starts
+API_WORKERS = int(os.getenv('API_WORKERS', 1))
+
+# Bounds of one logged portion, as in the sidebar calorie tracker
+MAX_SERVINGS = 10.0
+MAX_CALORIES = 2000
+
+
+def build_ai_client():
+    """This worker's AsyncLLMClient with its share of the budgets; None without an API key."""
+    if MEAL_BACKEND == 'composer':
+        return None
+    from llm_client import build_async_client
+    if MEAL_BACKEND == 'stub':
+        api_key, base_url = 'stub', MEAL_BACKEND_URL
+    else:
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key, base_url = os.getenv('OPENAI_API_KEY'), None
+        if not api_key:
+            return None
+    return build_async_client(
+        api_key, base_url, rpm=max(1, AI_REQUESTS_PER_MINUTE // API_WORKERS),
+        tpm=max(1, AI_TOKENS_PER_MINUTE // API_WORKERS)
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Per-worker resources: the stores, the food database and the AI client."""
+    app.state.store = UserStore(USER_DB_PATH)
+    app.state.meal_cache = MealCache(
+        AI_MEAL_CACHE_PATH, ttl=AI_MEAL_CACHE_TTL,
+        max_entries=AI_MEAL_CACHE_MAX_ENTRIES, variants=AI_MEAL_CACHE_VARIANTS
+    )
+    app.state.food_database = load_food_database()
+    app.state.ai_client = build_ai_client()
+    yield
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(400, "request body must be JSON")
+
+
+def _number(data, field, low, high, default=None):
+    value = data.get(field, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise HTTPException(422, f"{field} must be a number between {low} and {high}")
+    return value
+
+
+def food_entry(data, database):
+    """
+    A food log entry from a request: {"food", "servings", "calories"?} for a food in
+    the database, like the tracker's matches, or {"name", "calories", "protein"?,
+    "carbs"?, "fat"?, "servings"?} for anything else.
+    """
+    if not isinstance(data, dict):
+        raise HTTPException(422, "expected a JSON object")
+    servings = _number(data, 'servings', 0.25, MAX_SERVINGS, default=1)
+    calories = _number(data, 'calories', 1, MAX_CALORIES) if 'calories' in data else None
+    if 'food' in data:
+        food = database.profile(data['food'])
+        if food is None:
+            raise HTTPException(404, f"unknown food {data['food']!r}, log it by name and calories instead")
+        return portion_entry(food, servings, calories)
+
+    name = str(data.get('name', '')).strip()
+    if not name or calories is None:
+        raise HTTPException(422, "give a known 'food', or a 'name' and 'calories'")
+    macros = {macro: _number(data, macro, 0, 300, default=0) for macro in ('protein', 'carbs', 'fat')}
+    entry = portion_entry({'food': name, 'category': 'Other', 'calories': calories, **macros}, 1, calories)
+    entry['servings'] = servings
+    return entry
+
+
+async def plan(request):
+    """A profile's plan; with "use_ai", meals are named by the AI backend; with "user_id", it is saved too."""
+    data = await read_json(request)
+    profile = validate_profile(data)
+    use_ai = bool(data.get('use_ai'))
+    state = request.app.state
+    with metrics.timer('api_request_seconds', endpoint='plan', ai=str(use_ai).lower()):
+        meal_names, failures, source = None, {}, 'composer'
+        if use_ai and state.ai_client is not None and state.ai_client.healthy():
+            meals = meal_slots(targets(profile))
+            meal_names, failures = await generate_batched_async(
+                AsyncOpenAIBackend(state.ai_client), meals,
+                profile['goal_type'], profile['health_condition'], AI_MEAL_TIMEOUT, state.meal_cache
+            )
+            # Meals the breaker refused (another request holds its half-open trial) are composed
+            from llm_client import CircuitOpenError
+            if any(isinstance(e, CircuitOpenError) for e in failures.values()):
+                metrics.count('ai_backend_fallbacks_total', reason='circuit_open')
+                compose_failed(meals, meal_names, failures, profile['health_condition'], CircuitOpenError)
+            source = 'ai'
+        elif use_ai:
+            if MEAL_BACKEND == 'composer':
+                reason = 'composer_backend'
+            else:
+                reason = 'no_api_key' if state.ai_client is None else 'circuit_open'
+            metrics.count('ai_backend_fallbacks_total', reason=reason)
+        result = build_plan(profile, meal_names)
+
+        if 'user_id' in data:
+            fields = {key: value for key, value in profile.items() if key != 'fitness_level'}
+            fields.update(result, use_ai_meals=use_ai)
+            if 'name' in data:
+                fields['name'] = str(data['name'])
+            await asyncio.to_thread(state.store.save_fields, str(data['user_id']), fields)
+
+    for e in failures.values():
+        metrics.count('ai_meal_fallbacks_total', reason=type(e).__name__)
+    result['meal_source'] = source
+    result['failures'] = {meal_type: f"{type(e).__name__}: {e}" for meal_type, e in failures.items()}
+    return JSONResponse(result)
+
+
+async def log_food(request):
+    state = request.app.state
+    entry = food_entry(await read_json(request), state.food_database)
+    logged_at = datetime.now()
+    with metrics.timer('api_request_seconds', endpoint='log_food'):
+        await asyncio.to_thread(state.store.append_food, request.path_params['user_id'], entry, logged_at)
+    return JSONResponse({'logged_at': logged_at.isoformat(), 'entry': entry}, status_code=201)
+
+
+async def food_log(request):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    records = await asyncio.to_thread(
+        request.app.state.store.food_log_entries, request.path_params['user_id'], since=today
+    )
+    entries = [{'logged_at': logged_at.isoformat(), **entry} for _, logged_at, entry in records]
+    return JSONResponse({
+        'date': today.date().isoformat(),
+        'calories': sum(entry.get('calories', 0) for entry in entries),
+        'entries': entries
+    })
+
+
+async def health(request):
+    ai_client = request.app.state.ai_client
+    return JSONResponse({
+        'status': 'ok', 'meal_backend': MEAL_BACKEND, 'ai': ai_client.stats() if ai_client else None
+    })
+
+
+async def prometheus_metrics(request):
+    return PlainTextResponse(metrics.REGISTRY.prometheus_text())
+
+
+async def profile_error(request, exc):
+    return JSONResponse({'errors': exc.errors}, status_code=422)
+
+
+async def http_error(request, exc):
+    return JSONResponse({'error': exc.detail}, status_code=exc.status_code)
+
+
+app = Starlette(
+    routes=[
+        Route('/plan', plan, methods=['POST']),
+        Route('/users/{user_id:path}/food-log', log_food, methods=['POST']),
+        Route('/users/{user_id:path}/food-log', food_log, methods=['GET']),
+        Route('/health', health),
+        Route('/metrics', prometheus_metrics)
+    ],
+    exception_handlers={ProfileError: profile_error, HTTPException: http_error},
+    lifespan=lifespan
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes, one per core')
+    args = parser.parse_args()
+
+    import uvicorn
+    os.environ['API_WORKERS'] = str(args.workers)
+    uvicorn.run(
+        'api:app', host=args.host, port=args.port, workers=args.workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)), log_level='warning'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Blocking client for the planner HTTP API (api.py), used by the Streamlit UI when
+PLANNER_API_URL is set. Standard library only.
+
+    client = PlannerClient('http://127.0.0.1:8000')
+    plan = client.plan({'age': 30, 'current_weight': 80, 'goal_weight': 72, 'use_ai': True})
+"""
+import json
+import urllib.error
+import urllib.request
+
+
+class PlannerAPIError(Exception):
+    """The API answered with an error status or could not be reached; `status` is None for the latter."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class PlannerClient:
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read())
+            except ValueError:
+                detail = e.reason
+            raise PlannerAPIError(f"{method} {path} failed with {e.code}: {detail}", e.code) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise PlannerAPIError(f"planner API at {self.base_url} is unreachable: {e}") from e
+
+    def plan(self, profile):
+        """POST /plan: targets, 'meals', 'workouts', 'exercises', 'meal_source' and meal 'failures'."""
+        return self._request('POST', '/plan', profile)
+
+    def health(self):
+        return self._request('GET', '/health')
@@ -1,30 +1,97 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import random
-import json
-import openai
-from dotenv import load_dotenv
+from datetime import datetime
+import time
 import os
-import requests
-from io import StringIO
-import streamlit as st
-from openai import OpenAI
+from meal_cache import MealCache
+from meal_backends import (
+    ComposerBackend, OpenAIBackend, GENERATION_MODES, compose_failed, generate_batched, generate_sequential,
+    get_cached_meals, stream_meals
+)
+from food_db import load_food_database
+from food_search import FoodIndex, database_foods, logged_foods, portion_entry
+from food_log import FoodLog
+from analytics import INPUT_COLUMNS, IntakeAnalytics, food_log_rows
+from recommender import MACROS, FoodRecommender
+import intake_dataset
+from user_store import UserStore
+from persistence import SessionFlush, WriteBehindWriter
+import metrics
+from forecast import forecast, goal_date, scenario_grid
+from planner import compose_meals, workout_plan
+from api_client import PlannerAPIError, PlannerClient
+from calculators import (
+    calculate_bmr, calculate_tdee, calculate_calorie_target, calculate_macro_targets,
+    get_food_recommendations, split_meal_targets
+)
 
-# Initialize OpenAI client (add this after imports)
-if "openai_client" not in st.session_state:
-    try:
-        from openai import OpenAI
-        st.session_state.openai_client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-    except KeyError:
-        st.error("❌ OPENAI_API_KEY not found in secrets. Please check your secrets.toml file")
-        st.stop()
-    except Exception as e:
-        st.error(f"❌ Failed to initialize OpenAI client: {e}")
-        st.stop()
+# Seconds to wait on each AI meal request before using the default meal
+AI_MEAL_TIMEOUT = 20
+
+# 'batched' asks for the whole plan in one JSON completion, 'concurrent' sends one request per meal,
+# 'sequential' sends them one by one, 'streaming' streams each meal straight into its Nutrition tab card
+AI_MEAL_MODE = 'batched'
+
+# Where AI meal ideas come from: 'openai', 'stub' (local OpenAI-compatible server from
+# stub_llm_server.py at MEAL_BACKEND_URL) or 'composer' (meals.csv, no network)
+MEAL_BACKEND = os.getenv('MEAL_BACKEND', 'openai')
+MEAL_BACKEND_URL = os.getenv('MEAL_BACKEND_URL', 'http://127.0.0.1:8808/v1')
+
+# Planner HTTP API (api.py). When set, profile submits are planned there, AI meals
+# included, and this app only renders the result; unset, everything runs in this process.
+# The food log stays in this process's user store either way, behind its write-behind writer
+PLANNER_API_URL = os.getenv('PLANNER_API_URL')
+PLANNER_API_TIMEOUT = 60
+REMOTE_PLAN_KEYS = ['calorie_target', 'protein_target', 'carbs_target', 'fat_target', 'meals', 'workouts']
+
+# AI meal cache: entries live a week, and each prompt keeps a few variants for variety
+AI_MEAL_CACHE_PATH = 'meal_cache.db'
+AI_MEAL_CACHE_TTL = 7 * 24 * 3600
+AI_MEAL_CACHE_MAX_ENTRIES = 5000
+AI_MEAL_CACHE_VARIANTS = 3
+
+# OpenAI budgets the shared client paces itself to (see llm_client.py)
+AI_REQUESTS_PER_MINUTE = int(os.getenv('AI_REQUESTS_PER_MINUTE', 3500))
+AI_TOKENS_PER_MINUTE = int(os.getenv('AI_TOKENS_PER_MINUTE', 200000))
+
+# User data lives in SQLite, one user per ?user= query parameter
+USER_DB_PATH = 'user_data.db'
+LEGACY_USER_DATA_PATH = 'user_data.json'
+DEFAULT_USER_ID = 'default'
+
+# Seconds a burst of changes settles before the background writer flushes it
+PERSIST_DEBOUNCE = 0.5
+
+# With METRICS_ENABLED set, timings and counters are also written here as Prometheus text,
+# e.g. for node_exporter's textfile collector; the admin panel (?admin=1) shows them either way
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_EXPORT_INTERVAL = 15
+
+# Days of logged intake shown in the Progress tab trends
+INTAKE_TREND_DAYS = 30
+
+# Weight forecast scenarios: kcal/day against maintenance (a deficit for weight loss, a surplus
+# for gain) and shares of days on plan; +1 subtracts the amounts from maintenance, -1 adds them
+FORECAST_DEFICITS = [250, 500, 750, 1000]
+FORECAST_ADHERENCES = [0.6, 0.8, 1.0]
+FORECAST_DIRECTIONS = {'Weight Loss': 1, 'Weight Gain': -1}
+
+# Columns of meals.csv-shaped rows the food recommender reads
+RECOMMENDER_COLUMNS = ['user_id', 'food'] + MACROS
+
+# Columns of the Progress tab's logged foods table
+INTAKE_TABLE_COLUMNS = ['date', 'food', 'meal_type', 'calories', 'protein', 'carbs', 'fat']
 
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Profile fields saved per user; the food log is stored row by row and today's calories come from it
+PROFILE_KEYS = [
+    'name', 'age', 'gender', 'height', 'current_weight', 'goal_weight',
+    'activity_level', 'goal_type', 'health_condition', 'water_intake',
+    'calorie_target', 'protein_target', 'carbs_target', 'fat_target',
+    'meals', 'workouts', 'exercises'
+]
+
+# Whole-script render time, recorded at the end of the script
+rerun_started = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -34,133 +101,289 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- REPLACED: Load prebuilt meals instead of GitHub CSV ---
-def load_meals_from_github():
-    """Returns prebuilt meal templates instead of loading from CSV."""
-    try:
-        # Prebuilt meal templates (no CSV loading needed)
-        meal_templates = {
-            'Weight Loss': {
-                'Breakfast': 'Greek Yogurt with Berries and Chia Seeds (300 cal, 25g protein)',
-                'Lunch': 'Grilled Chicken Salad with Quinoa (400 cal, 35g protein)',
-                'Dinner': 'Baked Salmon with Roasted Vegetables (450 cal, 40g protein)',
-                'Snack': 'Apple with Almond Butter (200 cal, 8g protein)'
-            },
-            'Weight Gain': {
-                'Breakfast': 'Oatmeal with Banana and Peanut Butter (550 cal, 20g protein)',
-                'Lunch': 'Beef and Vegetable Stir-fry with Rice (600 cal, 35g protein)',
-                'Dinner': 'Chicken with Sweet Potato and Avocado (650 cal, 45g protein)',
-                'Snack': 'Protein Shake with Oats (350 cal, 30g protein)'
-            },
-            'Weight Maintenance': {
-                'Breakfast': 'Whole Grain Toast with Eggs and Avocado (450 cal, 25g protein)',
-                'Lunch': 'Turkey and Hummus Wrap with Side Salad (500 cal, 30g protein)',
-                'Dinner': 'Fish with Quinoa and Steamed Vegetables (550 cal, 35g protein)',
-                'Snack': 'Greek Yogurt with Nuts (300 cal, 20g protein)'
-            },
-            'Muscle Building': {
-                'Breakfast': 'Protein Pancakes with Berries (500 cal, 35g protein)',
-                'Lunch': 'Lean Beef with Brown Rice and Broccoli (650 cal, 45g protein)',
-                'Dinner': 'Salmon with Sweet Potato and Asparagus (600 cal, 40g protein)',
-                'Snack': 'Cottage Cheese with Almonds (350 cal, 30g protein)'
-            }
-        }
-        
-        return meal_templates
-    except Exception as e:
-        st.error(f"Error creating meal templates: {e}")
-        # Fallback to default templates
-        return {
-            'Weight Loss': {
-                'Breakfast': 'Greek Yogurt with Berries and Chia Seeds',
-                'Lunch': 'Grilled Chicken Salad with Quinoa',
-                'Dinner': 'Baked Salmon with Roasted Vegetables',
-                'Snack': 'Apple with Almond Butter'
-            },
-            'Weight Gain': {
-                'Breakfast': 'Oatmeal with Banana and Peanut Butter',
-                'Lunch': 'Beef and Vegetable Stir-fry with Rice',
-                'Dinner': 'Chicken with Sweet Potato and Avocado',
-                'Snack': 'Protein Shake with Oats'
-            },
-            'Weight Maintenance': {
-                'Breakfast': 'Whole Grain Toast with Eggs and Avocado',
-                'Lunch': 'Turkey and Hummus Wrap with Side Salad',
-                'Dinner': 'Fish with Quinoa and Steamed Vegetables',
-                'Snack': 'Greek Yogurt with Nuts'
-            }
-        }
+@st.cache_resource
+def get_metrics_exporter():
+    """Thread rewriting METRICS_FILE, one per process; None unless metrics are on and a file is set."""
+    if not (metrics.REGISTRY.enabled and METRICS_FILE):
+        return None
+    return metrics.REGISTRY.start_file_exporter(METRICS_FILE, METRICS_EXPORT_INTERVAL)
+
+get_metrics_exporter()
+
+@st.cache_resource
+def get_user_store():
+    """One user database handle shared by every session in this process."""
+    return UserStore(USER_DB_PATH)
+
+@st.cache_resource
+def get_user_writer():
+    """Background writer that persists session changes without blocking the script."""
+    return WriteBehindWriter(get_user_store(), debounce=PERSIST_DEBOUNCE)
+
+# --- Load user data from the user store ---
+def load_user_data(user_id):
+    """Loads a user's profile and recent food log, migrating user_data.json on first use."""
+    # Changes still queued from another session of this user must land first
+    get_user_writer().flush(user_id)
+    store = get_user_store()
+    saved_data = store.load(user_id)
+    if saved_data is None and user_id == DEFAULT_USER_ID:
+        if store.import_json(user_id, LEGACY_USER_DATA_PATH):
+            saved_data = store.load(user_id)
+    return saved_data
+
+# --- Save user data to the user store ---
+@metrics.timed('save_user_data_seconds')
+def save_user_data(*keys):
+    """Marks the given profile fields (all of them by default) dirty for the background writer."""
+    fields = {key: st.session_state.get(key) for key in (keys or PROFILE_KEYS)}
+    get_user_writer().mark(st.session_state.user_id, fields)
+
+@st.cache_resource
+def get_food_index():
+    """Search index over the food database, shared by every session in this process."""
+    return FoodIndex(database_foods(food_database))
+
+def get_session_food_index():
+    """The current user's food search: foods they logged that the database lacks, over the shared index."""
+    if 'food_index' not in st.session_state:
+        st.session_state.food_index = FoodIndex(
+            logged_foods(st.session_state.food_log.today(), food_database), parent=get_food_index()
+        )
+    return st.session_state.food_index
+
+def read_all_intake(columns):
+    """(`columns` of the intake history, meals.csv-shaped rows of stored food log entries not in it)."""
+    get_user_writer().flush()
+    if intake_dataset.available():
+        # The columnar dataset holds meals.csv and the food log up to its last export
+        rows = intake_dataset.read_intake(columns=columns)
+        after_id = intake_dataset.exported_food_log_id()
+    else:
+        rows, after_id = food_database.rows, 0
+    return rows, food_log_rows(get_user_store().food_log_entries(after_id=after_id), food_database)
 
-# --- Load user data from JSON file ---
-def load_user_data():
-    """Loads user data from a JSON file if it exists."""
+@st.cache_resource
+def get_intake_analytics():
+    """Intake rollups over meals.csv and every stored food log entry, built once per process."""
+    rows, logged = read_all_intake(INPUT_COLUMNS)
+    analytics = IntakeAnalytics(rows)
+    analytics.append(logged)
+    return analytics
+
+@st.cache_resource
+def get_food_recommender():
+    """Similar-user food recommendations over meals.csv and every stored food log entry, built once per process."""
+    rows, logged = read_all_intake(RECOMMENDER_COLUMNS)
+    recommender = FoodRecommender(rows, food_database.foods)
+    recommender.append(logged)
+    return recommender
+
+def read_recent_intake(user_id, start):
+    """One user's logged foods since `start`, newest first: the intake history plus food log rows not yet exported."""
+    if intake_dataset.available():
+        history = intake_dataset.read_intake(columns=INTAKE_TABLE_COLUMNS, user_id=user_id, start=start)
+        after_id = intake_dataset.exported_food_log_id()
+    else:
+        rows = food_database.rows
+        history = rows.loc[(rows['user_id'].astype(str) == user_id) & (rows['date'] >= start), INTAKE_TABLE_COLUMNS]
+        after_id = 0
+    get_user_writer().flush(user_id)
+    logged = food_log_rows(get_user_store().food_log_entries(user_id, after_id=after_id), food_database)
+    logged = logged.loc[logged['date'] >= start, INTAKE_TABLE_COLUMNS]
+    return pd.concat([history, logged], ignore_index=True).sort_values('date', ascending=False)
+
+def log_food(entry):
+    """Appends one entry to the current user's food log."""
+    user_id = st.session_state.user_id
+    logged_at = datetime.now()
+    # Built before the entry is queued, so a first build can't count it twice
+    rows = food_log_rows([(user_id, logged_at, entry)], food_database)
+    get_intake_analytics().append(rows)
+    get_food_recommender().append(rows)
+    st.session_state.food_log.add(entry, logged_at)
+    get_user_writer().append_food(user_id, entry, logged_at)
+    # Foods the database doesn't know become suggestions for this user
+    index = get_session_food_index()
+    for food in logged_foods([entry], food_database):
+        known = index.get(food['food'])
+        food['servings'] += known['servings'] if known else 0
+        index.add(food)
+
+def reset_food_log():
+    """Clears today's entries from the current user's food log; earlier days are kept."""
+    user_id = st.session_state.user_id
+    analytics, recommender = get_intake_analytics(), get_food_recommender()
+    since = st.session_state.food_log.clear_today()
+    get_user_writer().flush(user_id)
+    rows = food_log_rows(get_user_store().food_log_entries(user_id, since=since), food_database)
+    analytics.remove(rows)
+    recommender.remove(rows)
+    get_user_writer().clear_food_log(user_id, since)
+
+@st.cache_resource
+def get_meal_cache():
+    """One on-disk AI meal cache shared by every session in this process."""
+    return MealCache(
+        AI_MEAL_CACHE_PATH, ttl=AI_MEAL_CACHE_TTL,
+        max_entries=AI_MEAL_CACHE_MAX_ENTRIES, variants=AI_MEAL_CACHE_VARIANTS
+    )
+
+def get_openai_api_key():
+    """OPENAI_API_KEY from secrets.toml, else from the environment or .env; None if it is set nowhere."""
     try:
-        with open('user_data.json', 'r') as f:
-            saved_data = json.load(f)
-            return saved_data
-    except FileNotFoundError:
+        return st.secrets["OPENAI_API_KEY"]
+    except (KeyError, FileNotFoundError):
+        from dotenv import load_dotenv
+        load_dotenv()
+        return os.getenv("OPENAI_API_KEY")
+
+@st.cache_resource
+def get_openai_client():
+    """
+    Rate-limited, retrying OpenAI client shared by every session, created on the first
+    AI request so that startup never imports openai. None without an API key.
+    """
+    api_key = get_openai_api_key()
+    if not api_key:
         return None
+    from llm_client import build_client
+    return build_client(api_key, rpm=AI_REQUESTS_PER_MINUTE, tpm=AI_TOKENS_PER_MINUTE)
 
-# --- Save user data to JSON file ---
-def save_user_data():
-    """Saves the current session state to a JSON file."""
-    keys_to_save = [
-        'name', 'age', 'gender', 'height', 'current_weight', 'goal_weight',
-        'activity_level', 'goal_type', 'health_condition', 'water_intake',
-        'calorie_target', 'protein_target', 'carbs_target', 'fat_target',
-        'daily_calories', 'food_log', 'meals', 'workouts', 'exercises'
-    ]
-    data_to_save = {key: st.session_state.get(key) for key in keys_to_save}
-    
-    with open('user_data.json', 'w') as f:
-        json.dump(data_to_save, f)
+@st.cache_resource
+def get_stub_client():
+    """The same client pointed at the local stub server (see stub_llm_server.py)."""
+    from llm_client import build_client
+    return build_client('stub', MEAL_BACKEND_URL, rpm=AI_REQUESTS_PER_MINUTE, tpm=AI_TOKENS_PER_MINUTE)
 
-def generate_ai_meal(meal_type, calories, protein, carbs, fat, goal_type, health_condition):
+def select_meal_backend():
     """
-    Uses OpenAI's API to generate a creative meal idea based on parameters.
+    (the meal idea backend selected by MEAL_BACKEND, why it fell back to the composer
+    or None): 'no_api_key' or 'circuit_open'. Reports nothing; see get_meal_backend.
     """
-    # Construct a detailed prompt for the AI
-    prompt = f"""
-    Act as an expert nutritionist and chef. Generate a single, specific meal idea for {meal_type}.
-    Nutritional Targets: {calories} calories, {protein}g protein, {carbs}g carbs, {fat}g fat.
-    User's Goal: {goal_type}.
-    Health Consideration: {health_condition}.
-    The response must be ONLY the name of the meal followed by a colon and a very short description.
-    Be creative and specific with ingredients and cooking methods.
-
-    Example: 'Mediterranean Chickpea Salad: Fresh chickpeas with cucumber, cherry tomatoes, feta cheese, kalamata olives, and a lemon-oregano vinaigrette.'
+    if MEAL_BACKEND == 'composer':
+        return ComposerBackend(), None
+    client = get_stub_client() if MEAL_BACKEND == 'stub' else get_openai_client()
+    if client is None:
+        return ComposerBackend(), 'no_api_key'
+    if not client.healthy():
+        return ComposerBackend(), 'circuit_open'
+    return OpenAIBackend(client), None
+
+def get_meal_backend():
     """
-    
+    The meal idea backend selected by MEAL_BACKEND; the composer, with a note to the
+    user, if OpenAI has no API key or its circuit breaker is open.
+    """
+    backend, fallback = select_meal_backend()
+    if fallback is not None:
+        metrics.count('ai_backend_fallbacks_total', reason=fallback)
+    if fallback == 'no_api_key':
+        st.error("❌ OPENAI_API_KEY not found in secrets.toml or the environment, composing meals from the food database instead.")
+    elif fallback == 'circuit_open':
+        st.info("🤖 The AI meal service is having trouble, so these meals come from the food database for now.")
+    return backend
+
+@st.cache_resource
+def get_planner_client():
+    """Client for the planner API at PLANNER_API_URL, or None to plan in this process."""
+    return PlannerClient(PLANNER_API_URL, timeout=PLANNER_API_TIMEOUT) if PLANNER_API_URL else None
+
+def request_remote_plan(profile, use_ai):
+    """
+    The plan for `profile` from the planner API, which also asks AI for the meals if
+    `use_ai`. None without PLANNER_API_URL or if the API fails; the plan is made here then.
+    """
+    client = get_planner_client()
+    if client is None:
+        return None
     try:
-        # Use the client from session state (modern approach)
-        client = st.session_state.openai_client
-        
-        # Call the OpenAI API with the new syntax
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=75,
-            temperature=0.8
-        )
-        return response.choices[0].message.content.strip()
-        
-    except openai.AuthenticationError:
+        with st.spinner('🤖 AI is crafting your meals...' if use_ai else 'Planning...'):
+            remote_plan = client.plan({**profile, 'use_ai': use_ai})
+    except PlannerAPIError as e:
+        metrics.count('planner_api_errors_total', status=e.status or 'unreachable')
+        st.warning(f"⚠️ The planner service failed ({e}), planning here instead.")
+        return None
+    if remote_plan['failures']:
+        st.warning(f"⚠️ AI generation failed for {', '.join(remote_plan['failures'])}, using default meals instead.")
+    return remote_plan
+
+def meal_cache_for(backend):
+    """The AI meal cache, or None for the composer, whose meals must not come back later as AI ones."""
+    return get_meal_cache() if isinstance(backend, OpenAIBackend) else None
+
+def report_meal_failures(failures):
+    """Tells the user which meals fell back to defaults, and about a bad key if that was why."""
+    if not failures:
+        return
+    for e in failures.values():
+        metrics.count('ai_meal_fallbacks_total', reason=type(e).__name__)
+    # Only AI backends fail, so openai is already imported by now
+    from openai import AuthenticationError
+    if any(isinstance(e, AuthenticationError) for e in failures.values()):
         st.error("❌ Invalid OpenAI API key. Check your secrets.toml file.")
-        return get_default_meal(meal_type)
-    except Exception as e:
-        st.error(f"⚠️ An error occurred with AI generation: {e}")
-        return get_default_meal(meal_type)
-
-def get_default_meal(meal_type):
-    """Fallback meals if AI generation fails"""
-    default_meals = {
-        "breakfast": "Oatmeal with Berries: Classic oatmeal topped with fresh berries and nuts (350 cal, 12g protein)",
-        "lunch": "Grilled Chicken Salad: Mixed greens with grilled chicken and vinaigrette (450 cal, 35g protein)", 
-        "dinner": "Baked Salmon with Vegetables: Salmon fillet with steamed broccoli and quinoa (500 cal, 40g protein)",
-        "snack": "Greek Yogurt with Honey: Protein-rich yogurt with a touch of honey (200 cal, 15g protein)"
-    }
-    return default_meals.get(meal_type, "Healthy Balanced Meal")
-    
+    st.warning(f"⚠️ AI generation failed for {', '.join(failures)}, using default meals instead.")
+
+def compose_refused_meals(meals, meal_names, failures, health_condition):
+    """
+    Composes the meals the AI client's circuit breaker refused, e.g. while another
+    session holds its half-open trial, instead of leaving them on defaults. Returns
+    the other failures.
+    """
+    if not failures:
+        return failures
+    # Only AI backends fail, so llm_client is already imported by now
+    from llm_client import CircuitOpenError
+    if any(isinstance(e, CircuitOpenError) for e in failures.values()):
+        metrics.count('ai_backend_fallbacks_total', reason='circuit_open')
+    return compose_failed(meals, meal_names, failures, health_condition, CircuitOpenError)
+
+@metrics.timed('ai_meals_seconds', mode='single')
+def generate_ai_meal(meal_type, calories, protein, carbs, fat, goal_type, health_condition):
+    """
+    Uses the meal backend to generate a creative meal idea based on parameters.
+    """
+    meal = {'meal': meal_type, 'calories': calories, 'protein': protein, 'carbs': carbs, 'fat': fat}
+    backend = get_meal_backend()
+    meal_names, failures = generate_sequential(
+        backend, [meal], goal_type, health_condition, AI_MEAL_TIMEOUT, meal_cache_for(backend)
+    )
+    report_meal_failures(compose_refused_meals([meal], meal_names, failures, health_condition))
+    return meal_names[meal_type]
+
+@metrics.timed('ai_meals_seconds', mode=AI_MEAL_MODE)
+def generate_ai_meals(meals, goal_type, health_condition):
+    """Names every meal of a plan using AI_MEAL_MODE; failed meals get their default meal."""
+    generate = GENERATION_MODES.get(AI_MEAL_MODE, generate_batched)
+    backend = get_meal_backend()
+    meal_names, failures = generate(
+        backend, meals, goal_type, health_condition, AI_MEAL_TIMEOUT, meal_cache_for(backend)
+    )
+    report_meal_failures(compose_refused_meals(meals, meal_names, failures, health_condition))
+    return meal_names
+
+@metrics.timed('ai_meals_seconds', mode='streaming')
+def stream_ai_meals(meals, goal_type, health_condition, placeholders, timeout=AI_MEAL_TIMEOUT):
+    """
+    Streams every meal at once, writing tokens into placeholders[meal_type] as they arrive.
+    A stream that errors, drops or runs past `timeout` is completed with the default meal.
+    Returns {meal_type: name}.
+    """
+    # Worker threads have no Streamlit context, so pick the backend here
+    backend = get_meal_backend()
+    meals_by_type = {meal['meal']: meal for meal in meals}
+
+    def show(meal_type, text):
+        placeholders[meal_type].markdown(meal_card_html(meals_by_type[meal_type], text + ' ▌'), unsafe_allow_html=True)
+
+    meal_names, failures = stream_meals(
+        backend, meals, goal_type, health_condition, timeout, meal_cache_for(backend), on_text=show
+    )
+    report_meal_failures(compose_refused_meals(meals, meal_names, failures, health_condition))
+    for meal_type, meal in meals_by_type.items():
+        placeholders[meal_type].markdown(meal_card_html(meal, meal_names[meal_type]), unsafe_allow_html=True)
+    return meal_names
+
 # Custom CSS for modern UI
 st.markdown("""
 <style>
@@ -234,15 +457,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- Load API Key from Secrets/Environment ---
-try:
-    openai.api_key = st.secrets["OPENAI_API_KEY"]
-except (KeyError, FileNotFoundError):
-    load_dotenv()
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-
-# --- REPLACED: Load prebuilt meal templates ---
-meal_templates = load_meals_from_github()
+# Food database from meals.csv, parsed once per process rather than per rerun
+food_database = load_food_database()
 
 # Initialize session state
 def initialize_session_state():
@@ -261,7 +477,6 @@ def initialize_session_state():
         'protein_target': 150,
         'carbs_target': 250,
         'fat_target': 67,
-        'daily_calories': 0,
         'food_log': [],
         'meals': [],
         'workouts': [],
@@ -269,8 +484,10 @@ def initialize_session_state():
         'use_ai_meals': False
     }
     
+    st.session_state.user_id = st.query_params.get('user', DEFAULT_USER_ID)
+
     # Try to load saved data first
-    saved_data = load_user_data()
+    saved_data = load_user_data(st.session_state.user_id)
     if saved_data:
         for key in default_data.keys():
             if key in saved_data:
@@ -282,271 +499,145 @@ def initialize_session_state():
         for key, value in default_data.items():
             st.session_state[key] = value
 
-initialize_session_state()
+    # Stored as (logged_at, entry) pairs; today's stay whole, earlier days become per-day totals
+    food_records = st.session_state.food_log
+    st.session_state.food_log = FoodLog.from_records(food_records)
+    st.session_state.food_index = FoodIndex(
+        logged_foods([entry for _, entry in food_records], food_database), parent=get_food_index()
+    )
 
-# Helper functions
-def calculate_bmr(weight, height, age, gender):
-    if gender == 'Male':
-        return 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-    else:
-        return 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
+# Load once per session; later reruns keep what is already in session state
+if 'initialized' not in st.session_state:
+    initialize_session_state()
+    st.session_state.initialized = True
+    # Flushes this user's queued changes when the session goes away
+    st.session_state.session_flush = SessionFlush(get_user_writer(), st.session_state.user_id)
 
-def calculate_tdee(bmr, activity_level):
-    activity_multipliers = {
-        'Sedentary': 1.2, 'Light': 1.375, 'Moderate': 1.55, 'Active': 1.725, 'Very Active': 1.9
-    }
-    return bmr * activity_multipliers.get(activity_level, 1.55)
+# Past local midnight, yesterday's entries are compacted and today's calories start from zero
+st.session_state.food_log.roll_over()
 
-def calculate_calorie_target(current_weight, goal_weight, tdee, goal_type):
-    weight_difference = current_weight - goal_weight
-    
-    if goal_type == 'Weight Loss':
-        deficit = min(1000, max(500, abs(weight_difference) * 100))
-        return max(1200, tdee - deficit)
-    elif goal_type == 'Weight Gain':
-        surplus = min(500, max(250, abs(weight_difference) * 100))
-        return tdee + surplus
-    else:
-        return tdee
+# --- UPDATED: Now uses AI if toggle is on, otherwise composes meals from meals.csv ---
+def generate_meal_plan(calorie_target, macro_targets, goal_type, health_condition):
+    meals = split_meal_targets(calorie_target, macro_targets)
 
-def calculate_macro_targets(calorie_target, goal_type):
-    if goal_type == 'Weight Loss':
-        ratios = {'protein': 0.35, 'carbs': 0.40, 'fat': 0.25}
-    elif goal_type == 'Weight Gain':
-        ratios = {'protein': 0.30, 'carbs': 0.50, 'fat': 0.20}
-    else:
-        ratios = {'protein': 0.25, 'carbs': 0.50, 'fat': 0.25}
-    
-    return {
-        'protein_target': round(calorie_target * ratios['protein'] / 4),
-        'carbs_target': round(calorie_target * ratios['carbs'] / 4),
-        'fat_target': round(calorie_target * ratios['fat'] / 9)
-    }
+    # Use AI or composed meals based on toggle
+    if st.session_state.use_ai_meals and AI_MEAL_MODE == 'streaming':
+        # Cached meals are filled now; the rest stay None and stream into their cards in tab2.
+        # Only AI backends fill the cache, so the composer never gets AI meals from it
+        backend, _ = select_meal_backend()
+        meal_names, _ = get_cached_meals(meal_cache_for(backend), meals, goal_type, health_condition)
+        for meal in meals:
+            meal['name'] = meal_names.get(meal['meal'])
+        return meals
 
-def get_food_recommendations(goal_type, health_condition):
-    recommendations = {
-        'Weight Loss': [
-            'Leafy greens (spinach, kale)',
-            'Lean proteins (chicken breast, fish)',
-            'Whole grains (quinoa, brown rice)',
-            'Berries and low-sugar fruits',
-            'Greek yogurt and cottage cheese'
-        ],
-        'Weight Gain': [
-            'Nuts and nut butters',
-            'Avocados and healthy oils',
-            'Whole milk and full-fat dairy',
-            'Complex carbs (sweet potatoes, oats)',
-            'Protein shakes with banana'
-        ],
-        'Weight Maintenance': [
-            'Balanced meals with all macros',
-            'Colorful vegetables',
-            'Lean proteins and healthy fats',
-            'Whole fruits in moderation',
-            'Hydrating foods like cucumbers'
-        ]
-    }
-    
-    health_modifiers = {
-        'Diabetes': ['Low glycemic index foods', 'High fiber vegetables', 'Lean proteins'],
-        'Hypertension': ['Low sodium foods', 'Potassium-rich foods', 'Whole grains'],
-        'Heart Condition': ['Omega-3 rich foods', 'Low saturated fats', 'Fiber-rich foods'],
-        'Healthy': ['Varied balanced diet', 'Colorful fruits and vegetables', 'Lean proteins']
-    }
-    
-    base_recommendations = recommendations.get(goal_type, [])
-    health_recommendations = health_modifiers.get(health_condition, [])
-    
-    return base_recommendations + health_recommendations
+    if st.session_state.use_ai_meals:
+        # Either one request for the whole plan or all four at once, so the plan takes one round trip
+        with st.spinner('🤖 AI is crafting your meals...'):
+            meal_names = generate_ai_meals(meals, goal_type, health_condition)
+        for meal in meals:
+            meal['name'] = meal_names[meal['meal']]
+        return meals
 
-# --- UPDATED: Now uses AI if toggle is on, otherwise uses prebuilt meals ---
-def generate_meal_plan(calorie_target, macro_targets, goal_type, health_condition):
-    meals = []
-    distributions = {'Breakfast': 0.25, 'Lunch': 0.35, 'Dinner': 0.30, 'Snack': 0.10}
-    
-    for meal_type, distribution in distributions.items():
-        meal_cals = round(calorie_target * distribution)
-        meal_protein = round(macro_targets['protein_target'] * distribution)
-        meal_carbs = round(macro_targets['carbs_target'] * distribution)
-        meal_fat = round(macro_targets['fat_target'] * distribution)
-        
-        # Use AI or template based on toggle
-        if st.session_state.use_ai_meals:
-            with st.spinner(f'🤖 AI is crafting your {meal_type}...'):
-                meal_name = generate_ai_meal(
-                    meal_type, meal_cals, meal_protein, meal_carbs, meal_fat, 
-                    goal_type, health_condition
-                )
-        else:
-            # Use the meal from prebuilt templates
-            template = meal_templates.get(goal_type, meal_templates['Weight Loss'])
-            meal_name = template[meal_type]
-        
-        meals.append({
-            'meal': meal_type,
-            'name': meal_name,
-            'calories': meal_cals,
-            'protein': meal_protein,
-            'carbs': meal_carbs,
-            'fat': meal_fat
-        })
-    
+    # Foods from meals.csv whose summed macros best match each slot
+    error = compose_meals(meals, goal_type, health_condition)
+    if error is not None:
+        st.warning(f"⚠️ Could not compose meals from the food database ({error}), using templates instead.")
     return meals
 
-def generate_workout_plan(goal_type, health_condition, fitness_level):
-    workouts = []
-    
-    workout_templates = {
-        'Weight Loss': {
-            'Healthy': [
-                {'day': 'Monday', 'type': 'Cardio', 'duration': 45, 'description': 'Running or Cycling', 'intensity': 'High'},
-                {'day': 'Tuesday', 'type': 'Strength', 'duration': 30, 'description': 'Full Body Circuit', 'intensity': 'Medium'},
-                {'day': 'Wednesday', 'type': 'HIIT', 'duration': 30, 'description': 'Interval Training', 'intensity': 'High'},
-                {'day': 'Thursday', 'type': 'Active Recovery', 'duration': 30, 'description': 'Yoga or Stretching', 'intensity': 'Low'},
-                {'day': 'Friday', 'type': 'Strength', 'duration': 40, 'description': 'Upper Body Focus', 'intensity': 'Medium'},
-                {'day': 'Saturday', 'type': 'Cardio', 'duration': 60, 'description': 'Swimming or Hiking', 'intensity': 'Medium'},
-                {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
-            ],
-            'Diabetes': [
-                {'day': 'Monday', 'type': 'Walking', 'duration': 30, 'description': 'Brisk Walking', 'intensity': 'Low'},
-                {'day': 'Tuesday', 'type': 'Strength', 'duration': 25, 'description': 'Light Weights', 'intensity': 'Low'},
-                {'day': 'Wednesday', 'type': 'Yoga', 'duration': 40, 'description': 'Gentle Yoga', 'intensity': 'Low'},
-                {'day': 'Thursday', 'type': 'Rest', 'duration': 0, 'description': 'Rest Day', 'intensity': 'None'},
-                {'day': 'Friday', 'type': 'Walking', 'duration': 35, 'description': 'Moderate Pace', 'intensity': 'Medium'},
-                {'day': 'Saturday', 'type': 'Swimming', 'duration': 30, 'description': 'Light Swimming', 'intensity': 'Low'},
-                {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
-            ]
-        },
-        'Weight Gain': {
-            'Healthy': [
-                {'day': 'Monday', 'type': 'Strength', 'duration': 60, 'description': 'Chest & Triceps', 'intensity': 'High'},
-                {'day': 'Tuesday', 'type': 'Strength', 'duration': 60, 'description': 'Back & Biceps', 'intensity': 'High'},
-                {'day': 'Wednesday', 'type': 'Cardio', 'duration': 20, 'description': 'Light Cardio', 'intensity': 'Low'},
-                {'day': 'Thursday', 'type': 'Strength', 'duration': 60, 'description': 'Legs & Shoulders', 'intensity': 'High'},
-                {'day': 'Friday', 'type': 'Strength', 'duration': 45, 'description': 'Full Body', 'intensity': 'Medium'},
-                {'day': 'Saturday', 'type': 'Active Recovery', 'duration': 30, 'description': 'Walking or Yoga', 'intensity': 'Low'},
-                {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
-            ]
-        }
-    }
-    
-    # Default template if specific combination not found
-    default_template = [
-        {'day': 'Monday', 'type': 'Strength', 'duration': 45, 'description': 'Upper Body', 'intensity': 'Medium'},
-        {'day': 'Tuesday', 'type': 'Cardio', 'duration': 40, 'description': 'Running', 'intensity': 'Medium'},
-        {'day': 'Wednesday', 'type': 'Strength', 'duration': 45, 'description': 'Lower Body', 'intensity': 'Medium'},
-        {'day': 'Thursday', 'type': 'Yoga', 'duration': 60, 'description': 'Flexibility', 'intensity': 'Low'},
-        {'day': 'Friday', 'type': 'Full Body', 'duration': 50, 'description': 'Circuit Training', 'intensity': 'Medium'},
-        {'day': 'Saturday', 'type': 'Outdoor', 'duration': 90, 'description': 'Hiking/Sports', 'intensity': 'High'},
-        {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
-    ]
-    
-    template = workout_templates.get(goal_type, {}).get(health_condition, default_template)
-    return template
-
-def generate_exercises(workout_type):
-    exercises_db = {
-        'Strength': ['Bench Press 3x8-12', 'Squats 4x8-10', 'Deadlifts 3x6-8', 'Pull-ups 3xMax'],
-        'Cardio': ['Running 30min', 'Cycling 45min', 'Elliptical 30min', 'Rowing 25min'],
-        'HIIT': ['Burpees 45s/15s', 'Jump Squats 30s/30s', 'Mountain Climbers 40s/20s'],
-        'Yoga': ['Sun Salutations', 'Warrior Series', 'Balance Poses', 'Flexibility Flow'],
-        'Walking': ['Brisk Walk 30min', 'Interval Walking', 'Incline Walking'],
-        'Swimming': ['Freestyle Laps', 'Breaststroke', 'Water Aerobics']
-    }
-    return exercises_db.get(workout_type, ['Custom exercises based on your level'])
-
-# Main app layout
-st.markdown('<div class="main-header">💪 FitLife AI Planner</div>', unsafe_allow_html=True)
-st.markdown(f'<div class="user-welcome">Welcome, {st.session_state.name}!</div>', unsafe_allow_html=True)
-
-# Sidebar - User Profile
-with st.sidebar:
-    st.markdown("### 👤 User Profile")
-    
-    with st.form("user_profile"):
-        name = st.text_input("Your Name", st.session_state.name)
-        age = st.number_input("Age", min_value=5, max_value=100, value=st.session_state.age)
-        gender = st.selectbox("Gender", ["Male", "Female", "Other"], 
-                            index=["Male", "Female", "Other"].index(st.session_state.gender))
-        height = st.slider("Height (cm)", 140, 220, st.session_state.height)
-        current_weight = st.slider("Current Weight (kg)", 40, 150, st.session_state.current_weight)
-        goal_weight = st.slider("Goal Weight (kg)", 40, 150, st.session_state.goal_weight)
-        activity_level = st.selectbox("Activity Level", 
-                                    ["Sedentary", "Light", "Moderate", "Active", "Very Active"],
-                                    index=["Sedentary", "Light", "Moderate", "Active", "Very Active"].index(st.session_state.activity_level))
-        goal_type = st.selectbox("Goal Type", 
-                                ["Weight Loss", "Weight Maintenance", "Weight Gain"],
-                                index=["Weight Loss", "Weight Maintenance", "Weight Gain"].index(st.session_state.goal_type))
-        health_condition = st.selectbox("Health Condition", 
-                                      ["Healthy", "Diabetes", 'Hypertension', "Heart Condition"],
-                                      index=["Healthy", "Diabetes", "Hypertension", "Heart Condition"].index(st.session_state.health_condition))
-        fitness_level = st.selectbox("Fitness Level", ["Beginner", "Intermediate", "Advanced"], index=0)
-        
-        # Toggle for AI Meals
-        use_ai = st.checkbox("Use AI for Meal Ideas 🤖", value=st.session_state.use_ai_meals)
-        
-        if st.form_submit_button("🚀 Update Profile & Generate Plan"):
-            st.session_state.update({
-                'name': name, 'age': age, 'gender': gender, 'height': height,
-                'current_weight': current_weight, 'goal_weight': goal_weight,
-                'activity_level': activity_level, 'goal_type': goal_type,
-                'health_condition': health_condition,
-                'use_ai_meals': use_ai
-            })
-            
-            # Recalculate everything
-            bmr = calculate_bmr(current_weight, height, age, gender)
-            tdee = calculate_tdee(bmr, activity_level)
-            calorie_target = calculate_calorie_target(current_weight, goal_weight, tdee, goal_type)
-            macro_targets = calculate_macro_targets(calorie_target, goal_type)
-            
-            st.session_state.update({
-                'calorie_target': calorie_target,
-                'protein_target': macro_targets['protein_target'],
-                'carbs_target': macro_targets['carbs_target'],
-                'fat_target': macro_targets['fat_target']
-            })
-            
-            # Generate new plans
-            st.session_state.meals = generate_meal_plan(calorie_target, macro_targets, goal_type, health_condition)
-            st.session_state.workouts = generate_workout_plan(goal_type, health_condition, fitness_level)
-            
-            today_workout = next((w for w in st.session_state.workouts if w['day'] == datetime.now().strftime('%A')), None)
-            if today_workout:
-                st.session_state.exercises = generate_exercises(today_workout['type'])
-            
-            # Save the updated data
-            save_user_data()
-            st.success("Profile updated and saved successfully!")
+def meal_card_html(meal, name):
+    """HTML for one meal card in the Nutrition tab."""
+    return f'''
+                <div class="meal-card">
+                    <h4>🍽️ {meal['meal']}: {name}</h4>
+                    <p>Calories: {meal['calories']} kcal</p>
+                    <p>Protein: {meal['protein']}g | Carbs: {meal['carbs']}g | Fat: {meal['fat']}g</p>
+                </div>
+                '''
 
-    # Calorie Tracker in Sidebar
+@st.fragment
+@metrics.timed('fragment_seconds', fragment='calorie_tracker')
+def calorie_tracker():
+    """Sidebar calorie tracker. Searching and filling in a food reruns only this fragment."""
     st.markdown("### 📊 Calorie Tracker")
     food_name = st.text_input("Food Item")
-    food_calories = st.number_input("Calories", min_value=0, max_value=2000, value=0)
-    
+    suggestions = get_session_food_index().search(food_name) if food_name.strip() else []
+
+    # Pick a known food (ranked prefix/fuzzy matches) or log the typed name as a new food
+    food = None
+    if suggestions:
+        names = [suggestion['food'] for suggestion in suggestions]
+        options = names if names[0].lower() == food_name.strip().lower() else names + [f"➕ New food: {food_name.strip()}"]
+        choice = st.selectbox("Matches", options)
+        food = suggestions[names.index(choice)] if choice in names else None
+    servings = st.number_input("Servings", min_value=0.25, max_value=10.0, value=1.0, step=0.25)
+
+    # Known foods fill in calories for the portion; a typed value scales the macros to match
+    default_calories = min(2000, round(food['calories'] * servings)) if food else 0
+    food_calories = st.number_input(
+        "Calories", min_value=0, max_value=2000, value=default_calories,
+        key=f"food_calories_{food['food'] if food else ''}_{servings}"
+    )
+    if food:
+        calories_override = food_calories if food_calories not in (0, default_calories) else None
+        food_entry = portion_entry(food, servings, calories_override)
+        st.caption(f"{food['food']} ({food['category']}), {servings:g} serving(s): {food_entry['calories']} kcal, "
+                   f"{food_entry['protein']:.0f}g protein, {food_entry['carbs']:.0f}g carbs, {food_entry['fat']:.0f}g fat")
+    else:
+        macro_col1, macro_col2, macro_col3 = st.columns(3)
+        food_macros = {
+            'protein': macro_col1.number_input("Protein (g)", min_value=0.0, max_value=300.0, value=0.0, step=1.0),
+            'carbs': macro_col2.number_input("Carbs (g)", min_value=0.0, max_value=300.0, value=0.0, step=1.0),
+            'fat': macro_col3.number_input("Fat (g)", min_value=0.0, max_value=300.0, value=0.0, step=1.0)
+        }
+        food_entry = portion_entry(
+            {'food': food_name.strip(), 'category': 'Other', 'calories': food_calories, **food_macros}, 1, food_calories
+        )
+        food_entry['servings'] = servings
+
     if st.button("➕ Add Food"):
-        if food_name and food_calories > 0:
-            st.session_state.food_log.append({'name': food_name, 'calories': food_calories})
-            st.session_state.daily_calories += food_calories
-            save_user_data()
-            st.success(f"Added {food_name} ({food_calories} kcal)")
+        if food_entry['name'] and food_entry['calories'] > 0:
+            log_food(food_entry)
+            # Today's calories also show on the Dashboard and Progress tabs, so the whole page reruns
+            st.session_state.tracker_notice = f"Added {food_entry['name']} ({food_entry['calories']} kcal)"
+            st.rerun()
+    if 'tracker_notice' in st.session_state:
+        st.success(st.session_state.pop('tracker_notice'))
     
-    st.metric("Today's Calories", f"{st.session_state.daily_calories} / {st.session_state.calorie_target}")
-    progress = min(1.0, st.session_state.daily_calories / st.session_state.calorie_target)
+    # This fragment can rerun on its own past midnight
+    st.session_state.food_log.roll_over()
+    daily_calories = st.session_state.food_log.daily_calories
+    st.metric("Today's Calories", f"{daily_calories} / {st.session_state.calorie_target}")
+    progress = min(1.0, daily_calories / st.session_state.calorie_target)
     st.progress(progress)
+    recent_days = st.session_state.food_log.history(days=7)
+    if len(recent_days):
+        st.caption(f"Last 7 days: {recent_days['calories'].mean():.0f} kcal/day over {len(recent_days)} logged days")
     
-    # Button to reset daily calories
-    if st.button("🔁 Reset Daily Log"):
-        st.session_state.daily_calories = 0
-        st.session_state.food_log = []
-        save_user_data()
-        st.success("Daily log reset!")
+    # Button to reset today's calories
+    if st.button("🔁 Reset Today's Log", help="Removes the foods logged today; earlier days stay in your history."):
+        reset_food_log()
+        st.session_state.tracker_notice = "Today's log reset!"
+        st.rerun()
 
-# Main content - Tabs
-tab1, tab2, tab3, tab4 = st.tabs(["🏠 Dashboard", "🍽️ Nutrition", "💪 Workouts", "📊 Progress"])
+    # Background save status
+    writer_stats = get_user_writer().stats()
+    st.caption(f"💾 {writer_stats['queue_depth']} unsaved changes · last save took {writer_stats['last_flush_ms']:.1f} ms")
 
-with tab1:
+def metrics_panel():
+    """Sidebar admin panel with the in-process histograms and counters (see metrics.py)."""
+    with st.expander("📈 Metrics"):
+        if not metrics.REGISTRY.enabled:
+            st.caption("Metrics are off. Start the app with METRICS_ENABLED=1 to record them.")
+            return
+        summary = metrics.REGISTRY.summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary).round(2), use_container_width=True, hide_index=True)
+        st.download_button("⬇️ Prometheus text", metrics.REGISTRY.prometheus_text(), file_name='fitmax_metrics.prom')
+
+@st.fragment
+@metrics.timed('fragment_seconds', fragment='dashboard_tab')
+def dashboard_tab():
+    """Dashboard tab. The water slider reruns only this fragment."""
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -597,7 +688,7 @@ with tab1:
             new_water = st.slider("Update water intake", 0, 12, st.session_state.water_intake)
             if new_water != st.session_state.water_intake:
                 st.session_state.water_intake = new_water
-                save_user_data()
+                save_user_data('water_intake')
     
     with col2:
         st.markdown('<div class="section-header">💡 Today\'s Summary</div>', unsafe_allow_html=True)
@@ -609,24 +700,33 @@ with tab1:
         if today_workout:
             st.markdown(f'<div class="workout-card"><strong>💪 Today\'s Workout:</strong> {today_workout["type"]} ({today_workout["duration"]}min)</div>', unsafe_allow_html=True)
         
-        st.markdown(f'<div class="metric-card">Calories Today<br><h3>{st.session_state.daily_calories}/{st.session_state.calorie_target}</h3></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-card">Calories Today<br><h3>{st.session_state.food_log.daily_calories}/{st.session_state.calorie_target}</h3></div>', unsafe_allow_html=True)
 
-with tab2:
+@st.fragment
+@metrics.timed('fragment_seconds', fragment='nutrition_tab')
+def nutrition_tab():
+    """Nutrition tab: the meal plan, with unnamed AI meals streamed into their cards, and recommended foods: the goal's and similar users'."""
     st.markdown('<div class="section-header">🍽️ Nutrition Plan</div>', unsafe_allow_html=True)
     
     if st.session_state.meals:
         meal_col1, meal_col2 = st.columns(2)
+        placeholders = {}
         
         for i, meal in enumerate(st.session_state.meals):
             col = meal_col1 if i % 2 == 0 else meal_col2
             with col:
-                st.markdown(f'''
-                <div class="meal-card">
-                    <h4>🍽️ {meal['meal']}: {meal['name']}</h4>
-                    <p>Calories: {meal['calories']} kcal</p>
-                    <p>Protein: {meal['protein']}g | Carbs: {meal['carbs']}g | Fat: {meal['fat']}g</p>
-                </div>
-                ''', unsafe_allow_html=True)
+                placeholders[meal['meal']] = st.empty()
+                placeholders[meal['meal']].markdown(meal_card_html(meal, meal['name'] or '🤖 ...'), unsafe_allow_html=True)
+
+        # Meals left unnamed by a streaming plan are written in token by token
+        streaming_meals = [meal for meal in st.session_state.meals if meal['name'] is None]
+        if streaming_meals:
+            meal_names = stream_ai_meals(
+                streaming_meals, st.session_state.goal_type, st.session_state.health_condition, placeholders
+            )
+            for meal in streaming_meals:
+                meal['name'] = meal_names[meal['meal']]
+            save_user_data('meals')
     
     # Food Recommendations
     st.markdown('<div class="section-header">🌟 Recommended Foods</div>', unsafe_allow_html=True)
@@ -638,7 +738,21 @@ with tab2:
         with col:
             st.write(f"✅ {rec}")
 
-with tab3:
+    # Foods logged by users who eat alike and hit this plan's macro split
+    targets = {f'{macro}_target': st.session_state[f'{macro}_target'] for macro in MACROS}
+    similar = get_food_recommender().recommend(st.session_state.user_id, targets)
+    if similar:
+        st.markdown("**Popular with people on similar plans**")
+        sim_col1, sim_col2 = st.columns(2)
+        for i, rec in enumerate(similar):
+            col = sim_col1 if i % 2 == 0 else sim_col2
+            with col:
+                st.write(f"🍴 {rec['food']} · logged by {rec['users']} similar users")
+
+@st.fragment
+@metrics.timed('fragment_seconds', fragment='workouts_tab')
+def workouts_tab():
+    """Workouts tab: today's workout and the weekly schedule."""
     st.markdown('<div class="section-header">💪 Workout Plan</div>', unsafe_allow_html=True)
     
     if st.session_state.workouts:
@@ -663,7 +777,61 @@ with tab3:
         workout_df = pd.DataFrame(st.session_state.workouts)
         st.dataframe(workout_df, use_container_width=True)
 
-with tab4:
+def weight_forecast(daily):
+    """
+    Projected weight and goal date from the calorie target, or the logged intake, at the
+    adherence the slider sets; the goal over a grid of deficits and adherences below it.
+    """
+    st.markdown('<div class="section-header">⚖️ Weight Forecast</div>', unsafe_allow_html=True)
+    current_weight, goal_weight = st.session_state.current_weight, st.session_state.goal_weight
+    if current_weight == goal_weight:
+        st.info("You're at your goal weight. Set a new goal in your profile to see a forecast.")
+        return
+    profile = (current_weight, goal_weight, st.session_state.height, st.session_state.age,
+               st.session_state.gender, st.session_state.activity_level)
+
+    control_col1, control_col2 = st.columns(2)
+    sources = ["Calorie target"] + ([f"Logged intake ({len(daily)} days)"] if not daily.empty else [])
+    source = control_col1.radio("Intake", sources, horizontal=True)
+    if source == sources[0]:
+        intake = st.session_state.calorie_target
+        adherence = control_col2.slider("Days on plan (%)", 0, 100, 80, step=5) / 100
+    else:
+        # The log already shows how closely the plan was followed
+        intake, adherence = daily['calories'].mean(), 1.0
+
+    with metrics.timer('forecast_seconds'):
+        result = forecast(*profile, intake=intake, adherence=adherence)
+    low, median, high = (goal_date(days) for days in result['goal_days'][0])
+    if median is None:
+        st.warning(f"At {intake:.0f} kcal/day you're unlikely to reach {goal_weight} kg. "
+                   "Adjust your intake or goal to get a projected date.")
+    else:
+        band = f"between {low:%b %d, %Y} and {high:%b %d, %Y}" if high is not None else f"from {low:%b %d, %Y}, if at all"
+        st.metric("Projected goal date", f"{median:%b %d, %Y}", f"in {result['goal_days'][0, 1] / 7:.0f} weeks",
+                  delta_color='off')
+        st.caption(f"80% of projections reach {goal_weight} kg {band}.")
+    bands = result['weight'][0]
+    st.line_chart(pd.DataFrame(
+        {'Low (10%)': bands[0], 'Median': bands[1], 'High (90%)': bands[2], 'Goal': float(goal_weight)},
+        index=result['dates']
+    ))
+
+    sign = FORECAST_DIRECTIONS.get(st.session_state.goal_type)
+    if sign:
+        with st.expander("🧮 Deficit and adherence scenarios"):
+            grid = scenario_grid(*profile, deficits=[sign * amount for amount in FORECAST_DEFICITS],
+                                 adherences=FORECAST_ADHERENCES)
+            grid.index = [f"{adherence:.0%} days on plan" for adherence in FORECAST_ADHERENCES]
+            grid.columns = [f"{'-' if sign > 0 else '+'}{amount} kcal/day" for amount in FORECAST_DEFICITS]
+            st.caption(f"Median weeks to {goal_weight} kg by daily deficit or surplus against maintenance")
+            st.dataframe(grid.round(0), use_container_width=True)
+
+
+@st.fragment
+@metrics.timed('fragment_seconds', fragment='progress_tab')
+def progress_tab():
+    """Progress tab: the plan against the targets and the logged intake trends."""
     st.markdown('<div class="section-header">📊 Progress Analytics</div>', unsafe_allow_html=True)
     
     # Nutrition progress
@@ -681,4 +849,166 @@ with tab4:
         
         with progress_col2:
             st.metric("Protein", f"{total_protein}g", f"{total_protein - st.session_state.protein_target}g")
-            st.progress(min(1.0, total_protein / st
+            st.progress(min(1.0, total_protein / st.session_state.protein_target))
+        
+        with progress_col3:
+            st.metric("Carbs", f"{total_carbs}g", f"{total_carbs - st.session_state.carbs_target}g")
+            st.progress(min(1.0, total_carbs / st.session_state.carbs_target))
+        
+        with progress_col4:
+            st.metric("Fat", f"{total_fat}g", f"{total_fat - st.session_state.fat_target}g")
+            st.progress(min(1.0, total_fat / st.session_state.fat_target))
+
+    analytics = get_intake_analytics()
+    user_id = st.session_state.user_id
+    daily = analytics.daily(user_id, days=INTAKE_TREND_DAYS)
+    weight_forecast(daily)
+
+    # Logged intake against the targets, read from the precomputed rollups
+    st.markdown('<div class="section-header">📈 Intake Trends</div>', unsafe_allow_html=True)
+    if daily.empty:
+        st.info("Log food in the sidebar to see your intake trends here.")
+    else:
+        st.caption(f"Last {INTAKE_TREND_DAYS} days up to {daily.index.max():%Y-%m-%d}, {len(daily)} days logged")
+        targets = {
+            'calories': st.session_state.calorie_target,
+            'protein': st.session_state.protein_target,
+            'carbs': st.session_state.carbs_target,
+            'fat': st.session_state.fat_target
+        }
+        trend_cols = st.columns(4)
+        for col, (nutrient, target) in zip(trend_cols, targets.items()):
+            unit = '' if nutrient == 'calories' else 'g'
+            average = daily[nutrient].mean()
+            col.metric(f"Avg {nutrient.title()}/day", f"{average:.0f}{unit}", f"{average - target:.0f}{unit} vs target")
+
+        st.line_chart(pd.DataFrame({'Calories': daily['calories'], 'Target': targets['calories']}, index=daily.index))
+
+        weekly = analytics.weekly(user_id).tail(8)
+        weekly_table = pd.DataFrame({
+            'Days logged': weekly['days'],
+            'Calories/day': weekly['calories'].round(0),
+            'vs Target': (weekly['calories'] - targets['calories']).round(0),
+            'Protein/day (g)': weekly['protein'].round(1),
+            'Carbs/day (g)': weekly['carbs'].round(1),
+            'Fat/day (g)': weekly['fat'].round(1)
+        })
+        weekly_table.index = weekly_table.index.strftime('%Y-%m-%d')
+        weekly_table.index.name = 'Week of'
+        st.dataframe(weekly_table, use_container_width=True)
+
+        breakdown_col1, breakdown_col2 = st.columns(2)
+        with breakdown_col1:
+            st.caption("Calories by category, latest month")
+            st.bar_chart(analytics.breakdown(user_id, 'category')['calories'])
+        with breakdown_col2:
+            st.caption("Calories by meal, latest month")
+            st.bar_chart(analytics.breakdown(user_id, 'meal_type')['calories'])
+
+        with st.expander("🧾 Logged foods"):
+            st.dataframe(read_recent_intake(user_id, daily.index.min()), use_container_width=True, hide_index=True)
+
+# Main app layout
+st.markdown('<div class="main-header">💪 FitLife AI Planner</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="user-welcome">Welcome, {st.session_state.name}!</div>', unsafe_allow_html=True)
+
+# Sidebar - User Profile
+with st.sidebar:
+    st.markdown("### 👤 User Profile")
+    
+    with st.form("user_profile"):
+        name = st.text_input("Your Name", st.session_state.name)
+        age = st.number_input("Age", min_value=5, max_value=100, value=st.session_state.age)
+        gender = st.selectbox("Gender", ["Male", "Female", "Other"], 
+                            index=["Male", "Female", "Other"].index(st.session_state.gender))
+        height = st.slider("Height (cm)", 140, 220, st.session_state.height)
+        current_weight = st.slider("Current Weight (kg)", 40, 150, st.session_state.current_weight)
+        goal_weight = st.slider("Goal Weight (kg)", 40, 150, st.session_state.goal_weight)
+        activity_level = st.selectbox("Activity Level", 
+                                    ["Sedentary", "Light", "Moderate", "Active", "Very Active"],
+                                    index=["Sedentary", "Light", "Moderate", "Active", "Very Active"].index(st.session_state.activity_level))
+        goal_type = st.selectbox("Goal Type", 
+                                ["Weight Loss", "Weight Maintenance", "Weight Gain"],
+                                index=["Weight Loss", "Weight Maintenance", "Weight Gain"].index(st.session_state.goal_type))
+        health_condition = st.selectbox("Health Condition", 
+                                      ["Healthy", "Diabetes", 'Hypertension', "Heart Condition"],
+                                      index=["Healthy", "Diabetes", "Hypertension", "Heart Condition"].index(st.session_state.health_condition))
+        fitness_level = st.selectbox("Fitness Level", ["Beginner", "Intermediate", "Advanced"], index=0)
+        
+        # Toggle for AI Meals
+        use_ai = st.checkbox("Use AI for Meal Ideas 🤖", value=st.session_state.use_ai_meals)
+        
+        if st.form_submit_button("🚀 Update Profile & Generate Plan"):
+            st.session_state.update({
+                'name': name, 'age': age, 'gender': gender, 'height': height,
+                'current_weight': current_weight, 'goal_weight': goal_weight,
+                'activity_level': activity_level, 'goal_type': goal_type,
+                'health_condition': health_condition,
+                'use_ai_meals': use_ai
+            })
+            
+            with metrics.timer('plan_seconds', ai=str(use_ai).lower()):
+                profile = {
+                    'age': age, 'gender': gender, 'height': height, 'current_weight': current_weight,
+                    'goal_weight': goal_weight, 'activity_level': activity_level, 'goal_type': goal_type,
+                    'health_condition': health_condition, 'fitness_level': fitness_level
+                }
+                remote_plan = request_remote_plan(profile, use_ai)
+                if remote_plan is not None:
+                    st.session_state.update({key: remote_plan[key] for key in REMOTE_PLAN_KEYS})
+                    # Today's exercises come with the plan; like a local plan, a rest day keeps the last ones
+                    if remote_plan.get('exercises'):
+                        st.session_state.exercises = remote_plan['exercises']
+                else:
+                    # Recalculate everything
+                    bmr = calculate_bmr(current_weight, height, age, gender)
+                    tdee = calculate_tdee(bmr, activity_level)
+                    calorie_target = calculate_calorie_target(current_weight, goal_weight, tdee, goal_type)
+                    macro_targets = calculate_macro_targets(calorie_target, goal_type)
+                
+                    st.session_state.update({
+                        'calorie_target': calorie_target,
+                        'protein_target': macro_targets['protein_target'],
+                        'carbs_target': macro_targets['carbs_target'],
+                        'fat_target': macro_targets['fat_target']
+                    })
+                
+                    # Generate new plans
+                    st.session_state.meals = generate_meal_plan(calorie_target, macro_targets, goal_type, health_condition)
+                    st.session_state.workouts, exercises = workout_plan(goal_type, health_condition, fitness_level)
+                    if exercises:
+                        st.session_state.exercises = exercises
+            
+            # Save the updated data
+            save_user_data()
+            st.success("Profile updated and saved successfully!")
+
+    # Calorie Tracker in Sidebar
+    calorie_tracker()
+
+    # Timings and counters for whoever runs the app, at ?admin=1
+    if st.query_params.get('admin') == '1':
+        metrics_panel()
+
+# Main content - Tabs. Only the selected tab runs; switching tabs reruns the page to render it
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["🏠 Dashboard", "🍽️ Nutrition", "💪 Workouts", "📊 Progress"], key='active_tab', on_change='rerun'
+)
+
+with tab1:
+    if tab1.open:
+        dashboard_tab()
+
+with tab2:
+    if tab2.open:
+        nutrition_tab()
+
+with tab3:
+    if tab3.open:
+        workouts_tab()
+
+with tab4:
+    if tab4.open:
+        progress_tab()
+
+metrics.observe('rerun_seconds', time.perf_counter() - rerun_started)
@@ -0,0 +1,141 @@
+"""
+Vectorized planner for many profiles at once, for nightly regeneration outside Streamlit.
+
+Each function mirrors a scalar one in calculators.py, takes NumPy arrays (or Series)
+instead of single values and returns the same numbers element by element. `plan`
+runs the whole pipeline over a DataFrame of profiles.
+
+    from batch_planner import plan
+    plans = plan(profiles)   # columns as in PROFILE_COLUMNS
+"""
+import numpy as np
+import pandas as pd
+
+from catalog import (
+    ACTIVITY_MULTIPLIERS, DEFAULT_WORKOUT_TEMPLATE, MACRO_RATIOS, MEAL_DISTRIBUTIONS, WORKOUT_TEMPLATES
+)
+
+PROFILE_COLUMNS = [
+    'current_weight', 'goal_weight', 'height', 'age', 'gender', 'activity_level', 'goal_type', 'health_condition'
+]
+
+# Workout template keys as "<goal type>/<health condition>", plus the default template
+DEFAULT_WORKOUT_KEY = 'default'
+WORKOUT_KEYS = [DEFAULT_WORKOUT_KEY] + [
+    f"{goal_type}/{health_condition}"
+    for goal_type, templates in WORKOUT_TEMPLATES.items() for health_condition in templates
+]
+
+
+def workout_template(key):
+    """The workout template a WORKOUT_KEYS key stands for, as generate_workout_plan returns it."""
+    if key == DEFAULT_WORKOUT_KEY:
+        return [dict(workout) for workout in DEFAULT_WORKOUT_TEMPLATE]
+    goal_type, health_condition = key.split('/', 1)
+    return [dict(workout) for workout in WORKOUT_TEMPLATES[goal_type][health_condition]]
+
+
+def _labels(values):
+    """Factorized string labels: (integer codes, unique values)."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes, list(uniques)
+
+
+def _lookup(values, table, default):
+    """Maps each label through `table`, `default` where it is missing."""
+    codes, uniques = _labels(values)
+    return np.array([table.get(value, default) for value in uniques], dtype=np.float64)[codes]
+
+
+def _round(values):
+    # np.round rounds half to even like Python's round
+    return np.round(values).astype(np.int64)
+
+
+def calculate_bmr(weight, height, age, gender):
+    weight, height, age = (np.asarray(values, dtype=np.float64) for values in (weight, height, age))
+    male = np.asarray(gender, dtype=object) == 'Male'
+    return np.where(
+        male,
+        88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age),
+        447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
+    )
+
+
+def calculate_tdee(bmr, activity_level):
+    return np.asarray(bmr, dtype=np.float64) * _lookup(activity_level, ACTIVITY_MULTIPLIERS, 1.55)
+
+
+def calculate_calorie_target(current_weight, goal_weight, tdee, goal_type):
+    tdee = np.asarray(tdee, dtype=np.float64)
+    weight_difference = np.abs(
+        np.asarray(current_weight, dtype=np.float64) - np.asarray(goal_weight, dtype=np.float64)
+    ) * 100
+    goal_type = np.asarray(goal_type, dtype=object)
+    loss = np.maximum(1200, tdee - np.minimum(1000, np.maximum(500, weight_difference)))
+    gain = tdee + np.minimum(500, np.maximum(250, weight_difference))
+    return np.where(goal_type == 'Weight Loss', loss, np.where(goal_type == 'Weight Gain', gain, tdee))
+
+
+def calculate_macro_targets(calorie_target, goal_type):
+    """{'protein_target', 'carbs_target', 'fat_target'} as integer arrays."""
+    calorie_target = np.asarray(calorie_target, dtype=np.float64)
+    targets = {}
+    for macro, kcal_per_gram in (('protein', 4), ('carbs', 4), ('fat', 9)):
+        ratios = {goal: ratio[macro] for goal, ratio in MACRO_RATIOS.items()}
+        ratio = _lookup(goal_type, ratios, MACRO_RATIOS['default'][macro])
+        targets[f"{macro}_target"] = _round(calorie_target * ratio / kcal_per_gram)
+    return targets
+
+
+def split_meal_targets(calorie_target, macro_targets):
+    """{'<meal>_<field>': integer array} for every meal slot and field of split_meal_targets."""
+    calorie_target = np.asarray(calorie_target, dtype=np.float64)
+    slots = {}
+    for meal_type, distribution in MEAL_DISTRIBUTIONS.items():
+        prefix = meal_type.lower()
+        slots[f"{prefix}_calories"] = _round(calorie_target * distribution)
+        slots[f"{prefix}_protein"] = _round(macro_targets['protein_target'] * distribution)
+        slots[f"{prefix}_carbs"] = _round(macro_targets['carbs_target'] * distribution)
+        slots[f"{prefix}_fat"] = _round(macro_targets['fat_target'] * distribution)
+    return slots
+
+
+def assign_workout_templates(goal_type, health_condition):
+    """Index into WORKOUT_KEYS of the template generate_workout_plan would pick for each profile."""
+    goal_codes, goals = _labels(goal_type)
+    health_codes, conditions = _labels(health_condition)
+    table = np.zeros((len(goals), len(conditions)), dtype=np.int16)
+    for i, goal in enumerate(goals):
+        for j, condition in enumerate(conditions):
+            key = f"{goal}/{condition}"
+            table[i, j] = WORKOUT_KEYS.index(key) if key in WORKOUT_KEYS else 0
+    return table[goal_codes, health_codes]
+
+
+def plan(profiles):
+    """
+    Targets, meal slots and workout template for every row of `profiles` (a DataFrame
+    with PROFILE_COLUMNS), indexed like it. 'workout' is a categorical of WORKOUT_KEYS;
+    expand one with workout_template.
+    """
+    missing = [column for column in PROFILE_COLUMNS if column not in profiles]
+    if missing:
+        raise ValueError(f"profiles are missing columns: {', '.join(missing)}")
+
+    bmr = calculate_bmr(profiles['current_weight'], profiles['height'], profiles['age'], profiles['gender'])
+    tdee = calculate_tdee(bmr, profiles['activity_level'])
+    calorie_target = calculate_calorie_target(
+        profiles['current_weight'], profiles['goal_weight'], tdee, profiles['goal_type']
+    )
+    macro_targets = calculate_macro_targets(calorie_target, profiles['goal_type'])
+
+    plans = pd.DataFrame({'bmr': bmr, 'tdee': tdee, 'calorie_target': calorie_target}, index=profiles.index)
+    for column, values in macro_targets.items():
+        plans[column] = values
+    for column, values in split_meal_targets(calorie_target, macro_targets).items():
+        plans[column] = values
+    plans['workout'] = pd.Categorical.from_codes(
+        assign_workout_templates(profiles['goal_type'], profiles['health_condition']), WORKOUT_KEYS
+    )
+    return plans
@@ -0,0 +1,76 @@
+"""
+Benchmark of the intake rollups at scale.
+
+Replicates meals.csv (shifting user ids so each copy is a new cohort) up to --rows,
+then times the one-off build, single-entry appends, merging the buffered appends into
+the rollups, the queries the Progress tab makes, and checks that the incremental
+rollups match a full rebuild.
+
+    python benchmarks/analytics.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import IntakeAnalytics, food_log_rows  # noqa: E402
+from food_db import load_food_database  # noqa: E402
+
+
+def scaled_rows(rows, count):
+    copies = []
+    for copy in range(-(-count // len(rows))):
+        shifted = rows.copy()
+        shifted['user_id'] = shifted['user_id'] + copy * 10000
+        copies.append(shifted)
+    return pd.concat(copies, ignore_index=True).iloc[:count]
+
+
+def timed_ms(function, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    database = load_food_database()
+    rows = scaled_rows(database.rows, args.rows)
+
+    start = time.perf_counter()
+    analytics = IntakeAnalytics(rows)
+    print(f"build over {len(rows):,} rows: {time.perf_counter() - start:.2f}s {analytics.stats()}")
+
+    user_id = str(rows['user_id'].iat[0])
+    last_day = rows.loc[rows['user_id'] == rows['user_id'].iat[0], 'date'].max()
+    entry = {'name': 'Apple', 'calories': 95, 'protein': 0.5, 'carbs': 25, 'fat': 0.3}
+    same_day = food_log_rows([(user_id, last_day + pd.Timedelta(hours=12), entry)], database)
+    new_day = food_log_rows([(user_id, datetime(2030, 1, 1, 12), entry)], database)
+
+    print(f"append, existing day: {timed_ms(lambda: analytics.append(same_day)):.2f} ms")
+    print(f"append, new day:      {timed_ms(lambda: analytics.append(new_day), repeat=1):.2f} ms")
+    print(f"daily (30 days):      {timed_ms(lambda: analytics.daily(user_id, days=30)):.2f} ms")
+    print(f"weekly:               {timed_ms(lambda: analytics.weekly(user_id)):.2f} ms")
+    print(f"breakdown:            {timed_ms(lambda: analytics.breakdown(user_id)):.2f} ms")
+    print(f"compact:              {timed_ms(analytics.compact, repeat=1):.0f} ms")
+
+    rebuilt = IntakeAnalytics(pd.concat([rows] + [same_day] * 20 + [new_day], ignore_index=True))
+    for name, rollup in analytics.rollups.items():
+        pd.testing.assert_frame_equal(rollup, rebuilt.rollups[name], check_exact=False)
+    print("incremental rollups match a full rebuild")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Load test of the planner HTTP API (api.py): requests per second and tail latency.
+
+Starts the stub LLM server and the API (with --workers worker processes) as
+subprocesses in a scratch directory, then holds --connections keep-alive
+connections open from an asyncio client for --duration seconds per scenario:
+
+  plan        POST /plan, meals composed from meals.csv (CPU-bound planning)
+  plan + AI   POST /plan with use_ai, meal ideas from the stub at --latency seconds
+  log food    POST /users/{id}/food-log (one SQLite insert)
+  food log    GET  /users/{id}/food-log
+
+Profiles are drawn at random so the AI meal cache sees many keys. The client is one
+Python process, so for the lightest endpoints it can saturate before a multi-worker API does.
+
+    python benchmarks/api_load.py --workers 1 4 --connections 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from planner import ACTIVITY_LEVELS, GENDERS, GOAL_TYPES, HEALTH_CONDITIONS  # noqa: E402
+
+
+def random_profile(rng, use_ai=False):
+    return {
+        'age': rng.randint(18, 70), 'gender': rng.choice(GENDERS), 'height': rng.randint(150, 200),
+        'current_weight': rng.randint(50, 130), 'goal_weight': rng.randint(50, 130),
+        'activity_level': rng.choice(ACTIVITY_LEVELS), 'goal_type': rng.choice(GOAL_TYPES),
+        'health_condition': rng.choice(HEALTH_CONDITIONS), 'use_ai': use_ai
+    }
+
+
+def scenarios(rng):
+    """(name, () -> (method, path, body)) for each scenario."""
+    return [
+        ('plan', lambda: ('POST', '/plan', random_profile(rng))),
+        ('plan + AI', lambda: ('POST', '/plan', random_profile(rng, use_ai=True))),
+        ('log food', lambda: ('POST', f'/users/load-{rng.randint(1, 500)}/food-log',
+                              {'food': 'Apple', 'servings': rng.choice([0.5, 1, 2])})),
+        ('food log', lambda: ('GET', f'/users/load-{rng.randint(1, 500)}/food-log', None))
+    ]
+
+
+async def http_request(reader, writer, method, path, payload):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def connection(port, make_request, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await http_request(reader, writer, *make_request())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            errors.append('connection')
+            writer.close()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            continue
+        if status >= 400:
+            errors.append(status)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def load(port, make_request, connections, duration):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(connection(port, make_request, deadline, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'errors': len(errors)
+    }
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return json.loads(response.read())
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=0.3, help="the stub LLM's seconds per completion")
+    parser.add_argument('--api-port', type=int, default=8790)
+    parser.add_argument('--stub-port', type=int, default=8791)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, 'stub_llm_server.py'), '--port', str(args.stub_port),
+         '--latency', str(args.latency), '--jitter', '0'], cwd=workdir, stdout=subprocess.DEVNULL
+    )
+    env = dict(
+        os.environ, MEAL_BACKEND='stub', MEAL_BACKEND_URL=f'http://127.0.0.1:{args.stub_port}/v1',
+        # Budgets out of the way: this measures the API, not the rate limiter
+        AI_REQUESTS_PER_MINUTE='10000000', AI_TOKENS_PER_MINUTE='1000000000'
+    )
+    rng = random.Random(0)
+    print(f"{args.connections} connections, {args.duration:.0f}s per scenario, stub latency {args.latency}s")
+    print(f"{'workers':>7}  {'scenario':<11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    try:
+        for workers in args.workers:
+            api = subprocess.Popen(
+                [sys.executable, os.path.join(REPO, 'api.py'), '--port', str(args.api_port), '--workers', str(workers)],
+                cwd=workdir, env=env
+            )
+            try:
+                wait_until_up(f'http://127.0.0.1:{args.api_port}/health', api)
+                for name, make_request in scenarios(rng):
+                    stats = asyncio.run(load(args.api_port, make_request, args.connections, args.duration))
+                    print(f"{workers:>7}  {name:<11}{stats['rps']:>9.0f}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+                          f"{stats['p99_ms']:>9.1f}{stats['errors']:>8}")
+            finally:
+                api.terminate()
+                api.wait()
+    finally:
+        stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput of the vectorized batch planner, and its equivalence with calculators.py.
+
+Draws --rows random profiles (plus edge cases: weight differences on the clamp
+boundaries, unknown activity levels, goals and genders), checks that every target,
+meal slot and workout template matches the scalar functions on --check-rows of
+them, then times batch_planner.plan on all rows against the scalar pipeline.
+Exits non-zero on any mismatch.
+
+    python benchmarks/batch_planner.py --rows 1000000 --check-rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_planner  # noqa: E402
+from calculators import (  # noqa: E402
+    calculate_bmr, calculate_calorie_target, calculate_macro_targets, calculate_tdee,
+    generate_workout_plan, split_meal_targets
+)
+
+GENDERS = ['Male', 'Female', 'Other']
+ACTIVITY_LEVELS = ['Sedentary', 'Light', 'Moderate', 'Active', 'Very Active', 'Unknown']
+GOALS = ['Weight Loss', 'Weight Maintenance', 'Weight Gain', 'Recomposition']
+CONDITIONS = ['Healthy', 'Diabetes', 'Hypertension', 'Heart Condition']
+
+
+def random_profiles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    current_weight = rng.integers(40, 150, count).astype(float)
+    # A tenth of goals sit exactly on the 2.5/5/10 kg clamp boundaries
+    offsets = np.where(rng.random(count) < 0.1, rng.choice([-10, -5, -2.5, 0, 2.5, 5, 10], count),
+                       rng.uniform(-30, 30, count).round(1))
+    return pd.DataFrame({
+        'current_weight': current_weight,
+        'goal_weight': current_weight - offsets,
+        'height': rng.integers(140, 210, count),
+        'age': rng.integers(16, 90, count),
+        'gender': rng.choice(GENDERS, count),
+        'activity_level': rng.choice(ACTIVITY_LEVELS, count),
+        'goal_type': rng.choice(GOALS, count),
+        'health_condition': rng.choice(CONDITIONS, count)
+    })
+
+
+def scalar_plan(profile):
+    bmr = calculate_bmr.__wrapped__(profile.current_weight, profile.height, profile.age, profile.gender)
+    tdee = calculate_tdee.__wrapped__(bmr, profile.activity_level)
+    calorie_target = calculate_calorie_target.__wrapped__(
+        profile.current_weight, profile.goal_weight, tdee, profile.goal_type
+    )
+    macro_targets = calculate_macro_targets(calorie_target, profile.goal_type)
+    meals = split_meal_targets(calorie_target, macro_targets)
+    workouts = generate_workout_plan(profile.goal_type, profile.health_condition, None)
+    return bmr, tdee, calorie_target, macro_targets, meals, workouts
+
+
+def check_equivalence(profiles, plans):
+    """Number of profiles whose batch plan differs from the scalar one."""
+    templates = {key: batch_planner.workout_template(key) for key in batch_planner.WORKOUT_KEYS}
+    mismatches = 0
+    for profile, row in zip(profiles.itertuples(index=False), plans.itertuples(index=False)):
+        bmr, tdee, calorie_target, macro_targets, meals, workouts = scalar_plan(profile)
+        expected = [bmr, tdee, calorie_target] + list(macro_targets.values())
+        actual = [row.bmr, row.tdee, row.calorie_target, row.protein_target, row.carbs_target, row.fat_target]
+        for meal in meals:
+            prefix = meal['meal'].lower()
+            expected += [meal['calories'], meal['protein'], meal['carbs'], meal['fat']]
+            actual += [getattr(row, f"{prefix}_{field}") for field in ('calories', 'protein', 'carbs', 'fat')]
+        if expected != actual or workouts != templates[row.workout]:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch for {profile}:\n  scalar {expected}\n  batch  {actual}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--check-rows', type=int, default=100000, help='profiles compared against the scalar functions')
+    parser.add_argument('--scalar-rows', type=int, default=50000, help='profiles timed through the scalar pipeline')
+    args = parser.parse_args()
+
+    profiles = random_profiles(args.rows)
+
+    start = time.perf_counter()
+    plans = batch_planner.plan(profiles)
+    batch_seconds = time.perf_counter() - start
+    print(f"batch:  {len(profiles):,} plans in {batch_seconds:.2f}s ({len(profiles) / batch_seconds:,.0f} plans/s)")
+
+    sample = profiles.iloc[:args.scalar_rows]
+    start = time.perf_counter()
+    for profile in sample.itertuples(index=False):
+        scalar_plan(profile)
+    scalar_seconds = time.perf_counter() - start
+    print(f"scalar: {len(sample):,} plans in {scalar_seconds:.2f}s ({len(sample) / scalar_seconds:,.0f} plans/s), "
+          f"~{scalar_seconds * len(profiles) / len(sample):.0f}s for all")
+
+    checked = min(args.check_rows, len(profiles))
+    mismatches = check_equivalence(profiles.iloc[:checked], plans.iloc[:checked])
+    print(f"equivalence: {checked - mismatches:,}/{checked:,} plans identical to calculators.py")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
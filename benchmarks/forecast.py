@@ -0,0 +1,73 @@
+"""
+Speed and accuracy of the weight forecast behind the Progress tab.
+
+Accuracy: with the random draws switched off, the closed-form trajectory is compared
+with a day-by-day simulation that recomputes TDEE from calculate_bmr/calculate_tdee
+every day. Speed: one forecast (what a slider move reruns) and the deficit x
+adherence grid, against the 20 ms budget for live updates.
+
+    python benchmarks/forecast.py --draws 200
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculators import calculate_bmr, calculate_tdee  # noqa: E402
+from forecast import KCAL_PER_KG, forecast, scenario_grid  # noqa: E402
+
+PROFILE = (95, 80, 178, 35, 'Male', 'Moderate')
+BUDGET_MS = 20
+
+
+def day_by_day(current_weight, goal_weight, height, age, gender, activity_level, intake, adherence, days):
+    """Reference: Euler steps of one day, TDEE recomputed from the current weight."""
+    weight = float(current_weight)
+    weights, goal_day = [weight], None
+    for day in range(1, days + 1):
+        tdee = calculate_tdee(calculate_bmr.__wrapped__(weight, height, age, gender), activity_level)
+        weight += adherence * (intake - tdee) / KCAL_PER_KG
+        weights.append(weight)
+        if goal_day is None and (weight - goal_weight) * (current_weight - goal_weight) <= 0:
+            goal_day = day
+    return np.array(weights), goal_day
+
+
+def accuracy(weeks=52):
+    rows = []
+    for intake, adherence in ((1800, 1.0), (2200, 0.8), (2500, 0.6)):
+        exact = forecast(*PROFILE, intake=intake, adherence=adherence, weeks=weeks, draws=1,
+                         tdee_error=0.0, adherence_sd=0.0)
+        reference, goal_day = day_by_day(*PROFILE, intake, adherence, weeks * 7)
+        error = np.abs(exact['weight'][0, 1] - reference[::7]).max()
+        rows.append((intake, adherence, error, exact['goal_days'][0, 1], goal_day))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--draws', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'intake':>7}{'adherence':>11}{'max |kg| diff':>15}{'goal day':>10}{'reference':>11}")
+    for intake, adherence, error, days, reference in accuracy():
+        print(f"{intake:>7}{adherence:>11.0%}{error:>15.4f}{days:>10.1f}{str(reference):>11}")
+
+    tdee = calculate_tdee(calculate_bmr(PROFILE[0], *PROFILE[2:5]), PROFILE[5])
+    cases = [
+        ('one scenario', lambda: forecast(*PROFILE, intake=tdee - 500, adherence=0.8, draws=args.draws)),
+        ('4x3 grid', lambda: scenario_grid(*PROFILE, deficits=[250, 500, 750, 1000], adherences=[0.6, 0.8, 1.0],
+                                           draws=args.draws))
+    ]
+    print(f"\n{args.draws} draws, budget {BUDGET_MS} ms")
+    for name, run in cases:
+        ms = min(timeit.repeat(run, number=20, repeat=5)) / 20 * 1000
+        print(f"{name:<14}{ms:>8.2f} ms  {'ok' if ms < BUDGET_MS else 'OVER BUDGET'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+CSV parsing versus the columnar intake dataset at scale.
+
+Replicates meals.csv (each copy a new cohort of user ids) up to --rows, writes it
+as both CSV and the month-partitioned Parquet dataset, then times a full load of
+each and the Progress tab's read of one user's last 30 days, with the bytes that
+read decodes.
+
+    python benchmarks/intake_dataset.py --rows 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intake_dataset  # noqa: E402
+from food_db import CSV_COLUMNS, read_meals_csv  # noqa: E402
+
+USER_COLUMNS = ['date', 'food', 'meal_type', 'calories', 'protein', 'carbs', 'fat']
+
+
+def scaled_rows(rows, count):
+    copies = []
+    for copy in range(-(-count // len(rows))):
+        shifted = rows.copy()
+        shifted['user_id'] = shifted['user_id'] + copy * 10000
+        copies.append(shifted)
+    return pd.concat(copies, ignore_index=True).iloc[:count]
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, 'meals.csv')
+    dataset_path = os.path.join(workdir, 'intake')
+    rows = scaled_rows(read_meals_csv(), args.rows)
+    rows.rename(columns={column: header for header, column in CSV_COLUMNS.items()}).to_csv(csv_path, index=False)
+
+    seconds, _ = timed(lambda: intake_dataset.convert_csv(csv_path, dataset_path))
+    dataset_bytes = sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(dataset_path) for name in names
+    )
+    print(f"{len(rows):,} rows: CSV {os.path.getsize(csv_path) / 1e6:.1f} MB, "
+          f"dataset {dataset_bytes / 1e6:.1f} MB, converted in {seconds:.2f}s")
+
+    seconds, _ = timed(lambda: read_meals_csv(csv_path))
+    print(f"full load, CSV:        {seconds * 1000:8.1f} ms")
+    seconds, _ = timed(lambda: intake_dataset.read_intake(dataset_path))
+    print(f"full load, dataset:    {seconds * 1000:8.1f} ms")
+
+    user_id = int(rows['user_id'].iat[0])
+    start = rows.loc[rows['user_id'] == user_id, 'date'].max() - pd.Timedelta(days=30)
+    def csv_user_rows():
+        frame = read_meals_csv(csv_path)
+        return frame[(frame['user_id'] == user_id) & (frame['date'] >= start)]
+
+    seconds, _ = timed(csv_user_rows)
+    print(f"one user, 30 days, CSV:     {seconds * 1000:8.1f} ms (parses every row)")
+    seconds, user_rows = timed(lambda: intake_dataset.read_intake(
+        dataset_path, columns=USER_COLUMNS, user_id=user_id, start=start
+    ))
+    scanned = intake_dataset.scanned_bytes(dataset_path, columns=USER_COLUMNS, user_id=user_id, start=start)
+    print(f"one user, 30 days, dataset: {seconds * 1000:8.1f} ms, {len(user_rows)} rows, "
+          f"{scanned / 1024:.1f} KB of column chunks decoded")
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+The shared LLMClient against a bare OpenAI client under rate limits, transient
+errors and an outage, all served by the local stub LLM server.
+
+Each scenario sends single-meal requests from a thread pool, the way concurrent
+sessions do, and reports how many got an AI meal, the latency, and how many
+requests the server saw and rate-limited. "sdk retries" is the OpenAI client's
+own retry loop (max_retries=2); "llm_client" paces itself to the stub's RPM,
+backs off with jitter and trips its circuit breaker during the outage.
+
+    python benchmarks/llm_client.py --requests 200 --workers 16 --rpm 600
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI  # noqa: E402
+
+from llm_client import DEFAULT_RPM, CircuitBreaker, LLMClient  # noqa: E402
+from meal_backends import OpenAIBackend  # noqa: E402
+from stub_llm_server import start_stub_server  # noqa: E402
+
+MEAL = {'meal': 'Lunch', 'calories': 600, 'protein': 40, 'carbs': 60, 'fat': 20}
+
+
+def client_factories(rpm):
+    """(name, url -> client) for each client under test."""
+    return [
+        ('no retries', lambda url: OpenAI(base_url=url, api_key='stub', max_retries=0)),
+        ('sdk retries', lambda url: OpenAI(base_url=url, api_key='stub', max_retries=2)),
+        ('llm_client', lambda url: LLMClient(
+            OpenAI(base_url=url, api_key='stub', max_retries=0), rpm=rpm,
+            breaker=CircuitBreaker(threshold=5, cooldown=2.0)
+        ))
+    ]
+
+
+def run(client, requests, workers, timeout):
+    backend = OpenAIBackend(client)
+
+    def one_request(_):
+        start = time.perf_counter()
+        try:
+            backend.generate_meal(MEAL, 'Weight Loss', 'Healthy', timeout)
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(one_request, range(requests)))
+    latencies = np.array([latency for _, latency in results]) * 1000
+    return {
+        'success': sum(ok for ok, _ in results) / len(results),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'elapsed_s': time.perf_counter() - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rpm', type=int, default=600, help="the stub's rate limit, and the client's budget")
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=20.0)
+    args = parser.parse_args()
+
+    # (name, stub settings, the budget LLMClient is configured with)
+    scenarios = [
+        ('rate limit', {'rpm': args.rpm}, args.rpm),
+        ('5xx 20%', {'error_rate': 0.2, 'error_status': 503}, DEFAULT_RPM),
+        ('outage', {'error_rate': 1.0, 'error_status': 503}, DEFAULT_RPM)
+    ]
+    print(f"{args.requests} requests, {args.workers} workers, stub latency {args.latency}s")
+    print(f"{'scenario':<12}{'client':<13}{'AI meals':>9}{'p50 ms':>9}{'p99 ms':>9}{'total s':>9}{'sent':>7}{'429s':>7}")
+    for scenario, stub_config, rpm in scenarios:
+        for name, make_client in client_factories(rpm):
+            server, url = start_stub_server(latency=args.latency, jitter=0.0, **stub_config)
+            stats = run(make_client(url), args.requests, args.workers, args.timeout)
+            config = server.RequestHandlerClass.config
+            print(f"{scenario:<12}{name:<13}{stats['success']:>9.0%}{stats['p50_ms']:>9.0f}{stats['p99_ms']:>9.0f}"
+                  f"{stats['elapsed_s']:>9.1f}{config.requests:>7}{config.rate_limited:>7}")
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Load benchmark for the AI meal path against the local stub LLM server.
+
+Runs N plans per generation mode through a real OpenAI client pointed at
+stub_llm_server.py and reports plans/second, p50/p99 plan latency and the fraction
+of meals that fell back to the default meal.
+
+    python benchmarks/meal_backends.py --plans 200 --workers 8 --latency 0.3 --error-rate 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI  # noqa: E402
+
+from calculators import (  # noqa: E402
+    calculate_bmr, calculate_calorie_target, calculate_macro_targets, calculate_tdee, split_meal_targets
+)
+from meal_backends import (  # noqa: E402
+    ComposerBackend, OpenAIBackend, generate_batched, generate_concurrent, generate_sequential
+)
+from meal_cache import MealCache  # noqa: E402
+from stub_llm_server import start_stub_server  # noqa: E402
+
+GOALS = ['Weight Loss', 'Weight Maintenance', 'Weight Gain']
+CONDITIONS = ['Healthy', 'Diabetes', 'Hypertension', 'Heart Condition']
+
+
+def random_profiles(count, distinct, seed=0):
+    """`count` plan requests drawn from `distinct` profiles, like repeat visitors."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        weight = rng.randint(50, 110)
+        goal_type = rng.choice(GOALS)
+        bmr = calculate_bmr(weight, rng.randint(150, 195), rng.randint(18, 70), rng.choice(['Male', 'Female']))
+        tdee = calculate_tdee(bmr, rng.choice(['Sedentary', 'Light', 'Moderate', 'Active', 'Very Active']))
+        calorie_target = calculate_calorie_target(weight, weight - rng.randint(-10, 10), tdee, goal_type)
+        meals = split_meal_targets(calorie_target, calculate_macro_targets(calorie_target, goal_type))
+        pool.append((meals, goal_type, rng.choice(CONDITIONS)))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run_mode(generate, backend, profiles, workers, timeout, cache=None):
+    def one_plan(profile):
+        meals, goal_type, health_condition = profile
+        start = time.perf_counter()
+        _, failures = generate(backend, meals, goal_type, health_condition, timeout, cache)
+        return time.perf_counter() - start, len(failures), len(meals)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(one_plan, profiles))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _, _ in results]) * 1000
+    fallbacks = sum(failed for _, failed, _ in results)
+    slots = sum(total for _, _, total in results)
+    return {
+        'plans_per_s': len(results) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'fallback_rate': fallbacks / slots
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4, help='plans generated in parallel')
+    parser.add_argument('--distinct-profiles', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--max-retries', type=int, default=0, help='OpenAI client retries (the app uses 2)')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    client = OpenAI(base_url=url, api_key='stub', max_retries=args.max_retries)
+    stub = OpenAIBackend(client)
+    profiles = random_profiles(args.plans, args.distinct_profiles)
+
+    # Build the composer's combination tables before timing anything
+    ComposerBackend().generate_plan(profiles[0][0], profiles[0][1], profiles[0][2])
+
+    cache_dir = tempfile.mkdtemp()
+    cache = MealCache(os.path.join(cache_dir, 'bench_cache.db'), variants=1)
+
+    modes = [
+        ('sequential', generate_sequential, stub, None),
+        ('concurrent', generate_concurrent, stub, None),
+        ('batched', generate_batched, stub, None),
+        ('cached', generate_concurrent, stub, cache),
+        ('composer', generate_batched, ComposerBackend(), None)
+    ]
+
+    print(f"{args.plans} plans, {args.workers} workers, stub latency {args.latency}s "
+          f"+/-{args.jitter}s, error rate {args.error_rate:.0%}")
+    print(f"{'mode':<12}{'plans/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'fallback':>10}")
+    for name, generate, backend, mode_cache in modes:
+        stats = run_mode(generate, backend, profiles, args.workers, args.timeout, mode_cache)
+        print(f"{name:<12}{stats['plans_per_s']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['fallback_rate']:>9.1%}")
+
+    cache_stats = cache.stats()
+    print(f"cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
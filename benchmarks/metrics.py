@@ -0,0 +1,59 @@
+"""
+Per-call overhead of the metrics layer, enabled and disabled.
+
+Times a trivial function undecorated, through `timed`, inside `timer` and next to a
+`count`, with a Registry that records and one that doesn't (METRICS_ENABLED unset,
+the default).
+
+    python benchmarks/metrics.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry  # noqa: E402
+
+
+def work():
+    return 1
+
+
+def cases(registry):
+    decorated = registry.timed('bench_seconds', path='decorated')(work)
+
+    def with_timer():
+        with registry.timer('bench_seconds', path='timer'):
+            work()
+
+    def with_count():
+        registry.count('bench_total', path='count')
+        work()
+
+    return [('timed', decorated), ('timer', with_timer), ('count', with_count)]
+
+
+def per_call_ns(func, calls):
+    return min(timeit.repeat(func, number=calls, repeat=5)) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = per_call_ns(work, args.calls)
+    disabled = Registry(enabled=False)
+    enabled = Registry(enabled=True)
+    print(f"plain call: {baseline:.0f} ns")
+    print(f"{'wrapper':<10}{'disabled ns':>14}{'enabled ns':>14}")
+    for (name, off), (_, on) in zip(cases(disabled), cases(enabled)):
+        print(f"{name:<10}{per_call_ns(off, args.calls) - baseline:>14.0f}{per_call_ns(on, args.calls) - baseline:>14.0f}")
+
+    print("recorded:", ', '.join(f"{row['metric']} x{row['count']}" for row in enabled.summary()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Query and update latency of the similar-user food recommender (recommender.py), and
+a check that updating the index row by row gives the same index as building it at once.
+
+meals.csv is indexed as is; larger user counts are synthetic users with ten entries
+each, foods drawn from the vocabulary and macros drawn like meals.csv's. Queries
+are timed against the 10 ms budget.
+
+    python benchmarks/recommender.py --users 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from food_db import load_food_database  # noqa: E402
+from recommender import MACROS, FoodRecommender  # noqa: E402
+
+TARGETS = {'protein_target': 150, 'carbs_target': 220, 'fat_target': 70}
+BUDGET_MS = 10
+ENTRIES_PER_USER = 10
+
+
+def synthetic_rows(foods, users, seed=0):
+    rng = np.random.default_rng(seed)
+    count = users * ENTRIES_PER_USER
+    rows = pd.DataFrame({
+        'user_id': np.repeat(np.arange(users), ENTRIES_PER_USER).astype(str),
+        'food': foods[rng.integers(len(foods), size=count)]
+    })
+    for macro, mean in zip(MACROS, (26, 53, 26)):
+        rows[macro] = rng.uniform(0.05, 1.95, size=count) * mean
+    return rows
+
+
+def check_incremental(rows, foods):
+    """Largest difference between an index built at once and one fed in batches, with a batch removed and re-added."""
+    whole = FoodRecommender(rows, foods)
+    batches = np.array_split(np.arange(len(rows)), 20)
+    fed = FoodRecommender(rows.iloc[batches[0]], foods)
+    for batch in batches[1:]:
+        fed.append(rows.iloc[batch])
+    fed.remove(rows.iloc[batches[3]])
+    fed.append(rows.iloc[batches[3]])
+    order = [fed.users.index(user) for user in whole.users]
+    difference = np.abs(whole._vectors[:len(order)] - fed._vectors[order]).max()
+    users = whole.users[:50]
+    same = all(whole.recommend(user, TARGETS) == fed.recommend(user, TARGETS) for user in users)
+    return difference, same
+
+
+def time_ms(run, number=200):
+    return min(timeit.repeat(run, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    database = load_food_database()
+    difference, same = check_incremental(database.rows, database.foods)
+    print(f"incremental vs built at once: max vector difference {difference:.2e}, "
+          f"same recommendations {'yes' if same else 'NO'}\n")
+
+    datasets = [('meals.csv', database.rows)]
+    datasets += [(f'{users} users', synthetic_rows(database.foods, users)) for users in args.users]
+    print(f"budget {BUDGET_MS} ms per query")
+    print(f"{'index':<16}{'build s':>9}{'query ms':>10}{'new user ms':>13}{'append ms':>11}")
+    for name, rows in datasets:
+        start = time.perf_counter()
+        index = FoodRecommender(rows, database.foods)
+        build = time.perf_counter() - start
+        user = index.users[len(index.users) // 2]
+        query = time_ms(lambda: index.recommend(user, TARGETS))
+        new_user = time_ms(lambda: index.recommend('nobody', TARGETS))
+        entry = rows.iloc[:1].assign(user_id=user)
+        append = time_ms(lambda: (index.append(entry), index.remove(entry)), number=100) / 2
+        print(f"{name:<16}{build:>9.2f}{query:>10.3f}{new_user:>13.3f}{append:>11.3f}"
+              f"  {'ok' if max(query, new_user) < BUDGET_MS else 'OVER BUDGET'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the helper work app.py does on each Streamlit rerun.
+
+"before" rebuilds the static tables on every call, calls the calculators unmemoized
+and re-reads user_data.json, the way every rerun used to. "after" uses the process-wide
+catalog, the memoized calculators and the once-per-session load.
+
+    python benchmarks/rerun_cost.py
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalog  # noqa: E402
+import calculators  # noqa: E402
+
+PROFILE = {
+    'weight': 70, 'height': 175, 'age': 25, 'gender': 'Male', 'goal_weight': 65,
+    'activity_level': 'Moderate', 'goal_type': 'Weight Loss', 'health_condition': 'Healthy'
+}
+
+
+def rebuild(value):
+    """Fresh dicts/lists with the same contents, like evaluating the old literals."""
+    if isinstance(value, (dict, type(catalog.MEAL_TEMPLATES))):
+        return {key: rebuild(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [rebuild(item) for item in value]
+    return value
+
+
+def rerun_before(user_data_path):
+    rebuild(catalog.MEAL_TEMPLATES)
+    with open(user_data_path) as f:
+        json.load(f)
+    bmr = calculators.calculate_bmr.__wrapped__(PROFILE['weight'], PROFILE['height'], PROFILE['age'], PROFILE['gender'])
+    calculators.calculate_tdee.__wrapped__(bmr, PROFILE['activity_level'])
+    rebuild(catalog.FOOD_RECOMMENDATIONS)
+    rebuild(catalog.HEALTH_MODIFIERS)
+    calculators._food_recommendations.__wrapped__(PROFILE['goal_type'], PROFILE['health_condition'])
+
+
+def rerun_after(user_data_path):
+    bmr = calculators.calculate_bmr(PROFILE['weight'], PROFILE['height'], PROFILE['age'], PROFILE['gender'])
+    calculators.calculate_tdee(bmr, PROFILE['activity_level'])
+    calculators.get_food_recommendations(PROFILE['goal_type'], PROFILE['health_condition'])
+
+
+def submit_before():
+    bmr = calculators.calculate_bmr.__wrapped__(PROFILE['weight'], PROFILE['height'], PROFILE['age'], PROFILE['gender'])
+    tdee = calculators.calculate_tdee.__wrapped__(bmr, PROFILE['activity_level'])
+    target = calculators.calculate_calorie_target.__wrapped__(PROFILE['weight'], PROFILE['goal_weight'], tdee, PROFILE['goal_type'])
+    dict(calculators._macro_targets.__wrapped__(target, PROFILE['goal_type']))
+    workouts = rebuild(catalog.WORKOUT_TEMPLATES)
+    rebuild(catalog.DEFAULT_WORKOUT_TEMPLATE)
+    workouts[PROFILE['goal_type']][PROFILE['health_condition']]
+    rebuild(catalog.EXERCISES)['Cardio']
+
+
+def submit_after():
+    bmr = calculators.calculate_bmr(PROFILE['weight'], PROFILE['height'], PROFILE['age'], PROFILE['gender'])
+    tdee = calculators.calculate_tdee(bmr, PROFILE['activity_level'])
+    target = calculators.calculate_calorie_target(PROFILE['weight'], PROFILE['goal_weight'], tdee, PROFILE['goal_type'])
+    calculators.calculate_macro_targets(target, PROFILE['goal_type'])
+    calculators.generate_workout_plan(PROFILE['goal_type'], PROFILE['health_condition'], 'Beginner')
+    calculators.generate_exercises('Cardio')
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    # A user_data.json with a few weeks of food log, as the app writes it
+    user_data = {'name': 'Bench', 'food_log': [{'name': 'Apple', 'calories': 95}] * 200,
+                 'meals': [], 'workouts': rebuild(catalog.DEFAULT_WORKOUT_TEMPLATE)}
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(user_data, f)
+        user_data_path = f.name
+
+    try:
+        rows = [
+            ('rerun', per_call_us(lambda: rerun_before(user_data_path), 2000),
+             per_call_us(lambda: rerun_after(user_data_path), 2000)),
+            ('profile submit', per_call_us(submit_before, 2000), per_call_us(submit_after, 2000))
+        ]
+    finally:
+        os.remove(user_data_path)
+
+    print(f"{'workload':<16}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<16}{before:>14.2f}{after:>14.2f}{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
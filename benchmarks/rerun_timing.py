@@ -0,0 +1,145 @@
+"""
+Per-interaction rerun cost of app.py, with the tabs and sidebar tracker as fragments
+against the old layout where every interaction reran the whole page.
+
+Drives the app with Streamlit's AppTest. "before" is app.py with the fragments and
+the tab gating stripped out, so each interaction re-executes the sidebar, all four
+tabs and their aggregates. "after" times what the interaction reruns now: the body
+of the fragment that owns the widget, or the page with only the selected tab for
+interactions that rerun everything (switching tabs, adding food). AppTest always
+runs the whole script, so fragment timings come from a probe around the fragment
+body and leave out Streamlit's own per-rerun overhead.
+
+    python benchmarks/rerun_timing.py --user 496 --repeat 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import types
+from functools import wraps
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+TABS = ["🏠 Dashboard", "🍽️ Nutrition", "💪 Workouts", "📊 Progress"]
+
+# Seconds spent in each fragment's body on the latest run, filled by the probe
+probe = types.ModuleType('rerun_probe')
+probe.timings = {}
+
+
+def _timed(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            probe.timings[func.__name__] = time.perf_counter() - start
+    return wrapper
+
+
+probe.timed = _timed
+sys.modules['rerun_probe'] = probe
+
+
+def write_variants(directory):
+    """app_after.py probes every fragment; app_before.py renders everything on every rerun."""
+    with open(os.path.join(REPO, 'app.py'), encoding='utf-8') as f:
+        source = f.read()
+    after = source.replace("@st.fragment\n", "@st.fragment\n@__import__('rerun_probe').timed\n")
+    before = source.replace("@st.fragment\n", "")
+    for number in range(1, len(TABS) + 1):
+        before = before.replace(f"    if tab{number}.open:", "    if True:")
+    paths = {}
+    for name, text in [('before', before), ('after', after)]:
+        paths[name] = os.path.join(directory, f'app_{name}.py')
+        with open(paths[name], 'w', encoding='utf-8') as f:
+            f.write(text)
+    return paths
+
+
+def start_app(path, user):
+    """A session with a generated plan, as after the first profile submit."""
+    app = AppTest.from_file(path, default_timeout=120)
+    app.secrets['OPENAI_API_KEY'] = 'sk-bench'
+    app.query_params['user'] = user
+    app.run()
+    next(button for button in app.button if 'Generate' in str(button.label)).click().run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return app
+
+
+def widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def interactions(app):
+    """(name, fragment rerun by it or None for a full rerun, action) per interaction."""
+    water = iter(np.arange(1000) % 12)
+    foods = iter(['chick', 'apple', 'rice', 'banana'] * 250)
+    tabs = iter(TABS[1:] * 400)
+
+    def add_food():
+        widget(app.text_input, "Food Item").input('apple')
+        next(button for button in app.button if 'Add Food' in str(button.label)).click()
+
+    return [
+        ('water slider', 'dashboard_tab', lambda: widget(app.slider, "Update water intake").set_value(int(next(water)))),
+        ('food search', 'calorie_tracker', lambda: widget(app.text_input, "Food Item").input(next(foods))),
+        ('switch tab', None, lambda: app.session_state.__setitem__('active_tab', next(tabs))),
+        ('add food', None, add_food)
+    ]
+
+
+def time_interactions(app, repeat, probed):
+    """Median milliseconds per interaction: the fragment body if probed and scoped, else the page."""
+    results = {}
+    for name, fragment, act in interactions(app):
+        samples = []
+        for _ in range(repeat):
+            act()
+            probe.timings.clear()
+            start = time.perf_counter()
+            app.run()
+            elapsed = time.perf_counter() - start
+            if app.exception:
+                raise RuntimeError(f"{name}: {app.exception[0].value}")
+            samples.append(probe.timings[fragment] if probed and fragment else elapsed)
+            if fragment is None:
+                # Back to the Dashboard, so each sample starts from the same page
+                app.session_state['active_tab'] = TABS[0]
+                app.run()
+        results[name] = float(np.median(samples)) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user', default='496', help='user id whose logged intake fills the Progress tab')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    paths = write_variants(workdir)
+    # The app keeps its SQLite files in the working directory
+    os.chdir(workdir)
+
+    before = time_interactions(start_app(paths['before'], args.user), args.repeat, probed=False)
+    after = time_interactions(start_app(paths['after'], args.user), args.repeat, probed=True)
+
+    print(f"user {args.user}, median of {args.repeat} reruns per interaction")
+    print(f"{'interaction':<16}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<16}{before[name]:>12.1f}{after[name]:>12.1f}{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+"""
+Concurrent-session load test and profile of app.py on a real Streamlit server.
+
+Starts the stub LLM server (stub_llm_server.py) and `streamlit run app.py` with AI
+meals from the stub, then connects --sessions simulated browsers over Streamlit's
+websocket protocol. Every session runs its own script threads on the server, the
+way browser tabs do, and shares its cache_resource objects and SQLite files.
+
+Each session opens the app as its own user, submits the profile form with AI meals
+on, then repeats a weighted mix of actions for --duration seconds with exponential
+think time (mean --think seconds) between them:
+
+  food search   type into the sidebar tracker (a fragment rerun)
+  add food      Add Food for the match (writes to the food log)
+  water         move the Dashboard's water slider (a fragment rerun)
+  switch tab    open another tab (a full rerun)
+  submit        submit the profile form again, AI meals on
+
+Reported per session count, on a fresh server and scratch directory each time:
+- rerun latency percentiles per action (from sending the rerun to the script finishing)
+- contention on the user store: the duration of every SQLite write transaction,
+  split into the write-behind thread and script threads, and how long script
+  threads blocked flushing the write-behind queue
+- the server's RSS growth per session, after warming the shared caches
+- with --profile, a cProfile of the server's event loop and of every thread started
+  after the warm-up (the script threads), the hottest functions first
+
+The client is one asyncio process on the same machine, so on few cores it competes
+with the server for CPU; latencies include its protobuf parsing. The client speaks
+Streamlit's private websocket protocol as of STREAMLIT_VERSION and refuses to run
+against another release.
+
+    python benchmarks/session_load.py --sessions 1 4 16 --duration 30 --profile
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import streamlit
+import websockets
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+
+# The Streamlit release whose BackMsg/ForwardMsg protocol the client was written against
+STREAMLIT_VERSION = '1.65.0'
+
+TABS = ["🏠 Dashboard", "🍽️ Nutrition", "💪 Workouts", "📊 Progress"]
+FOODS = ['apple', 'chicken', 'rice', 'banana', 'oats', 'salmon', 'yogurt', 'pasta']
+
+# Relative weight of each action after the first submit
+ACTIONS = {'food search': 3, 'add food': 2, 'water': 3, 'switch tab': 3, 'submit': 1}
+
+# Widget each action needs on the page (the water slider is on the Dashboard tab only)
+ACTION_WIDGETS = {
+    'food search': "Food Item", 'add food': "➕ Add Food", 'water': "Update water intake",
+    'switch tab': 'tabs', 'submit': "🚀 Update Profile & Generate Plan"
+}
+
+# script_finished status of a run cut short by st.rerun(); the session waits for the next one
+FINISHED_EARLY_FOR_RERUN = ForwardMsg.FINISHED_EARLY_FOR_RERUN
+
+# Seconds a rerun may take before the session counts it as an error and gives up
+RERUN_TIMEOUT = 120
+
+WRITER_THREAD = 'write-behind'
+
+
+# --- Server side: `session_load.py serve` runs streamlit in-process with probes ---
+
+def instrument_store(stats):
+    """Times every UserStore.write and every WriteBehindWriter.flush made from a script thread."""
+    import persistence
+    import user_store
+
+    write = user_store.UserStore.write
+    flush = persistence.WriteBehindWriter.flush
+
+    def timed_write(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return write(self, *args, **kwargs)
+        finally:
+            thread = 'writer' if threading.current_thread().name == WRITER_THREAD else 'script'
+            stats['writes'].append((thread, (time.perf_counter() - start) * 1000))
+
+    def timed_flush(self, user_id=None):
+        if threading.current_thread().name == WRITER_THREAD:
+            return flush(self, user_id)
+        start = time.perf_counter()
+        try:
+            return flush(self, user_id)
+        finally:
+            stats['script_flushes'].append((time.perf_counter() - start) * 1000)
+
+    user_store.UserStore.write = timed_write
+    persistence.WriteBehindWriter.flush = timed_flush
+
+
+def profile_threads(profilers):
+    """Profiles the calling thread and every thread started after it, each with its own cProfile."""
+    def start(frame, event, arg):
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        profilers.append(profiler)
+        profiler.enable()
+
+    threading.setprofile(start)
+    profiler = cProfile.Profile()
+    profilers.append(profiler)
+    profiler.enable()
+
+
+def serve(args):
+    stats = {'writes': [], 'script_flushes': []}
+    profilers = []
+    instrument_store(stats)
+
+    def dump(signum, frame):
+        """
+        SIGUSR1: writes the probes' results since the last signal to --stats, and the
+        merged profile to --stats.prof, then starts over. Profiling starts on the first.
+        """
+        if profilers:
+            merged = pstats.Stats(profilers[0])
+            for profiler in profilers[1:]:
+                merged.add(profiler)
+            merged.dump_stats(args.stats + '.prof')
+        with open(args.stats + '.tmp', 'w') as f:
+            json.dump(stats, f)
+        os.replace(args.stats + '.tmp', args.stats)
+        for samples in stats.values():
+            samples.clear()
+        if args.profile:
+            profilers.clear()
+            profile_threads(profilers)
+
+    signal.signal(signal.SIGUSR1, dump)
+
+    from streamlit.web import cli
+    sys.argv = [
+        'streamlit', 'run', os.path.join(REPO, 'app.py'), '--server.port', str(args.port),
+        '--server.headless', 'true', '--browser.gatherUsageStats', 'false', '--logger.level', 'error'
+    ]
+    cli.main()
+
+
+# --- Client side: simulated browser sessions ---
+
+class Session:
+    """One browser tab: a websocket, the ids of the widgets it was sent, and its rerun timings."""
+
+    def __init__(self, websocket, user, latencies, errors):
+        self.websocket = websocket
+        self.query_string = f'user={user}'
+        self.latencies = latencies
+        self.errors = errors
+        # Widget label -> (widget id, fragment id or '')
+        self.widgets = {}
+
+    def widget(self, label):
+        return self.widgets[label]
+
+    def available(self):
+        """Actions whose widget was on the page the last run drew."""
+        return [action for action, label in ACTION_WIDGETS.items() if label in self.widgets]
+
+    def _read_delta(self, delta):
+        kind = delta.WhichOneof('type')
+        if kind == 'new_element':
+            element = delta.new_element
+            name = element.WhichOneof('type')
+            if name == 'exception':
+                self.errors.append(element.exception.message)
+                return
+            widget = getattr(element, name)
+            if getattr(widget, 'id', ''):
+                self.widgets[getattr(widget, 'label', name)] = (widget.id, delta.fragment_id)
+        elif kind == 'add_block' and delta.add_block.WhichOneof('type') == 'tab_container':
+            self.widgets['tabs'] = (delta.add_block.id, '')
+
+    async def rerun(self, action, states=(), fragment_id=''):
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = self.query_string
+        client_state.widget_states.widgets.extend(states)
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+        else:
+            # A full run redraws the page; widgets it leaves out are gone
+            self.widgets = {}
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT))
+            kind = forward.WhichOneof('type')
+            if kind == 'delta':
+                self._read_delta(forward.delta)
+            elif kind == 'script_finished' and forward.script_finished != FINISHED_EARLY_FOR_RERUN:
+                break
+        self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+
+    async def act(self, action, rng):
+        if action == 'open':
+            await self.rerun(action)
+        elif action == 'submit':
+            checkbox_id, _ = self.widget("Use AI for Meal Ideas 🤖")
+            weight_id, _ = self.widget("Current Weight (kg)")
+            submit_id, _ = self.widget("🚀 Update Profile & Generate Plan")
+            await self.rerun(action, [
+                WidgetState(id=checkbox_id, bool_value=True),
+                WidgetState(id=weight_id, double_array_value={'data': [rng.randint(55, 120)]}),
+                WidgetState(id=submit_id, trigger_value=True)
+            ])
+        elif action == 'food search':
+            text_id, fragment_id = self.widget("Food Item")
+            await self.rerun(action, [WidgetState(id=text_id, string_value=rng.choice(FOODS))], fragment_id)
+        elif action == 'add food':
+            button_id, fragment_id = self.widget("➕ Add Food")
+            await self.rerun(action, [WidgetState(id=button_id, trigger_value=True)], fragment_id)
+        elif action == 'water':
+            slider_id, fragment_id = self.widget("Update water intake")
+            await self.rerun(action, [WidgetState(id=slider_id, double_array_value={'data': [rng.randint(0, 12)]})],
+                             fragment_id)
+        elif action == 'switch tab':
+            tabs_id, _ = self.widget('tabs')
+            await self.rerun(action, [WidgetState(id=tabs_id, string_value=rng.choice(TABS))])
+
+
+async def simulate(port, user, deadline, think, latencies, errors, seed):
+    rng = random.Random(seed)
+    async with websockets.connect(
+        f'ws://127.0.0.1:{port}/_stcore/stream', subprotocols=['streamlit'], max_size=None
+    ) as websocket:
+        session = Session(websocket, user, latencies, errors)
+        try:
+            await session.act('open', rng)
+            await session.act('submit', rng)
+            while time.monotonic() < deadline:
+                await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+                if time.monotonic() >= deadline:
+                    break
+                actions = session.available()
+                await session.act(rng.choices(actions, [ACTIONS[action] for action in actions])[0], rng)
+        except asyncio.TimeoutError:
+            errors.append(f"a rerun took over {RERUN_TIMEOUT}s")
+
+
+async def run_sessions(port, users, duration, think, seed):
+    """({action: [seconds per rerun]}, script errors, elapsed seconds) of `users` acting at once."""
+    latencies, errors = {}, []
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate(port, user, deadline, think, latencies, errors, seed + i) for i, user in enumerate(users)
+    ))
+    return latencies, errors, time.perf_counter() - start
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, from /proc (Linux only; None elsewhere)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def read_stats(process, path, timeout=30):
+    """Asks the server for its probes' results (SIGUSR1) and waits for the file."""
+    if os.path.exists(path):
+        os.remove(path)
+    process.send_signal(signal.SIGUSR1)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not write its stats")
+        time.sleep(0.1)
+    with open(path) as f:
+        return json.load(f)
+
+
+def percentiles(samples_ms):
+    samples_ms = np.asarray(samples_ms, dtype=float)
+    if not len(samples_ms):
+        return '-', '-', '-', '-'
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return f"{p50:.1f}", f"{p95:.1f}", f"{p99:.1f}", f"{samples_ms.max():.1f}"
+
+
+def report(sessions, latencies, errors, elapsed, memory, stats):
+    reruns = sum(len(samples) for samples in latencies.values())
+    print(f"\n{sessions} sessions: {reruns} reruns in {elapsed:.0f}s ({reruns / elapsed:.1f}/s), "
+          f"{len(errors)} script errors")
+    print(f"  {'action':<13}{'reruns':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for action in ['open'] + list(ACTIONS):
+        samples = np.array(latencies.get(action, [])) * 1000
+        print(f"  {action:<13}{len(samples):>7}" + ''.join(f"{value:>9}" for value in percentiles(samples)))
+
+    print(f"  {'store':<13}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for thread in ('writer', 'script'):
+        samples = [ms for kind, ms in stats['writes'] if kind == thread]
+        print(f"  {thread + ' writes':<13}{len(samples):>7}" + ''.join(f"{value:>9}" for value in percentiles(samples)))
+    samples = stats['script_flushes']
+    print(f"  {'flush waits':<13}{len(samples):>7}" + ''.join(f"{value:>9}" for value in percentiles(samples))
+          + f"  ({sum(samples):.0f} ms of script time)")
+
+    baseline, loaded = memory
+    if baseline is not None:
+        print(f"  server RSS {baseline:.0f} MB warm, {loaded:.0f} MB with {sessions} sessions: "
+              f"{(loaded - baseline) / sessions:.1f} MB per session")
+    for message in sorted(set(errors))[:5]:
+        print(f"  error: {message[:120]}")
+
+
+def print_profile(path, top):
+    stats = pstats.Stats(path)
+    print(f"\nHottest functions by own time, every server thread ({path})")
+    stats.sort_stats('tottime').print_stats(top)
+    print("Hottest app functions by cumulative time")
+    stats.sort_stats('cumulative').print_stats(re.escape(REPO), top)
+
+
+def run_phase(args, sessions, stub_url):
+    workdir = tempfile.mkdtemp()
+    stats_path = os.path.join(workdir, 'server_stats.json')
+    env = dict(os.environ, MEAL_BACKEND='stub', MEAL_BACKEND_URL=stub_url)
+    command = [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(args.port), '--stats', stats_path]
+    if args.profile:
+        command.append('--profile')
+    # The app keeps its SQLite files in the working directory
+    server = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(f'http://127.0.0.1:{args.port}/_stcore/health', server)
+        # One session first, so the shared caches are built before the baseline reading
+        asyncio.run(run_sessions(args.port, ['warmup'], 0, 0, seed=0))
+        baseline = rss_mb(server.pid)
+        # Drops the warm-up's probe results and starts the profile
+        read_stats(server, stats_path)
+        users = [f'load-{i}' for i in range(sessions)]
+        latencies, errors, elapsed = asyncio.run(
+            run_sessions(args.port, users, args.duration, args.think, seed=sessions * 1000)
+        )
+        loaded = rss_mb(server.pid)
+        stats = read_stats(server, stats_path)
+        report(sessions, latencies, errors, elapsed, (baseline, loaded), stats)
+        return stats_path + '.prof' if args.profile else None
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main():
+    if sys.argv[1:2] == ['serve']:
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--port', type=int, required=True)
+        parser.add_argument('--stats', required=True)
+        parser.add_argument('--profile', action='store_true')
+        return serve(parser.parse_args(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of actions after the first submit')
+    parser.add_argument('--think', type=float, default=2.0, help='mean seconds between a session\'s actions')
+    parser.add_argument('--latency', type=float, default=0.5, help="the stub LLM's seconds per completion")
+    parser.add_argument('--profile', action='store_true', help='cProfile the server, printed for the last run')
+    parser.add_argument('--top', type=int, default=25, help='functions listed per profile table')
+    parser.add_argument('--port', type=int, default=8795)
+    parser.add_argument('--stub-port', type=int, default=8796)
+    args = parser.parse_args()
+    if streamlit.__version__ != STREAMLIT_VERSION:
+        parser.error(f"written against streamlit {STREAMLIT_VERSION}'s websocket protocol, "
+                     f"found {streamlit.__version__}; pip install streamlit=={STREAMLIT_VERSION}")
+
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, 'stub_llm_server.py'), '--port', str(args.stub_port),
+         '--latency', str(args.latency)], cwd=tempfile.mkdtemp(), stdout=subprocess.DEVNULL
+    )
+    print(f"{args.duration:.0f}s per run, {args.think}s mean think time, stub latency {args.latency}s")
+    try:
+        for sessions in args.sessions:
+            profile = run_phase(args, sessions, f'http://127.0.0.1:{args.stub_port}/v1')
+    finally:
+        stub.terminate()
+    if profile:
+        print_profile(profile, args.top)
+
+
+if __name__ == '__main__':
+    main()
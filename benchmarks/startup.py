@@ -0,0 +1,109 @@
+"""
+Cold-start and first-paint time of app.py, with and without AI meals enabled.
+
+Each sample is a fresh Python process that runs the app once with Streamlit's AppTest:
+"first paint" is when the script sends its first element, "first run" when the page
+is complete. The AI profile also submits a plan against a local stub LLM server
+(stub_llm_server.py), which is where the OpenAI client now gets imported and built.
+Pass --app to time another version of the script, e.g. one from git history:
+
+    python benchmarks/startup.py --repeat 5
+    git show HEAD~1:app.py > /tmp/app_old.py && python benchmarks/startup.py --app /tmp/app_old.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+PROFILES = {
+    'no AI': {'name': 'Bench', 'use_ai_meals': False},
+    'AI': {'name': 'Bench', 'use_ai_meals': True}
+}
+
+
+def child(app_path, user, launched):
+    """Runs in the fresh process: times the first run and, for AI users, the first plan."""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    from stub_llm_server import start_stub_server
+
+    timings = {'imported': time.time() - launched}
+    enqueue = ForwardMsgQueue.enqueue
+
+    def enqueue_timed(self, msg):
+        if 'first_paint' not in timings and msg.HasField('delta'):
+            timings['first_paint'] = time.time() - launched
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = enqueue_timed
+
+    _, url = start_stub_server(latency=0.0, jitter=0.0)
+    os.environ.update({'MEAL_BACKEND': 'stub', 'MEAL_BACKEND_URL': url})
+    app = AppTest.from_file(app_path, default_timeout=120)
+    app.secrets['OPENAI_API_KEY'] = 'sk-bench'
+    app.query_params['user'] = user
+    app.run()
+    timings['first_run'] = time.time() - launched
+    timings['openai_imported'] = 'openai' in sys.modules
+
+    if user == 'AI':
+        start = time.time()
+        next(button for button in app.button if 'Generate' in str(button.label)).click().run()
+        timings['first_plan'] = time.time() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    print(json.dumps(timings))
+
+
+def sample(app_path, user, workdir):
+    launched = time.time()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', app_path, user, repr(launched)],
+        cwd=workdir, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default=os.path.join(REPO, 'app.py'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], float(args.child[2]))
+        return
+
+    from user_store import UserStore
+
+    # The app keeps its SQLite files in the working directory; one saved profile per mode
+    workdir = tempfile.mkdtemp()
+    store = UserStore(os.path.join(workdir, 'user_data.db'))
+    for user, fields in PROFILES.items():
+        store.save_fields(user, fields)
+
+    print(f"{os.path.relpath(args.app)}, median of {args.repeat} fresh processes (ms after launch)")
+    print(f"{'profile':<10}{'imports':>10}{'first paint':>13}{'first run':>11}{'first plan':>12}  openai at start")
+    for user in PROFILES:
+        samples = [sample(os.path.abspath(args.app), user, workdir) for _ in range(args.repeat)]
+
+        def median(key):
+            values = [item[key] for item in samples if key in item]
+            return float(np.median(values)) * 1000 if values else float('nan')
+
+        print(f"{user:<10}{median('imported'):>10.0f}{median('first_paint'):>13.0f}{median('first_run'):>11.0f}"
+              f"{median('first_plan'):>12.0f}  {'yes' if samples[0]['openai_imported'] else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
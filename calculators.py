@@ -0,0 +1,90 @@
+"""
+Pure planner calculations, memoized on their inputs for the life of the process.
+Results that callers may mutate are cached as tuples and copied on the way out.
+"""
+from functools import lru_cache
+
+from catalog import (
+    ACTIVITY_MULTIPLIERS, DEFAULT_EXERCISES, DEFAULT_MEALS, DEFAULT_WORKOUT_TEMPLATE,
+    EXERCISES, FOOD_RECOMMENDATIONS, HEALTH_MODIFIERS, MACRO_RATIOS, MEAL_DISTRIBUTIONS,
+    WORKOUT_TEMPLATES
+)
+
+
+@lru_cache(maxsize=4096)
+def calculate_bmr(weight, height, age, gender):
+    if gender == 'Male':
+        return 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
+    else:
+        return 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
+
+
+@lru_cache(maxsize=4096)
+def calculate_tdee(bmr, activity_level):
+    return bmr * ACTIVITY_MULTIPLIERS.get(activity_level, 1.55)
+
+
+@lru_cache(maxsize=4096)
+def calculate_calorie_target(current_weight, goal_weight, tdee, goal_type):
+    weight_difference = current_weight - goal_weight
+
+    if goal_type == 'Weight Loss':
+        deficit = min(1000, max(500, abs(weight_difference) * 100))
+        return max(1200, tdee - deficit)
+    elif goal_type == 'Weight Gain':
+        surplus = min(500, max(250, abs(weight_difference) * 100))
+        return tdee + surplus
+    else:
+        return tdee
+
+
+@lru_cache(maxsize=4096)
+def _macro_targets(calorie_target, goal_type):
+    ratios = MACRO_RATIOS.get(goal_type, MACRO_RATIOS['default'])
+    return (
+        ('protein_target', round(calorie_target * ratios['protein'] / 4)),
+        ('carbs_target', round(calorie_target * ratios['carbs'] / 4)),
+        ('fat_target', round(calorie_target * ratios['fat'] / 9))
+    )
+
+
+def calculate_macro_targets(calorie_target, goal_type):
+    return dict(_macro_targets(calorie_target, goal_type))
+
+
+def split_meal_targets(calorie_target, macro_targets):
+    """Splits the daily targets into one unnamed slot per meal by MEAL_DISTRIBUTIONS."""
+    meals = []
+    for meal_type, distribution in MEAL_DISTRIBUTIONS.items():
+        meals.append({
+            'meal': meal_type,
+            'name': None,
+            'calories': round(calorie_target * distribution),
+            'protein': round(macro_targets['protein_target'] * distribution),
+            'carbs': round(macro_targets['carbs_target'] * distribution),
+            'fat': round(macro_targets['fat_target'] * distribution)
+        })
+    return meals
+
+
+@lru_cache(maxsize=64)
+def _food_recommendations(goal_type, health_condition):
+    return FOOD_RECOMMENDATIONS.get(goal_type, ()) + HEALTH_MODIFIERS.get(health_condition, ())
+
+
+def get_food_recommendations(goal_type, health_condition):
+    return list(_food_recommendations(goal_type, health_condition))
+
+
+def generate_workout_plan(goal_type, health_condition, fitness_level):
+    template = WORKOUT_TEMPLATES.get(goal_type, {}).get(health_condition, DEFAULT_WORKOUT_TEMPLATE)
+    return [dict(workout) for workout in template]
+
+
+def generate_exercises(workout_type):
+    return list(EXERCISES.get(workout_type, DEFAULT_EXERCISES))
+
+
+def get_default_meal(meal_type):
+    """Fallback meals if AI generation fails"""
+    return DEFAULT_MEALS.get(meal_type.lower(), "Healthy Balanced Meal")
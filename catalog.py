@@ -0,0 +1,151 @@
+"""
+Static lookup tables for the planner, built once per process.
+Everything here is read-only; the helpers in calculators.py hand out copies.
+"""
+from types import MappingProxyType
+
+
+def _freeze(value):
+    """Recursively turns dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Prebuilt meal templates, used when the food database can't compose a plan
+MEAL_TEMPLATES = _freeze({
+    'Weight Loss': {
+        'Breakfast': 'Greek Yogurt with Berries and Chia Seeds (300 cal, 25g protein)',
+        'Lunch': 'Grilled Chicken Salad with Quinoa (400 cal, 35g protein)',
+        'Dinner': 'Baked Salmon with Roasted Vegetables (450 cal, 40g protein)',
+        'Snack': 'Apple with Almond Butter (200 cal, 8g protein)'
+    },
+    'Weight Gain': {
+        'Breakfast': 'Oatmeal with Banana and Peanut Butter (550 cal, 20g protein)',
+        'Lunch': 'Beef and Vegetable Stir-fry with Rice (600 cal, 35g protein)',
+        'Dinner': 'Chicken with Sweet Potato and Avocado (650 cal, 45g protein)',
+        'Snack': 'Protein Shake with Oats (350 cal, 30g protein)'
+    },
+    'Weight Maintenance': {
+        'Breakfast': 'Whole Grain Toast with Eggs and Avocado (450 cal, 25g protein)',
+        'Lunch': 'Turkey and Hummus Wrap with Side Salad (500 cal, 30g protein)',
+        'Dinner': 'Fish with Quinoa and Steamed Vegetables (550 cal, 35g protein)',
+        'Snack': 'Greek Yogurt with Nuts (300 cal, 20g protein)'
+    },
+    'Muscle Building': {
+        'Breakfast': 'Protein Pancakes with Berries (500 cal, 35g protein)',
+        'Lunch': 'Lean Beef with Brown Rice and Broccoli (650 cal, 45g protein)',
+        'Dinner': 'Salmon with Sweet Potato and Asparagus (600 cal, 40g protein)',
+        'Snack': 'Cottage Cheese with Almonds (350 cal, 30g protein)'
+    }
+})
+
+# Fallback meals if AI generation fails
+DEFAULT_MEALS = _freeze({
+    "breakfast": "Oatmeal with Berries: Classic oatmeal topped with fresh berries and nuts (350 cal, 12g protein)",
+    "lunch": "Grilled Chicken Salad: Mixed greens with grilled chicken and vinaigrette (450 cal, 35g protein)",
+    "dinner": "Baked Salmon with Vegetables: Salmon fillet with steamed broccoli and quinoa (500 cal, 40g protein)",
+    "snack": "Greek Yogurt with Honey: Protein-rich yogurt with a touch of honey (200 cal, 15g protein)"
+})
+
+# Share of the daily targets that goes to each meal
+MEAL_DISTRIBUTIONS = _freeze({'Breakfast': 0.25, 'Lunch': 0.35, 'Dinner': 0.30, 'Snack': 0.10})
+
+ACTIVITY_MULTIPLIERS = _freeze({
+    'Sedentary': 1.2, 'Light': 1.375, 'Moderate': 1.55, 'Active': 1.725, 'Very Active': 1.9
+})
+
+MACRO_RATIOS = _freeze({
+    'Weight Loss': {'protein': 0.35, 'carbs': 0.40, 'fat': 0.25},
+    'Weight Gain': {'protein': 0.30, 'carbs': 0.50, 'fat': 0.20},
+    'default': {'protein': 0.25, 'carbs': 0.50, 'fat': 0.25}
+})
+
+FOOD_RECOMMENDATIONS = _freeze({
+    'Weight Loss': [
+        'Leafy greens (spinach, kale)',
+        'Lean proteins (chicken breast, fish)',
+        'Whole grains (quinoa, brown rice)',
+        'Berries and low-sugar fruits',
+        'Greek yogurt and cottage cheese'
+    ],
+    'Weight Gain': [
+        'Nuts and nut butters',
+        'Avocados and healthy oils',
+        'Whole milk and full-fat dairy',
+        'Complex carbs (sweet potatoes, oats)',
+        'Protein shakes with banana'
+    ],
+    'Weight Maintenance': [
+        'Balanced meals with all macros',
+        'Colorful vegetables',
+        'Lean proteins and healthy fats',
+        'Whole fruits in moderation',
+        'Hydrating foods like cucumbers'
+    ]
+})
+
+HEALTH_MODIFIERS = _freeze({
+    'Diabetes': ['Low glycemic index foods', 'High fiber vegetables', 'Lean proteins'],
+    'Hypertension': ['Low sodium foods', 'Potassium-rich foods', 'Whole grains'],
+    'Heart Condition': ['Omega-3 rich foods', 'Low saturated fats', 'Fiber-rich foods'],
+    'Healthy': ['Varied balanced diet', 'Colorful fruits and vegetables', 'Lean proteins']
+})
+
+WORKOUT_TEMPLATES = _freeze({
+    'Weight Loss': {
+        'Healthy': [
+            {'day': 'Monday', 'type': 'Cardio', 'duration': 45, 'description': 'Running or Cycling', 'intensity': 'High'},
+            {'day': 'Tuesday', 'type': 'Strength', 'duration': 30, 'description': 'Full Body Circuit', 'intensity': 'Medium'},
+            {'day': 'Wednesday', 'type': 'HIIT', 'duration': 30, 'description': 'Interval Training', 'intensity': 'High'},
+            {'day': 'Thursday', 'type': 'Active Recovery', 'duration': 30, 'description': 'Yoga or Stretching', 'intensity': 'Low'},
+            {'day': 'Friday', 'type': 'Strength', 'duration': 40, 'description': 'Upper Body Focus', 'intensity': 'Medium'},
+            {'day': 'Saturday', 'type': 'Cardio', 'duration': 60, 'description': 'Swimming or Hiking', 'intensity': 'Medium'},
+            {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
+        ],
+        'Diabetes': [
+            {'day': 'Monday', 'type': 'Walking', 'duration': 30, 'description': 'Brisk Walking', 'intensity': 'Low'},
+            {'day': 'Tuesday', 'type': 'Strength', 'duration': 25, 'description': 'Light Weights', 'intensity': 'Low'},
+            {'day': 'Wednesday', 'type': 'Yoga', 'duration': 40, 'description': 'Gentle Yoga', 'intensity': 'Low'},
+            {'day': 'Thursday', 'type': 'Rest', 'duration': 0, 'description': 'Rest Day', 'intensity': 'None'},
+            {'day': 'Friday', 'type': 'Walking', 'duration': 35, 'description': 'Moderate Pace', 'intensity': 'Medium'},
+            {'day': 'Saturday', 'type': 'Swimming', 'duration': 30, 'description': 'Light Swimming', 'intensity': 'Low'},
+            {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
+        ]
+    },
+    'Weight Gain': {
+        'Healthy': [
+            {'day': 'Monday', 'type': 'Strength', 'duration': 60, 'description': 'Chest & Triceps', 'intensity': 'High'},
+            {'day': 'Tuesday', 'type': 'Strength', 'duration': 60, 'description': 'Back & Biceps', 'intensity': 'High'},
+            {'day': 'Wednesday', 'type': 'Cardio', 'duration': 20, 'description': 'Light Cardio', 'intensity': 'Low'},
+            {'day': 'Thursday', 'type': 'Strength', 'duration': 60, 'description': 'Legs & Shoulders', 'intensity': 'High'},
+            {'day': 'Friday', 'type': 'Strength', 'duration': 45, 'description': 'Full Body', 'intensity': 'Medium'},
+            {'day': 'Saturday', 'type': 'Active Recovery', 'duration': 30, 'description': 'Walking or Yoga', 'intensity': 'Low'},
+            {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
+        ]
+    }
+})
+
+# Default template if specific combination not found
+DEFAULT_WORKOUT_TEMPLATE = _freeze([
+    {'day': 'Monday', 'type': 'Strength', 'duration': 45, 'description': 'Upper Body', 'intensity': 'Medium'},
+    {'day': 'Tuesday', 'type': 'Cardio', 'duration': 40, 'description': 'Running', 'intensity': 'Medium'},
+    {'day': 'Wednesday', 'type': 'Strength', 'duration': 45, 'description': 'Lower Body', 'intensity': 'Medium'},
+    {'day': 'Thursday', 'type': 'Yoga', 'duration': 60, 'description': 'Flexibility', 'intensity': 'Low'},
+    {'day': 'Friday', 'type': 'Full Body', 'duration': 50, 'description': 'Circuit Training', 'intensity': 'Medium'},
+    {'day': 'Saturday', 'type': 'Outdoor', 'duration': 90, 'description': 'Hiking/Sports', 'intensity': 'High'},
+    {'day': 'Sunday', 'type': 'Rest', 'duration': 0, 'description': 'Complete Rest', 'intensity': 'None'}
+])
+
+EXERCISES = _freeze({
+    'Strength': ['Bench Press 3x8-12', 'Squats 4x8-10', 'Deadlifts 3x6-8', 'Pull-ups 3xMax'],
+    'Cardio': ['Running 30min', 'Cycling 45min', 'Elliptical 30min', 'Rowing 25min'],
+    'HIIT': ['Burpees 45s/15s', 'Jump Squats 30s/30s', 'Mountain Climbers 40s/20s'],
+    'Yoga': ['Sun Salutations', 'Warrior Series', 'Balance Poses', 'Flexibility Flow'],
+    'Walking': ['Brisk Walk 30min', 'Interval Walking', 'Incline Walking'],
+    'Swimming': ['Freestyle Laps', 'Breaststroke', 'Water Aerobics']
+})
+
+DEFAULT_EXERCISES = ('Custom exercises based on your level',)
@@ -0,0 +1,123 @@
+"""Food database built from meals.csv, loaded once per process and shared by every session."""
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MEALS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'meals.csv')
+
+# meals.csv header -> column name used in the app
+CSV_COLUMNS = {
+    'Date': 'date',
+    'User_ID': 'user_id',
+    'Food_Item': 'food',
+    'Category': 'category',
+    'Calories (kcal)': 'calories',
+    'Protein (g)': 'protein',
+    'Carbohydrates (g)': 'carbs',
+    'Fat (g)': 'fat',
+    'Fiber (g)': 'fiber',
+    'Sugars (g)': 'sugars',
+    'Sodium (mg)': 'sodium',
+    'Cholesterol (mg)': 'cholesterol',
+    'Meal_Type': 'meal_type',
+    'Water_Intake (ml)': 'water_ml'
+}
+
+NUTRIENTS = ['calories', 'protein', 'carbs', 'fat', 'fiber', 'sugars', 'sodium', 'cholesterol']
+
+CSV_DTYPES = {
+    'User_ID': 'int32',
+    'Food_Item': 'category',
+    'Category': 'category',
+    'Calories (kcal)': 'float32',
+    'Protein (g)': 'float32',
+    'Carbohydrates (g)': 'float32',
+    'Fat (g)': 'float32',
+    'Fiber (g)': 'float32',
+    'Sugars (g)': 'float32',
+    'Sodium (mg)': 'float32',
+    'Cholesterol (mg)': 'float32',
+    'Meal_Type': 'category',
+    'Water_Intake (ml)': 'int32'
+}
+
+
+def read_meals_csv(path=MEALS_CSV, **kwargs):
+    """Reads a meals.csv-shaped file into typed columns with the app's column names."""
+    frame = pd.read_csv(path, dtype=CSV_DTYPES, parse_dates=['Date'], **kwargs)
+    return frame.rename(columns=CSV_COLUMNS)
+
+
+class FoodDatabase:
+    """
+    Per-food nutrient profiles (the mean of every logged serving) with indexes by
+    food name, category and meal type. Lookups are plain dict/array reads.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+        grouped = rows.groupby('food', observed=True)
+        profiles = grouped[NUTRIENTS].mean().astype('float64').round(1)
+        profiles['category'] = grouped['category'].agg(lambda values: values.mode().iat[0]).astype(str)
+        profiles['servings'] = grouped.size()
+        self.profiles = profiles.sort_index()
+
+        self.foods = np.array(self.profiles.index.astype(str))
+        self.matrix = self.profiles[NUTRIENTS].to_numpy(dtype=np.float64)
+        self._positions = {food.lower(): i for i, food in enumerate(self.foods)}
+        self._profiles = {
+            food: {'food': food, 'category': category, 'servings': int(servings),
+                   **dict(zip(NUTRIENTS, nutrients.tolist()))}
+            for food, category, servings, nutrients in zip(
+                self.foods, self.profiles['category'], self.profiles['servings'], self.matrix
+            )
+        }
+
+        self.by_category = {
+            str(category): np.flatnonzero(self.profiles['category'].to_numpy() == category)
+            for category in sorted(self.profiles['category'].unique())
+        }
+
+        # Foods per meal type, most often logged for that meal first
+        meal_counts = rows.groupby(['meal_type', 'food'], observed=True).size()
+        self.by_meal_type = {}
+        for meal_type, counts in meal_counts.groupby(level='meal_type', observed=True):
+            counts = counts.droplevel('meal_type').sort_values(ascending=False)
+            self.by_meal_type[str(meal_type)] = np.array(
+                [self._positions[str(food).lower()] for food in counts.index]
+            )
+
+    def position(self, food):
+        """Row of `food` in `foods`/`matrix`, or None if unknown (case-insensitive)."""
+        return self._positions.get(str(food).strip().lower())
+
+    def profile(self, food):
+        """Nutrient profile dict for `food`, or None if unknown."""
+        position = self.position(food)
+        if position is None:
+            return None
+        return self._profiles[self.foods[position]]
+
+    def foods_in_category(self, category):
+        """Food names in a category."""
+        return self.foods[self.by_category.get(category, [])].tolist()
+
+    def foods_for_meal(self, meal_type):
+        """Food names logged for a meal type, most common first."""
+        return self.foods[self.by_meal_type.get(meal_type, [])].tolist()
+
+
+@lru_cache(maxsize=None)
+def load_food_database(path=MEALS_CSV):
+    """
+    Loads `path` once per process; later calls return the same FoodDatabase.
+    meals.csv is read from its columnar copy once converted (see intake_dataset.py).
+    """
+    if path == MEALS_CSV:
+        import intake_dataset
+        if intake_dataset.available():
+            return FoodDatabase(intake_dataset.read_intake(source=intake_dataset.SOURCE_CSV))
+    return FoodDatabase(read_meals_csv(path))
@@ -0,0 +1,114 @@
+"""
+A user's food log as a session holds it: today's entries in full, earlier days
+compacted into one row of nutrient totals each. The log rolls over to a new day
+at local midnight, and today's calories are read from it rather than counted
+separately.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from food_db import NUTRIENTS
+
+# Days of compacted totals kept, today excluded
+HISTORY_DAYS = 30
+
+
+def _nutrients(entry):
+    return [float(entry.get(nutrient) or 0) for nutrient in NUTRIENTS]
+
+
+class FoodLog:
+    """
+    `entries` holds today's (logged_at, entry) pairs. Earlier days live in three
+    parallel arrays in date order: `days` (datetime64[D]), `totals` (one float64
+    row of NUTRIENTS per day) and `counts` (entries per day), at most
+    `history_days` long.
+    """
+
+    def __init__(self, day=None, history_days=HISTORY_DAYS):
+        self.day = day or datetime.now().date()
+        self.history_days = history_days
+        self.entries = []
+        self.days = np.empty(0, dtype='datetime64[D]')
+        self.totals = np.empty((0, len(NUTRIENTS)), dtype=np.float64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_records(cls, records, now=None, history_days=HISTORY_DAYS):
+        """Builds the log from (logged_at, entry) pairs, compacting every day before today in one pass."""
+        food_log = cls((now or datetime.now()).date(), history_days)
+        earlier = []
+        for logged_at, entry in records:
+            if logged_at.date() >= food_log.day:
+                food_log.entries.append((logged_at, entry))
+            else:
+                earlier.append((logged_at, entry))
+        if earlier:
+            days = np.array([logged_at.date() for logged_at, _ in earlier], dtype='datetime64[D]')
+            values = np.array([_nutrients(entry) for _, entry in earlier], dtype=np.float64)
+            food_log.days, positions, food_log.counts = np.unique(days, return_inverse=True, return_counts=True)
+            food_log.totals = np.zeros((len(food_log.days), len(NUTRIENTS)), dtype=np.float64)
+            np.add.at(food_log.totals, positions, values)
+            food_log._trim()
+        return food_log
+
+    def roll_over(self, now=None):
+        """Moves to today if midnight has passed, compacting the finished day. True if it rolled."""
+        today = (now or datetime.now()).date()
+        if today <= self.day:
+            return False
+        for logged_at, entry in self.entries:
+            self._compact(logged_at.date(), entry)
+        self.entries = []
+        self.day = today
+        self._trim()
+        return True
+
+    def _compact(self, day, entry):
+        day = np.datetime64(day, 'D')
+        position = np.searchsorted(self.days, day)
+        if position == len(self.days) or self.days[position] != day:
+            self.days = np.insert(self.days, position, day)
+            self.totals = np.insert(self.totals, position, 0.0, axis=0)
+            self.counts = np.insert(self.counts, position, 0)
+        self.totals[position] += _nutrients(entry)
+        self.counts[position] += 1
+
+    def _trim(self):
+        keep = self.days >= np.datetime64(self.day - timedelta(days=self.history_days), 'D')
+        if not keep.all():
+            self.days, self.totals, self.counts = self.days[keep], self.totals[keep], self.counts[keep]
+
+    def add(self, entry, logged_at=None):
+        """Logs an entry, rolling over first if a new day has started."""
+        logged_at = logged_at or datetime.now()
+        self.roll_over(logged_at)
+        if logged_at.date() < self.day:
+            self._compact(logged_at.date(), entry)
+            self._trim()
+        else:
+            self.entries.append((logged_at, entry))
+
+    def clear_today(self):
+        """Drops today's entries; returns the time from which stored entries should go too."""
+        self.entries = []
+        return datetime.combine(self.day, time.min)
+
+    def today(self):
+        """Today's entries, oldest first."""
+        return [entry for _, entry in self.entries]
+
+    @property
+    def daily_calories(self):
+        """Calories logged today."""
+        return sum(entry.get('calories') or 0 for _, entry in self.entries)
+
+    def history(self, days=None):
+        """Per-day totals (NUTRIENTS plus 'entries') of earlier days, or the last `days` of them."""
+        frame = pd.DataFrame(self.totals, index=pd.DatetimeIndex(self.days, name='date'), columns=NUTRIENTS)
+        frame['entries'] = self.counts
+        if days is not None:
+            frame = frame[frame.index >= pd.Timestamp(self.day - timedelta(days=days))]
+        return frame
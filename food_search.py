@@ -0,0 +1,169 @@
+"""
+In-memory food name search for the Calorie Tracker: ranked prefix matches with a
+trigram fallback for typos, over meals.csv foods and the foods a user has added.
+"""
+import re
+from bisect import bisect_left
+from collections import Counter
+
+from food_db import NUTRIENTS
+
+DEFAULT_LIMIT = 8
+
+# Minimum share of the query's trigrams a name must contain to match fuzzily
+FUZZY_THRESHOLD = 0.5
+
+# Match tiers, best first
+EXACT, NAME_PREFIX, WORD_PREFIX, FUZZY = range(4)
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', str(text).strip().lower())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodIndex:
+    """
+    Search index over food dicts ({'food', 'category', 'servings', <nutrients per serving>}).
+    Names and their words sit in one sorted list for bisect prefix lookups; a trigram
+    index backs fuzzy matching. A user's index chains to the shared one via `parent`.
+    """
+
+    def __init__(self, foods=(), parent=None):
+        self.parent = parent
+        self.foods = []
+        self._ids = {}
+        self._tokens = []
+        self._grams = {}
+        for food in foods:
+            self.add(food)
+
+    def add(self, food):
+        """Adds a food, or replaces the entry with the same (case-insensitive) name."""
+        name = normalize(food['food'])
+        if name in self._ids:
+            self.foods[self._ids[name]] = food
+            return
+        food_id = self._ids[name] = len(self.foods)
+        self.foods.append(food)
+
+        tokens = [(name, food_id, NAME_PREFIX)]
+        tokens += [(word, food_id, WORD_PREFIX) for word in name.split(' ')[1:]]
+        for token in tokens:
+            self._tokens.insert(bisect_left(self._tokens, token), token)
+        for gram in trigrams(name):
+            self._grams.setdefault(gram, []).append(food_id)
+
+    def get(self, name):
+        """The food named `name` (case-insensitive) here or in the parent, or None."""
+        food_id = self._ids.get(normalize(name))
+        if food_id is not None:
+            return self.foods[food_id]
+        return self.parent.get(name) if self.parent is not None else None
+
+    def _prefixed(self, prefix):
+        """{food_id: best tier} of foods whose name or one of its words starts with `prefix`."""
+        found = {}
+        start = bisect_left(self._tokens, (prefix,))
+        for token, food_id, tier in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            if tier == NAME_PREFIX and token == prefix:
+                tier = EXACT
+            found[food_id] = min(tier, found.get(food_id, tier))
+        return found
+
+    def _matches(self, query):
+        """{normalized name: (tier, similarity, food)} for every food matching `query`."""
+        found = self._prefixed(query)
+        words = query.split(' ')
+        if len(words) > 1:
+            # "o j" finds "Orange Juice": every word prefixes a word of the name
+            candidates = None
+            for word in words:
+                prefixed = self._prefixed(word)
+                candidates = set(prefixed) if candidates is None else candidates & set(prefixed)
+            for food_id in candidates:
+                found.setdefault(food_id, WORD_PREFIX)
+
+        matches = {}
+        for food_id, tier in found.items():
+            food = self.foods[food_id]
+            matches[normalize(food['food'])] = (tier, 1.0, food)
+
+        if len(query) >= 3:
+            query_grams = trigrams(query)
+            shared = Counter(food_id for gram in query_grams for food_id in self._grams.get(gram, ()))
+            for food_id, hits in shared.items():
+                food = self.foods[food_id]
+                name = normalize(food['food'])
+                # Share of the query's trigrams found in the name, so long names aren't penalized
+                similarity = hits / len(query_grams)
+                if name not in matches and similarity >= FUZZY_THRESHOLD:
+                    matches[name] = (FUZZY, similarity, food)
+        return matches
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Up to `limit` foods ranked exact > name prefix > word prefix > fuzzy, then by
+        similarity and how often they are logged. Foods here shadow the parent's.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        matches = self.parent._matches(query) if self.parent is not None else {}
+        matches.update(self._matches(query))
+        ranked = sorted(
+            matches.values(),
+            key=lambda match: (match[0], -match[1], -match[2].get('servings', 0), len(match[2]['food']))
+        )
+        return [food for _, _, food in ranked[:limit]]
+
+
+def database_foods(database):
+    """Food dicts for every food in a FoodDatabase."""
+    return [database.profile(food) for food in database.foods]
+
+
+def logged_foods(food_log, database):
+    """
+    Food dicts for foods in `food_log` that the database doesn't know, with the
+    nutrients of one serving as logged and how often each was logged.
+    """
+    foods = {}
+    for entry in food_log:
+        name = str(entry.get('name', '')).strip()
+        if not name or database.profile(name) is not None:
+            continue
+        servings = entry.get('servings') or 1
+        food = {
+            'food': name,
+            'category': entry.get('category', 'Other'),
+            'servings': foods[name.lower()]['servings'] + 1 if name.lower() in foods else 1,
+            **{nutrient: round((entry.get(nutrient) or 0) / servings, 1) for nutrient in NUTRIENTS}
+        }
+        foods[name.lower()] = food
+    return list(foods.values())
+
+
+def portion_entry(food, servings, calories=None):
+    """
+    A food log entry for `servings` of `food` with every nutrient. Given `calories`
+    (an override typed by the user), nutrients are scaled to match it instead.
+    """
+    scale = servings
+    if calories is not None and food['calories'] > 0:
+        scale = calories / food['calories']
+    entry = {
+        'name': food['food'],
+        'calories': round(calories if calories is not None else food['calories'] * servings),
+        'servings': servings,
+        'category': food.get('category', 'Other')
+    }
+    for nutrient in NUTRIENTS[1:]:
+        entry[nutrient] = round(food.get(nutrient, 0) * scale, 1)
+    return entry
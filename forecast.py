@@ -0,0 +1,111 @@
+"""
+Week-by-week body weight projections for the Progress tab, with the date the goal
+weight is reached and confidence bands.
+
+Energy balance: each day weight changes by (intake - TDEE(weight)) / KCAL_PER_KG, and
+TDEE adapts as weight changes. calculate_bmr is linear in weight and calculate_tdee
+scales it, so TDEE = intercept + slope * weight and the trajectory has a closed form:
+an exponential approach to the weight where intake equals TDEE. That makes a forecast
+one NumPy expression over scenarios x random draws x weeks, with no time-stepping,
+fast enough to rerun on every slider move.
+
+The draws cover how far a person's real TDEE is from the formula (TDEE_ERROR) and
+how well they stick to the plan: on days off plan they eat at maintenance.
+
+    result = forecast(80, 72, 175, 30, 'Male', 'Moderate', intake=[1900, 2200], adherence=0.8)
+    result['goal_days']   # (2 scenarios, QUANTILES) days until 72 kg
+    scenario_grid(80, 72, 175, 30, 'Male', 'Moderate', deficits=[250, 500], adherences=[0.6, 0.8, 1.0])
+"""
+import numpy as np
+import pandas as pd
+
+from calculators import calculate_bmr, calculate_tdee
+
+# Energy in a kilogram of body weight lost or gained (kcal)
+KCAL_PER_KG = 7700
+
+# Relative standard deviation of measured TDEE around the formula, and of day-to-day adherence
+TDEE_ERROR = 0.08
+ADHERENCE_SD = 0.1
+
+DRAWS = 200
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Projection length when none is given: past the slowest band's goal date, within these bounds (weeks)
+MIN_WEEKS = 12
+MAX_WEEKS = 156
+
+
+def tdee_line(height, age, gender, activity_level):
+    """(intercept, slope) with TDEE = intercept + slope * weight, read off the calculators."""
+    intercept = calculate_tdee(calculate_bmr(0, height, age, gender), activity_level)
+    slope = calculate_tdee(calculate_bmr(1, height, age, gender), activity_level) - intercept
+    return intercept, slope
+
+
+def forecast(current_weight, goal_weight, height, age, gender, activity_level, intake, adherence=1.0,
+             weeks=None, draws=DRAWS, tdee_error=TDEE_ERROR, adherence_sd=ADHERENCE_SD, seed=0, start=None):
+    """
+    Projects every scenario: `intake` (planned kcal/day) and `adherence` (share of
+    days on plan, 0-1) broadcast together and are flattened into scenarios. Returns
+    a dict of
+      'dates':     DatetimeIndex of the weeks from `start` (today),
+      'weight':    (scenarios, QUANTILES, weeks + 1) weight bands in kg,
+      'goal_days': (scenarios, QUANTILES) days until goal_weight, inf if it is never reached.
+    The same draws are used for every scenario, so their differences come from the scenario alone.
+    """
+    intake, adherence = (values.ravel() for values in np.broadcast_arrays(
+        np.asarray(intake, dtype=np.float64), np.asarray(adherence, dtype=np.float64)
+    ))
+    intercept, slope = tdee_line(height, age, gender, activity_level)
+    rng = np.random.default_rng(seed)
+    tdee_factor = np.maximum(0.5, rng.normal(1.0, tdee_error, draws))
+    on_plan = np.clip(adherence[:, None] + rng.normal(0.0, adherence_sd, draws), 0.0, 1.0)
+
+    # Per scenario and draw: the weight intake settles at, and the daily rate of approach to it
+    equilibrium = (intake[:, None] / tdee_factor - intercept) / slope
+    rate = on_plan * tdee_factor * slope / KCAL_PER_KG
+    gap = current_weight - equilibrium
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        remaining = (goal_weight - equilibrium) / gap
+        days = np.where((remaining > 0) & (remaining <= 1) & (rate > 0), -np.log(remaining) / rate, np.inf)
+    days = np.where(current_weight == goal_weight, 0.0, days)
+    goal_days = np.quantile(days, QUANTILES, axis=1, method='inverted_cdf').T
+
+    if weeks is None:
+        reached = goal_days[np.isfinite(goal_days)]
+        weeks = int(np.clip(np.ceil(reached.max() / 7) + 4 if reached.size else MAX_WEEKS, MIN_WEEKS, MAX_WEEKS))
+    elapsed = np.arange(weeks + 1) * 7.0
+    weight = equilibrium[:, :, None] + gap[:, :, None] * np.exp(-rate[:, :, None] * elapsed)
+
+    start = pd.Timestamp.today().normalize() if start is None else pd.Timestamp(start)
+    return {
+        'dates': pd.date_range(start, periods=weeks + 1, freq='7D'),
+        'weight': np.moveaxis(np.quantile(weight, QUANTILES, axis=1), 0, 1),
+        'goal_days': goal_days
+    }
+
+
+def goal_date(days, start=None):
+    """The date `days` after `start` (today), or None if the goal is never reached."""
+    if not np.isfinite(days):
+        return None
+    start = pd.Timestamp.today().normalize() if start is None else pd.Timestamp(start)
+    return start + pd.Timedelta(days=float(np.ceil(days)))
+
+
+def scenario_grid(current_weight, goal_weight, height, age, gender, activity_level, deficits, adherences, **options):
+    """
+    Median weeks until goal_weight for each deficit (kcal/day below maintenance at
+    the current weight; negative for a surplus) and adherence, as a DataFrame with a
+    row per adherence and a column per deficit. NaN where the goal is never reached.
+    `options` go to forecast().
+    """
+    profile = (current_weight, goal_weight, height, age, gender, activity_level)
+    intercept, slope = tdee_line(height, age, gender, activity_level)
+    deficit_grid, adherence_grid = np.meshgrid(np.asarray(deficits, dtype=np.float64), adherences)
+    result = forecast(*profile, intake=intercept + slope * current_weight - deficit_grid,
+                      adherence=adherence_grid, weeks=0, **options)
+    weeks = result['goal_days'][:, 1].reshape(deficit_grid.shape) / 7
+    return pd.DataFrame(np.where(np.isfinite(weeks), weeks, np.nan), index=list(adherences), columns=list(deficits))
@@ -0,0 +1,180 @@
+"""
+Bulk import of meals.csv-shaped intake exports into the user store's food log.
+
+The CSV is streamed in chunks of --chunk-rows, so memory is bounded by the chunk
+size rather than the file. Each chunk is validated and coerced column by column
+(dates, numeric nutrients, known meal types); rejected rows are counted by reason
+and can be written to --rejects. Valid rows are inserted in one transaction per chunk.
+
+    python ingest.py exports/meals_2025.csv --db user_data.db --chunk-rows 50000 --rejects rejects.csv
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from catalog import MEAL_DISTRIBUTIONS
+from food_db import CSV_COLUMNS, NUTRIENTS
+from user_store import UserStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_CHUNK_ROWS = 50000
+
+REQUIRED_COLUMNS = ['date', 'user_id', 'food', 'calories', 'meal_type']
+
+# Accepted Meal_Type values, matched case-insensitively
+MEAL_TYPES = {meal_type.lower(): meal_type for meal_type in MEAL_DISTRIBUTIONS}
+
+# A time of day followed by a UTC offset or zone designator, e.g. 08:30:00+02:00 or 08:30Z
+UTC_OFFSET = r'\d:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|UTC|GMT|[+-]\d{2}(?::?\d{2})?)$'
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def parse_dates(values):
+    """
+    Parses date strings to naive local datetimes, the way the app logs them. Dates
+    with a UTC offset are converted to local time; unparseable ones become NaT.
+    """
+    values = values.str.strip()
+    offset = values.str.contains(UTC_OFFSET, case=False, na=False)
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    if (~offset).any():
+        dates[~offset] = pd.to_datetime(values[~offset], errors='coerce', format='mixed')
+    if offset.any():
+        aware = pd.to_datetime(values[offset], errors='coerce', format='mixed', utc=True)
+        dates[offset] = aware.dt.tz_convert(tzlocal()).dt.tz_localize(None)
+    return dates
+
+
+def coerce_chunk(chunk):
+    """
+    Splits a raw chunk (meals.csv headers or app column names, all strings) into
+    (valid rows with typed columns, rejected raw rows with a 'reason' column).
+    """
+    frame = chunk.rename(columns=CSV_COLUMNS)
+    checks = {}
+
+    date = parse_dates(frame['date'])
+    checks['bad date'] = date.isna()
+
+    user_id = frame['user_id'].str.strip()
+    checks['missing user'] = user_id.isna() | (user_id == '')
+
+    food = frame['food'].str.strip()
+    checks['missing food'] = food.isna() | (food == '')
+
+    meal_type = frame['meal_type'].str.strip().str.lower().map(MEAL_TYPES)
+    checks['unknown meal type'] = meal_type.isna()
+
+    nutrients = {}
+    for nutrient in NUTRIENTS:
+        if nutrient in frame:
+            nutrients[nutrient] = pd.to_numeric(frame[nutrient], errors='coerce')
+        else:
+            nutrients[nutrient] = pd.Series(0.0, index=frame.index)
+    checks['bad calories'] = nutrients['calories'].isna()
+    checks['negative nutrient'] = pd.concat([values < 0 for values in nutrients.values()], axis=1).any(axis=1)
+
+    # The first failing check names the reason
+    reason = pd.Series(None, index=frame.index, dtype=object)
+    for name, failed in reversed(list(checks.items())):
+        reason[failed] = name
+    valid = reason.isna()
+
+    category = frame['category'].str.strip() if 'category' in frame else pd.Series(None, index=frame.index)
+    rows = pd.DataFrame({
+        'date': date,
+        'user_id': user_id,
+        'food': food,
+        'category': category.fillna('Other'),
+        'meal_type': meal_type
+    })[valid]
+    rows['calories'] = nutrients['calories'][valid].round().astype('int64')
+    for nutrient in NUTRIENTS[1:]:
+        rows[nutrient] = nutrients[nutrient][valid].fillna(0.0).round(1)
+
+    rejected = chunk[~valid].assign(reason=reason[~valid])
+    return rows, rejected
+
+
+def food_log_records(rows):
+    """(user_id, logged_at, entry) records for UserStore.import_food_log; entries match the sidebar's plus extras."""
+    columns = [rows[column].tolist() for column in ['user_id', 'date', 'food', 'category', 'meal_type'] + NUTRIENTS]
+    for user_id, logged_at, food, category, meal_type, *values in zip(*columns):
+        entry = {'name': food, **dict(zip(NUTRIENTS, values)), 'category': category, 'meal_type': meal_type}
+        yield user_id, logged_at, entry
+
+
+def ingest(path, store, chunk_rows=DEFAULT_CHUNK_ROWS, rejects_path=None, progress=None):
+    """
+    Streams `path` into `store`, one transaction per chunk. Calls progress(stats)
+    after each chunk; returns the final stats.
+    """
+    stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'reasons': Counter(), 'seconds': 0.0}
+    start = time.perf_counter()
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows):
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.rename(columns=CSV_COLUMNS)]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+        rows, rejected = coerce_chunk(chunk)
+        store.import_food_log(food_log_records(rows))
+        if rejects_path and len(rejected):
+            rejected.to_csv(rejects_path, mode='a', index=False, header=not os.path.exists(rejects_path))
+
+        stats['rows'] += len(chunk)
+        stats['imported'] += len(rows)
+        stats['rejected'] += len(rejected)
+        stats['reasons'].update(rejected['reason'])
+        stats['seconds'] = time.perf_counter() - start
+        if progress:
+            progress(stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', help='meals.csv-shaped file to import')
+    parser.add_argument('--db', default='user_data.db')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='rows per chunk and transaction')
+    parser.add_argument('--rejects', help='append rejected rows, with a reason column, to this CSV')
+    args = parser.parse_args()
+
+    def report(stats):
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        print(f"\r{stats['rows']:,} rows, {stats['imported']:,} imported, {stats['rejected']:,} rejected, "
+              f"{rate:,.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+    try:
+        stats = ingest(args.csv, UserStore(args.db), args.chunk_rows, args.rejects, report)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(file=sys.stderr)
+
+    rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    print(f"Imported {stats['imported']:,} of {stats['rows']:,} rows in {stats['seconds']:.1f}s ({rate:,.0f} rows/s)")
+    for reason, count in stats['reasons'].most_common():
+        print(f"  rejected, {reason}: {count:,}")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:.0f} MB RSS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""
+Columnar copy of the intake history: meals.csv and exported food log entries stored
+as Parquet files partitioned by month (intake/month=YYYY-MM/*.parquet).
+
+Each file is sorted by user and date and written in small row groups, and reads go
+through a memory-mapped pyarrow dataset. A query for one user's recent days skips
+other months by partition, skips row groups by their Date/User_ID statistics and
+decodes only the columns it asks for.
+
+pyarrow is optional: without it, or before the first `convert`, the app reads meals.csv.
+
+    python intake_dataset.py convert            # meals.csv -> intake/
+    python intake_dataset.py export-food-log    # new user_data.db food log rows -> intake/
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from food_db import MEALS_CSV, NUTRIENTS, read_meals_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:
+    pa = None
+
+INTAKE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intake')
+
+# Rows per Parquet row group; the unit a filtered read skips or decodes
+ROW_GROUP_ROWS = 4096
+
+# Where a row came from: the reference meals.csv or a user's food log
+SOURCE_CSV = 'csv'
+SOURCE_FOOD_LOG = 'food_log'
+
+# Id of the last user_data.db food log row written to the dataset
+WATERMARK_FILE = '_food_log_watermark.json'
+
+COLUMNS = ['date', 'user_id', 'food', 'category', 'meal_type'] + NUTRIENTS + ['water_ml', 'source']
+
+
+def _schema():
+    return pa.schema(
+        [('date', pa.timestamp('ms')), ('user_id', pa.string()), ('food', pa.string()),
+         ('category', pa.string()), ('meal_type', pa.string())]
+        + [(nutrient, pa.float32()) for nutrient in NUTRIENTS]
+        + [('water_ml', pa.int32()), ('source', pa.string()), ('month', pa.string())]
+    )
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The columnar intake dataset needs pyarrow (pip install pyarrow)")
+
+
+def available(path=INTAKE_DIR):
+    """True when pyarrow is installed and `path` holds a converted dataset."""
+    return pa is not None and os.path.isdir(path) and any(
+        name.startswith('month=') for name in os.listdir(path)
+    )
+
+
+def _dataset(path):
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(path, format='parquet', partitioning=_partitioning(), filesystem=filesystem)
+
+
+def write_rows(rows, path=INTAKE_DIR, source=SOURCE_CSV):
+    """
+    Appends meals.csv-shaped rows (app column names) as new files in their month
+    partitions. Existing files are never rewritten.
+    """
+    _require_pyarrow()
+    if len(rows) == 0:
+        return 0
+    frame = pd.DataFrame({'date': pd.to_datetime(rows['date']).dt.as_unit('ms')})
+    frame['user_id'] = rows['user_id'].astype(str).to_numpy()
+    for column in ('food', 'category', 'meal_type'):
+        frame[column] = rows[column].astype(str).to_numpy()
+    for nutrient in NUTRIENTS:
+        frame[nutrient] = rows[nutrient].to_numpy(dtype='float32') if nutrient in rows else 0.0
+    frame['water_ml'] = rows['water_ml'].to_numpy(dtype='int32') if 'water_ml' in rows else 0
+    frame['source'] = source
+    frame['month'] = frame['date'].dt.strftime('%Y-%m')
+    frame = frame.sort_values(['month', 'user_id', 'date'], kind='stable')
+
+    table = pa.Table.from_pandas(frame, schema=_schema(), preserve_index=False)
+    ds.write_dataset(
+        table, path, format='parquet', partitioning=_partitioning(),
+        basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, len(frame)),
+        preserve_order=True
+    )
+    return len(frame)
+
+
+def convert_csv(csv_path=MEALS_CSV, path=INTAKE_DIR):
+    """
+    Replaces the meals.csv part of the dataset with a fresh conversion of `csv_path`.
+    The new dataset is built in a sibling directory and swapped in once complete, so
+    a failed conversion leaves the old one untouched.
+    """
+    _require_pyarrow()
+    if os.path.isdir(path):
+        # Keep exported food log rows; only the CSV rows are rebuilt
+        food_log = read_intake(path, source=SOURCE_FOOD_LOG) if available(path) else None
+        watermark = exported_food_log_id(path)
+    else:
+        food_log, watermark = None, 0
+
+    path = os.path.abspath(path)
+    suffix = f"{os.getpid()}-{time.time_ns()}"
+    building = f"{path}.converting-{suffix}"
+    try:
+        count = write_rows(read_meals_csv(csv_path), building, SOURCE_CSV)
+        if food_log is not None and len(food_log):
+            write_rows(food_log, building, SOURCE_FOOD_LOG)
+        _write_watermark(building, watermark)
+        _swap_in(building, path, f"{path}.old-{suffix}")
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+    return count
+
+
+def _swap_in(new, path, old):
+    """Renames directory `new` to `path`, deleting what was there only once `new` is in place."""
+    if not os.path.isdir(path):
+        os.replace(new, path)
+        return
+    # os.replace can't replace a non-empty directory; readers briefly see no dataset
+    # between the renames and fall back to meals.csv
+    os.replace(path, old)
+    try:
+        os.replace(new, path)
+    except OSError:
+        os.replace(old, path)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def exported_food_log_id(path=INTAKE_DIR):
+    """Id of the last food log row already in the dataset (0 if none)."""
+    try:
+        with open(os.path.join(path, WATERMARK_FILE)) as f:
+            return json.load(f)['last_id']
+    except (FileNotFoundError, ValueError, KeyError):
+        return 0
+
+
+def _write_watermark(path, last_id):
+    """Written beside the old watermark and renamed over it, so a crash never leaves it half written."""
+    os.makedirs(path, exist_ok=True)
+    watermark = os.path.join(path, WATERMARK_FILE)
+    writing = f"{watermark}.writing-{os.getpid()}-{time.time_ns()}"
+    try:
+        with open(writing, 'w') as f:
+            json.dump({'last_id': last_id}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(writing, watermark)
+    except BaseException:
+        if os.path.exists(writing):
+            os.remove(writing)
+        raise
+
+
+def export_food_log(store, path=INTAKE_DIR, database=None):
+    """
+    Appends food log rows added to `store` since the last export. The dataset keeps
+    them as history; clearing a user's log later does not remove exported rows.
+    """
+    from analytics import food_log_rows
+
+    after_id = exported_food_log_id(path)
+    until_id = store.last_food_log_id()
+    records = store.food_log_entries(after_id=after_id, until_id=until_id)
+    count = write_rows(food_log_rows(records, database), path, SOURCE_FOOD_LOG)
+    _write_watermark(path, until_id)
+    return count
+
+
+def intake_filter(user_id=None, start=None, end=None, source=None, by_month=True):
+    """
+    Dataset filter for a user, a [start, end] date range and a source; None if
+    unfiltered. `by_month` adds the matching conditions on the month partitions.
+    """
+    conditions = []
+    if user_id is not None:
+        conditions.append(ds.field('user_id') == str(user_id))
+    if start is not None:
+        start = pd.Timestamp(start)
+        if by_month:
+            conditions.append(ds.field('month') >= start.strftime('%Y-%m'))
+        conditions.append(ds.field('date') >= pa.scalar(start.to_pydatetime(), pa.timestamp('ms')))
+    if end is not None:
+        end = pd.Timestamp(end)
+        if by_month:
+            conditions.append(ds.field('month') <= end.strftime('%Y-%m'))
+        conditions.append(ds.field('date') <= pa.scalar(end.to_pydatetime(), pa.timestamp('ms')))
+    if source is not None:
+        conditions.append(ds.field('source') == source)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_intake(path=INTAKE_DIR, columns=None, user_id=None, start=None, end=None, source=None):
+    """
+    Rows of the dataset as a DataFrame with read_meals_csv's column names (user_id
+    is a string), reading only `columns` (all by default) of rows matching the filters.
+    """
+    _require_pyarrow()
+    columns = list(columns or COLUMNS)
+    table = _dataset(path).to_table(
+        columns=columns, filter=intake_filter(user_id, start, end, source)
+    )
+    frame = table.to_pandas()
+    for column in ('food', 'category', 'meal_type'):
+        if column in frame:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def scanned_bytes(path=INTAKE_DIR, columns=None, user_id=None, start=None, end=None, source=None):
+    """
+    Compressed bytes a filtered read decodes: the projected column chunks of the
+    row groups that survive partition and statistics pruning.
+    """
+    _require_pyarrow()
+    columns = set(columns or COLUMNS)
+    total = 0
+    fragments = _dataset(path).get_fragments(filter=intake_filter(user_id, start, end, source))
+    row_filter = intake_filter(user_id, start, end, source, by_month=False)
+    for fragment in fragments:
+        for row_group in fragment.split_by_row_group(row_filter):
+            metadata = row_group.metadata
+            for group in row_group.row_groups:
+                chunks = metadata.row_group(group.id)
+                total += sum(
+                    chunks.column(i).total_compressed_size for i in range(chunks.num_columns)
+                    if chunks.column(i).path_in_schema in columns
+                )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['convert', 'export-food-log'])
+    parser.add_argument('--csv', default=MEALS_CSV)
+    parser.add_argument('--db', default='user_data.db')
+    parser.add_argument('--out', default=INTAKE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'convert':
+        count = convert_csv(args.csv, args.out)
+    else:
+        from food_db import load_food_database
+        from user_store import UserStore
+        count = export_food_log(UserStore(args.db), args.out, load_food_database(args.csv))
+    print(f"Wrote {count} rows to {args.out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+Process-wide OpenAI client for the AI meal path: one pooled HTTP connection for every
+session, a token bucket that keeps requests under the account's RPM/TPM budgets,
+jittered exponential backoff on 429/5xx/connection errors and a circuit breaker
+that fails fast while the API is unhealthy so the app can fall back to local meals.
+
+LLMClient exposes `chat.completions.create(...)` like an OpenAI client, so the
+backends in meal_backends.py take either one; AsyncLLMClient does the same for
+AsyncOpenAI and the asyncio HTTP API (api.py).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Budgets of the default gpt-3.5-turbo tier; the buckets hold a few seconds' worth
+DEFAULT_RPM = 3500
+DEFAULT_TPM = 200000
+BURST_SECONDS = 2
+
+# Attempts per request and the exponential backoff between them (seconds)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Consecutive failed requests that open the breaker, and how long it stays open (seconds)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Prompt text is counted against the TPM budget at roughly 4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class RateLimitTimeout(TimeoutError):
+    """The request could not get under the RPM/TPM budget before its timeout."""
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` / 60 per second up to `capacity`. Reservations may
+    overdraw it; the caller then waits until the bucket is back at zero, so waiting
+    callers are served in the order they reserved.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate * BURST_SECONDS)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """Takes `amount` (at most the capacity); returns the seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= min(amount, self.capacity)
+            return max(0.0, -self._level / self.rate)
+
+    def refund(self, amount):
+        """Gives back part of a reservation, e.g. tokens a reply didn't use."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+
+class CircuitBreaker:
+    """
+    Closed: requests flow. After `threshold` consecutive failures it opens and
+    rejects requests for `cooldown` seconds, then lets one trial request through
+    (half-open); its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return 'open'
+            return 'half-open'
+
+    def allow(self):
+        """True if a request may go out now; in half-open, only the first caller gets through."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def release(self):
+        """Gives up a half-open trial that never reached the API, letting another caller try."""
+        with self._lock:
+            self._trial = False
+
+    def admits(self):
+        """True if allow() would let a request through now, without taking a half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return time.monotonic() - self._opened_at >= self.cooldown and not self._trial
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self._opened_at is None and self.failures >= self.threshold):
+                if self._opened_at is None:
+                    logger.warning("LLM circuit breaker opened after %d failures", self.failures)
+                    self.opened += 1
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+def is_retryable(error):
+    """429s, 5xx and dropped or timed-out connections are worth another attempt."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def stream_failed(error):
+    """
+    Whether an error raised while reading a stream counts against the API's health:
+    a dropped connection or an error event (no HTTP status) does, like a retryable error.
+    """
+    return getattr(error, 'status_code', None) is None or is_retryable(error)
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After header), or None."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(request):
+    """Prompt plus completion tokens a chat request can use, for the TPM bucket."""
+    prompt_chars = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+    return prompt_chars // CHARS_PER_TOKEN + request.get('max_tokens', 256)
+
+
+class LLMClient:
+    """
+    Wraps one OpenAI client (created with max_retries=0, retries happen here).
+    `timeout` on create() is the budget for the whole call: waiting for the rate
+    limiter, every attempt and the backoff between them.
+    """
+
+    def __init__(self, client, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_attempts=MAX_ATTEMPTS,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, breaker=None):
+        self.client = client
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'failures': 0, 'rejected': 0, 'throttled_s': 0.0}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def healthy(self):
+        """
+        False while the breaker would refuse a call: open, or half-open with its one
+        trial already in flight. Callers should use local meals instead.
+        """
+        return self.breaker.admits()
+
+    def _admit(self):
+        self._count(calls=1)
+        if not self.breaker.allow():
+            self._count(rejected=1)
+            metrics.count('llm_requests_total', outcome='circuit_open')
+            raise CircuitOpenError("AI meal service is unavailable, retrying later")
+
+    def _throttle(self, estimate, deadline):
+        """Seconds to wait for the RPM/TPM budget before the next attempt; raises if that ends past the deadline."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimate))
+        if time.monotonic() + wait > deadline:
+            self.requests.refund(1)
+            self.tokens.refund(estimate)
+            self._count(failures=1)
+            metrics.count('llm_requests_total', outcome='throttled')
+            self.breaker.release()
+            raise RateLimitTimeout(f"RPM/TPM budget needs {wait:.1f}s, past the request timeout")
+        self._count(attempts=1, throttled_s=wait)
+        return wait
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after(error) or 0.0)
+
+    def _retry_delay(self, attempt, error, deadline):
+        """Seconds to back off before retrying after `error`; re-raises it if the request is out of attempts or time."""
+        metrics.count('llm_attempt_errors_total', status=getattr(error, 'status_code', None) or type(error).__name__)
+        delay = self._backoff(attempt, error)
+        if not is_retryable(error) or attempt + 1 == self.max_attempts or time.monotonic() + delay >= deadline:
+            self._failed(is_retryable(error))
+            raise error
+        self._count(retries=1)
+        metrics.count('llm_retries_total')
+        return delay
+
+    def _failed(self, retryable):
+        self._count(failures=1)
+        metrics.count('llm_requests_total', outcome='failed')
+        # A rejected request (bad key, bad input) says nothing about the API's health:
+        # it neither counts as a failure nor closes the breaker, it only frees a trial
+        if retryable:
+            self.breaker.failure()
+        else:
+            self.breaker.release()
+
+    def _succeeded(self, response, estimate):
+        self.breaker.success()
+        metrics.count('llm_requests_total', outcome='ok')
+        usage = getattr(response, 'usage', None)
+        if usage is not None and usage.total_tokens < estimate:
+            self.tokens.refund(estimate - usage.total_tokens)
+        return response
+
+    def create(self, timeout=60.0, **request):
+        """chat.completions.create with rate limiting, retries and the breaker."""
+        self._admit()
+        deadline = time.monotonic() + timeout
+        estimate = estimate_tokens(request)
+        for attempt in range(self.max_attempts):
+            wait = self._throttle(estimate, deadline)
+            if wait:
+                time.sleep(wait)
+            try:
+                with metrics.timer('llm_attempt_seconds'):
+                    response = self.client.chat.completions.create(
+                        timeout=max(0.1, deadline - time.monotonic()), **request
+                    )
+            except Exception as e:
+                time.sleep(self._retry_delay(attempt, e, deadline))
+                continue
+            if request.get('stream'):
+                return self._stream(response, estimate)
+            return self._succeeded(response, estimate)
+
+    def _stream(self, stream, estimate):
+        """
+        Yields a streamed response's chunks, reporting to the breaker when the stream
+        ends rather than when it opens: a stream that drops midway is a failure, and
+        one the caller abandons frees the trial it may hold.
+        """
+        try:
+            yield from stream
+        except Exception as e:
+            self._failed(stream_failed(e))
+            raise
+        except GeneratorExit:
+            self.breaker.release()
+            raise
+        self._succeeded(None, estimate)
+
+    def stats(self):
+        """Calls, attempts, retries, failures, breaker rejections and time spent throttled so far."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['breaker'] = self.breaker.state
+        stats['breaker_opened'] = self.breaker.opened
+        return stats
+
+
+class AsyncLLMClient(LLMClient):
+    """
+    LLMClient for asyncio code, over an openai.AsyncOpenAI client: the same budgets,
+    retries and breaker, but create() is a coroutine that waits with asyncio.sleep,
+    so one event loop keeps any number of requests in flight.
+    """
+
+    async def create(self, timeout=60.0, **request):
+        """chat.completions.create with rate limiting, retries and the breaker."""
+        self._admit()
+        try:
+            return await self._attempts(timeout, request)
+        except asyncio.CancelledError:
+            # A call cancelled mid-flight (e.g. by asyncio.wait_for) never reports to the
+            # breaker; give up a half-open trial it holds so the next caller can try
+            self.breaker.release()
+            raise
+
+    async def _attempts(self, timeout, request):
+        deadline = time.monotonic() + timeout
+        estimate = estimate_tokens(request)
+        for attempt in range(self.max_attempts):
+            wait = self._throttle(estimate, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                with metrics.timer('llm_attempt_seconds'):
+                    response = await self.client.chat.completions.create(
+                        timeout=max(0.1, deadline - time.monotonic()), **request
+                    )
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(attempt, e, deadline))
+                continue
+            if request.get('stream'):
+                return self._stream(response, estimate)
+            return self._succeeded(response, estimate)
+
+    async def _stream(self, stream, estimate):
+        """LLMClient._stream for an async stream."""
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self._failed(stream_failed(e))
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            self.breaker.release()
+            raise
+        self._succeeded(None, estimate)
+
+
+def build_client(api_key, base_url=None, **limits):
+    """An LLMClient over a fresh OpenAI client; `limits` are LLMClient's rpm/tpm/retry settings."""
+    return LLMClient(openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0), **limits)
+
+
+def build_async_client(api_key, base_url=None, **limits):
+    """An AsyncLLMClient over a fresh AsyncOpenAI client, for use on one event loop."""
+    return AsyncLLMClient(openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0), **limits)
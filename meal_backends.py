@@ -0,0 +1,434 @@
+"""
+Meal idea backends and the generation modes that drive them, independent of Streamlit.
+
+A backend turns a meal slot ({'meal', 'calories', 'protein', 'carbs', 'fat'}) into a
+meal name. The modes (sequential, concurrent, batched) fan slots out to a backend,
+consult the MealCache and fill failed slots with the default meal, returning
+({meal_type: name}, {meal_type: exception}) so the caller decides how to report failures.
+stream_meals streams names token by token; generate_batched_async is the batched
+mode for asyncio code such as the HTTP API.
+"""
+import asyncio
+import inspect
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+from calculators import get_default_meal
+from catalog import MEAL_DISTRIBUTIONS
+from meal_composer import compose_meal, compose_meal_plan
+
+AI_MODEL = 'gpt-3.5-turbo'
+
+# Seconds to wait on each AI meal request before using the default meal
+DEFAULT_TIMEOUT = 20
+
+# Threads streaming meals, shared by every caller in the process. A stream past its
+# timeout is told to stop and holds its thread until its next token at the latest
+STREAM_WORKERS = 32
+_stream_pool = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix='meal-stream')
+
+
+def build_meal_prompt(meal_type, calories, protein, carbs, fat, goal_type, health_condition):
+    """Builds the nutritionist prompt for a single meal."""
+    return f"""
+    Act as an expert nutritionist and chef. Generate a single, specific meal idea for {meal_type}.
+    Nutritional Targets: {calories} calories, {protein}g protein, {carbs}g carbs, {fat}g fat.
+    User's Goal: {goal_type}.
+    Health Consideration: {health_condition}.
+    The response must be ONLY the name of the meal followed by a colon and a very short description.
+    Be creative and specific with ingredients and cooking methods.
+
+    Example: 'Mediterranean Chickpea Salad: Fresh chickpeas with cucumber, cherry tomatoes, feta cheese, kalamata olives, and a lemon-oregano vinaigrette.'
+    """
+
+
+def build_meal_plan_prompt(meals, goal_type, health_condition):
+    """Builds one prompt asking for every meal of the plan as a JSON object."""
+    meal_lines = "\n".join(
+        f"    - {meal['meal']}: {meal['calories']} calories, {meal['protein']}g protein, "
+        f"{meal['carbs']}g carbs, {meal['fat']}g fat."
+        for meal in meals
+    )
+    return f"""
+    Act as an expert nutritionist and chef. Generate a single, specific meal idea for each meal below.
+    User's Goal: {goal_type}.
+    Health Consideration: {health_condition}.
+{meal_lines}
+    The response must be ONLY a JSON object whose keys are the meal names above and whose values are
+    the name of the meal followed by a colon and a very short description.
+    Be creative and specific with ingredients and cooking methods.
+
+    Example: {{"Lunch": "Mediterranean Chickpea Salad: Fresh chickpeas with cucumber, cherry tomatoes, feta cheese, kalamata olives, and a lemon-oregano vinaigrette."}}
+    """
+
+
+def parse_meal_plan_response(content, meal_types):
+    """Returns {meal_type: meal text} for the slots of a JSON reply that are valid."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    replies = {str(key).strip().lower(): value for key, value in data.items()}
+    meal_names = {}
+    for meal_type in meal_types:
+        value = replies.get(meal_type.lower())
+        if isinstance(value, str) and value.strip():
+            meal_names[meal_type] = value.strip()
+    return meal_names
+
+
+class MealBackend:
+    """Base class: one meal per call. Backends that can answer a whole plan at once override generate_plan."""
+
+    name = 'base'
+
+    def generate_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        """Returns the meal name for one slot, or raises."""
+        raise NotImplementedError
+
+    def generate_plan(self, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        """Returns {meal_type: name} for whichever slots it could answer in one call."""
+        return {}
+
+    def stream_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        """Yields the meal name in pieces; backends without streaming yield it whole."""
+        yield self.generate_meal(meal, goal_type, health_condition, timeout)
+
+
+class OpenAIBackend(MealBackend):
+    """Chat completions through an OpenAI client, or any OpenAI-compatible server via its base_url."""
+
+    name = 'openai'
+
+    def __init__(self, client, model=AI_MODEL):
+        self.client = client
+        self.model = model
+
+    def _prompt(self, meal, goal_type, health_condition):
+        return build_meal_prompt(
+            meal['meal'], meal['calories'], meal['protein'], meal['carbs'], meal['fat'],
+            goal_type, health_condition
+        )
+
+    def _meal_request(self, meal, goal_type, health_condition, timeout, **options):
+        return dict(
+            model=self.model,
+            messages=[{"role": "user", "content": self._prompt(meal, goal_type, health_condition)}],
+            max_tokens=75,
+            temperature=0.8,
+            timeout=timeout,
+            **options
+        )
+
+    def _plan_request(self, meals, goal_type, health_condition, timeout):
+        return dict(
+            model=self.model,
+            messages=[{"role": "user", "content": build_meal_plan_prompt(meals, goal_type, health_condition)}],
+            max_tokens=75 * len(meals) + 25,
+            temperature=0.8,
+            response_format={"type": "json_object"},
+            timeout=timeout
+        )
+
+    def generate_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        response = self.client.chat.completions.create(**self._meal_request(meal, goal_type, health_condition, timeout))
+        return response.choices[0].message.content.strip()
+
+    def generate_plan(self, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        response = self.client.chat.completions.create(**self._plan_request(meals, goal_type, health_condition, timeout))
+        return parse_meal_plan_response(response.choices[0].message.content, [meal['meal'] for meal in meals])
+
+    def stream_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        stream = self.client.chat.completions.create(
+            **self._meal_request(meal, goal_type, health_condition, timeout, stream=True)
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class AsyncOpenAIBackend(OpenAIBackend):
+    """
+    OpenAIBackend over an async client (AsyncLLMClient or openai.AsyncOpenAI):
+    generate_meal and generate_plan are coroutines, for generate_batched_async,
+    and stream_meal is an async generator.
+    """
+
+    name = 'openai-async'
+
+    async def generate_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        response = await self.client.chat.completions.create(
+            **self._meal_request(meal, goal_type, health_condition, timeout)
+        )
+        return response.choices[0].message.content.strip()
+
+    async def generate_plan(self, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        response = await self.client.chat.completions.create(
+            **self._plan_request(meals, goal_type, health_condition, timeout)
+        )
+        return parse_meal_plan_response(response.choices[0].message.content, [meal['meal'] for meal in meals])
+
+    async def stream_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        stream = await self.client.chat.completions.create(
+            **self._meal_request(meal, goal_type, health_condition, timeout, stream=True)
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class ComposerBackend(MealBackend):
+    """Meals composed from meals.csv foods; no network and no failures to speak of."""
+
+    name = 'composer'
+
+    def generate_meal(self, meal, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        share = MEAL_DISTRIBUTIONS.get(meal['meal'], 1.0)
+        return compose_meal(meal['meal'], meal, health_condition, share)['name']
+
+    def generate_plan(self, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT):
+        composed = compose_meal_plan(meals, health_condition)
+        return {meal['meal']: meal_plan['name'] for meal, meal_plan in zip(meals, composed)}
+
+
+def get_cached_meals(cache, meals, goal_type, health_condition):
+    """Returns ({meal_type: cached name}, {meal_type: cache key}); both empty without a cache."""
+    meal_names = {}
+    cache_keys = {}
+    if cache is None:
+        return meal_names, cache_keys
+    for meal in meals:
+        cache_keys[meal['meal']] = cache.make_key(
+            meal['meal'], meal['calories'], meal['protein'], meal['carbs'], meal['fat'],
+            goal_type, health_condition
+        )
+        cached_meal = cache.get(cache_keys[meal['meal']])
+        metrics.count('ai_meal_cache_requests_total', result='hit' if cached_meal else 'miss')
+        if cached_meal:
+            meal_names[meal['meal']] = cached_meal
+    return meal_names, cache_keys
+
+
+def _store(cache, cache_keys, meal_names):
+    if cache is None:
+        return
+    for meal_type, meal_name in meal_names.items():
+        cache.put(cache_keys[meal_type], meal_name)
+
+
+def _fill_defaults(meal_names, failures):
+    for meal_type in failures:
+        meal_names[meal_type] = get_default_meal(meal_type)
+    return meal_names, failures
+
+
+def compose_failed(meals, meal_names, failures, health_condition, errors):
+    """
+    Gives slots that failed with one of `errors` (e.g. a circuit breaker refusing the
+    call) a composed meal instead of the default one, in place. Returns the failures left.
+    """
+    composer = ComposerBackend()
+    for meal in meals:
+        if isinstance(failures.get(meal['meal']), errors):
+            meal_names[meal['meal']] = composer.generate_meal(meal, None, health_condition)
+            del failures[meal['meal']]
+    return failures
+
+
+def _request_concurrently(backend, meals, goal_type, health_condition, timeout):
+    """One backend call per meal, all at once, waiting at most `timeout` seconds overall."""
+    executor = ThreadPoolExecutor(max_workers=len(meals))
+    futures = {
+        meal['meal']: executor.submit(backend.generate_meal, meal, goal_type, health_condition, timeout)
+        for meal in meals
+    }
+    done, _ = wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    meal_names = {}
+    failures = {}
+    for meal_type, future in futures.items():
+        if future not in done:
+            failures[meal_type] = TimeoutError(f"no reply within {timeout}s")
+        elif future.exception() is not None:
+            failures[meal_type] = future.exception()
+        else:
+            meal_names[meal_type] = future.result()
+    return meal_names, failures
+
+
+def generate_sequential(backend, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT, cache=None):
+    """One backend call per uncached meal, one after another."""
+    meal_names, cache_keys = get_cached_meals(cache, meals, goal_type, health_condition)
+    failures = {}
+    for meal in meals:
+        if meal['meal'] in meal_names:
+            continue
+        try:
+            meal_names[meal['meal']] = backend.generate_meal(meal, goal_type, health_condition, timeout)
+            _store(cache, cache_keys, {meal['meal']: meal_names[meal['meal']]})
+        except Exception as e:
+            failures[meal['meal']] = e
+    return _fill_defaults(meal_names, failures)
+
+
+def generate_concurrent(backend, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT, cache=None):
+    """One backend call per uncached meal, all sent at once."""
+    meal_names, cache_keys = get_cached_meals(cache, meals, goal_type, health_condition)
+    pending = [meal for meal in meals if meal['meal'] not in meal_names]
+    failures = {}
+    if pending:
+        generated, failures = _request_concurrently(backend, pending, goal_type, health_condition, timeout)
+        _store(cache, cache_keys, generated)
+        meal_names.update(generated)
+    return _fill_defaults(meal_names, failures)
+
+
+def generate_batched(backend, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    Asks for every uncached meal in one backend call. Slots missing from the reply
+    are retried with concurrent per-meal calls; if the batch call fails they all fail.
+    """
+    meal_names, cache_keys = get_cached_meals(cache, meals, goal_type, health_condition)
+    pending = [meal for meal in meals if meal['meal'] not in meal_names]
+    if not pending:
+        return meal_names, {}
+
+    try:
+        generated = backend.generate_plan(pending, goal_type, health_condition, timeout)
+    except Exception as e:
+        return _fill_defaults(meal_names, {meal['meal']: e for meal in pending})
+
+    _store(cache, cache_keys, generated)
+    meal_names.update(generated)
+
+    failures = {}
+    unparsed = [meal for meal in pending if meal['meal'] not in generated]
+    if unparsed:
+        retried, failures = _request_concurrently(backend, unparsed, goal_type, health_condition, timeout)
+        _store(cache, cache_keys, retried)
+        meal_names.update(retried)
+    return _fill_defaults(meal_names, failures)
+
+
+def _stream_into_queue(backend, meal, goal_type, health_condition, timeout, events, stop):
+    """Worker: forwards tokens to `events` as (meal_type, token), then None or the error; quits once `stop` is set."""
+    stream = backend.stream_meal(meal, goal_type, health_condition, timeout)
+    try:
+        for token in stream:
+            if stop.is_set():
+                return
+            events.put((meal['meal'], token))
+        events.put((meal['meal'], None))
+    except Exception as e:
+        events.put((meal['meal'], e))
+    finally:
+        # Closing the stream gives its connection (and any breaker trial) back
+        stream.close()
+
+
+def stream_meals(backend, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT, cache=None, on_text=None):
+    """
+    Streams every uncached meal at once on the shared stream pool, calling
+    on_text(meal_type, text so far) from the calling thread as tokens arrive. A stream
+    that errors, drops or runs past `timeout` fails; at the timeout the streams still
+    running are stopped and those still queued for a thread are cancelled.
+    """
+    meal_names, cache_keys = get_cached_meals(cache, meals, goal_type, health_condition)
+    pending = [meal for meal in meals if meal['meal'] not in meal_names]
+    events = queue.Queue()
+    stop = threading.Event()
+    futures = [
+        _stream_pool.submit(_stream_into_queue, backend, meal, goal_type, health_condition, timeout, events, stop)
+        for meal in pending
+    ]
+
+    texts = {meal['meal']: '' for meal in pending}
+    finished = set()
+    failures = {}
+    deadline = time.monotonic() + timeout
+    while len(finished) + len(failures) < len(pending):
+        try:
+            meal_type, item = events.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if item is None:
+            finished.add(meal_type)
+        elif isinstance(item, Exception):
+            failures[meal_type] = item
+        else:
+            texts[meal_type] += item
+            if on_text is not None:
+                on_text(meal_type, texts[meal_type])
+    stop.set()
+    for future in futures:
+        future.cancel()
+
+    generated = {}
+    for meal_type, text in texts.items():
+        if meal_type in finished and text.strip():
+            generated[meal_type] = text.strip()
+        elif meal_type not in failures:
+            failures[meal_type] = TimeoutError(f"no complete reply within {timeout}s")
+    _store(cache, cache_keys, generated)
+    meal_names.update(generated)
+    return _fill_defaults(meal_names, failures)
+
+
+GENERATION_MODES = {
+    'sequential': generate_sequential,
+    'concurrent': generate_concurrent,
+    'batched': generate_batched
+}
+
+
+async def generate_batched_async(backend, meals, goal_type, health_condition, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    generate_batched for asyncio callers. The backend's calls are awaited if they are
+    coroutines (AsyncOpenAIBackend) and run inline otherwise (the composer), so no
+    thread waits on the network. Cache reads and writes (SQLite) run in a worker thread.
+    """
+    async def call(method, *args):
+        result = method(*args, goal_type, health_condition, timeout)
+        return await asyncio.wait_for(result, timeout) if inspect.isawaitable(result) else result
+
+    async def store(meal_names):
+        if cache is not None and meal_names:
+            await asyncio.to_thread(_store, cache, cache_keys, meal_names)
+
+    if cache is None:
+        meal_names, cache_keys = {}, {}
+    else:
+        meal_names, cache_keys = await asyncio.to_thread(get_cached_meals, cache, meals, goal_type, health_condition)
+    pending = [meal for meal in meals if meal['meal'] not in meal_names]
+    if not pending:
+        return meal_names, {}
+
+    try:
+        generated = await call(backend.generate_plan, pending)
+    except Exception as e:
+        return _fill_defaults(meal_names, {meal['meal']: e for meal in pending})
+
+    await store(generated)
+    meal_names.update(generated)
+
+    failures = {}
+    unparsed = [meal for meal in pending if meal['meal'] not in generated]
+    if unparsed:
+        results = await asyncio.gather(*(call(backend.generate_meal, meal) for meal in unparsed), return_exceptions=True)
+        retried = {}
+        for meal, result in zip(unparsed, results):
+            if isinstance(result, Exception):
+                failures[meal['meal']] = result
+            else:
+                retried[meal['meal']] = result
+        await store(retried)
+        meal_names.update(retried)
+    return _fill_defaults(meal_names, failures)
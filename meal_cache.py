@@ -0,0 +1,102 @@
+"""On-disk cache for AI meal ideas, keyed by a hash of the prompt parameters."""
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+
+# Chance that a lookup for a key with fewer than `variants` responses misses anyway, so
+# the caller generates another response and the key fills up over repeated plans
+REFRESH_PROBABILITY = 0.2
+
+
+class MealCache:
+    """
+    SQLite-backed cache of AI meal responses shared by every session of the app.
+    Hits from the first stored response; while a key has fewer than `variants`,
+    a `refresh` share of its lookups miss so repeated plans still gain some variety.
+    Expires rows after `ttl` seconds and evicts the least recently used rows once
+    there are more than `max_entries`.
+    """
+
+    def __init__(self, path='meal_cache.db', ttl=7 * 24 * 3600, max_entries=5000, variants=3,
+                 refresh=REFRESH_PROBABILITY):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.variants = max(1, variants)
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meals (
+                    key TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS meals_key ON meals (key)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS meals_last_used ON meals (last_used)')
+
+    @staticmethod
+    def make_key(meal_type, calories, protein, carbs, fat, goal_type, health_condition):
+        """Hashes the normalized prompt parameters into a cache key."""
+        params = [
+            meal_type.lower(), round(calories), round(protein), round(carbs), round(fat),
+            goal_type, health_condition
+        ]
+        return hashlib.sha256(json.dumps(params).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns one cached response for `key`, or None if it has none; while it has
+        fewer than `variants`, None with probability `refresh`.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT rowid, response FROM meals WHERE key = ? AND created_at > ?',
+                (key, now - self.ttl)
+            ).fetchall()
+            if not rows or (len(rows) < self.variants and random.random() < self.refresh):
+                self.misses += 1
+                return None
+
+            rowid, response = random.choice(rows)
+            with self._conn:
+                self._conn.execute('UPDATE meals SET last_used = ? WHERE rowid = ?', (now, rowid))
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        """Stores a new response for `key`, dropping expired and least recently used rows."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM meals WHERE created_at <= ?', (now - self.ttl,))
+            self._conn.execute(
+                'INSERT INTO meals (key, response, created_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, response, now, now)
+            )
+            self._conn.execute(
+                'DELETE FROM meals WHERE rowid IN '
+                '(SELECT rowid FROM meals ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        """Returns hit/miss counters for this process and the number of cached rows."""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM meals').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
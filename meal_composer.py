@@ -0,0 +1,129 @@
+"""Composes meals from meals.csv foods whose summed macros best match each slot's targets."""
+import itertools
+from functools import lru_cache
+
+import numpy as np
+
+from food_db import NUTRIENTS, load_food_database
+
+MACROS = ['calories', 'protein', 'carbs', 'fat']
+
+# Macro misses are scored in kcal (4/4/9 per gram) relative to the slot's calories,
+# with the calorie miss itself weighted up so meals land near their energy target first
+KCAL_PER_UNIT = np.array([1.0, 4.0, 4.0, 9.0])
+MACRO_WEIGHTS = np.array([3.0, 1.0, 1.0, 1.0])
+
+PORTIONS = (0.5, 1.0, 1.5)
+MAX_FOODS_PER_MEAL = 3
+
+# Only the foods most often logged for a meal type are combined for it
+MAX_CANDIDATES = 20
+
+# Daily limits per health condition (FDA Daily Values), shared across meals in proportion to calories
+HEALTH_LIMITS = {
+    'Hypertension': {'sodium': 2300},
+    'Diabetes': {'sugars': 50},
+    'Heart Condition': {'cholesterol': 300}
+}
+
+# Score added per unit of relative excess over a limit. meals.csv foods carry about three
+# times the sugars and cholesterol limits per calorie, so a hard limit would starve the
+# plan; this weight trades a few percent of calories for staying under a limit instead
+LIMIT_WEIGHT = 0.15
+
+
+class MealCombinations:
+    """Every combination of 1..MAX_FOODS_PER_MEAL candidate foods and portions for one meal type."""
+
+    def __init__(self, database, meal_type):
+        self.database = database
+        candidates = database.by_meal_type.get(meal_type)
+        if candidates is None or not len(candidates):
+            candidates = np.arange(len(database.foods))
+        candidates = candidates[:MAX_CANDIDATES]
+
+        food_blocks, portion_blocks, nutrient_blocks = [], [], []
+        for size in range(1, MAX_FOODS_PER_MEAL + 1):
+            combos = np.array(list(itertools.combinations(candidates, size)))
+            if not len(combos):
+                continue
+            portions = np.array(list(itertools.product(PORTIONS, repeat=size)))
+            # (combos, size, nutrients) x (portions, size) -> (combos, portions, nutrients)
+            nutrients = np.einsum('csn,ps->cpn', database.matrix[combos], portions)
+            count = len(combos) * len(portions)
+
+            foods = np.full((count, MAX_FOODS_PER_MEAL), -1)
+            foods[:, :size] = np.repeat(combos, len(portions), axis=0)
+            amounts = np.zeros((count, MAX_FOODS_PER_MEAL))
+            amounts[:, :size] = np.tile(portions, (len(combos), 1))
+
+            food_blocks.append(foods)
+            portion_blocks.append(amounts)
+            nutrient_blocks.append(nutrients.reshape(count, len(NUTRIENTS)))
+
+        self.foods = np.concatenate(food_blocks)
+        self.portions = np.concatenate(portion_blocks)
+        self.nutrients = np.concatenate(nutrient_blocks)
+        self.macros = self.nutrients[:, [NUTRIENTS.index(macro) for macro in MACROS]]
+
+    def best(self, targets, limits=None):
+        """
+        Row of the combination closest to `targets` ({macro: value}), penalizing
+        any excess over `limits` ({nutrient: value}) by LIMIT_WEIGHT.
+        """
+        target = np.array([float(targets[macro]) for macro in MACROS])
+        scale = max(target[0], 1.0)
+        scores = (((self.macros - target) * KCAL_PER_UNIT / scale) ** 2) @ MACRO_WEIGHTS
+
+        if limits:
+            excess = np.zeros(len(scores))
+            for nutrient, limit in limits.items():
+                column = self.nutrients[:, NUTRIENTS.index(nutrient)]
+                excess += np.maximum(column - limit, 0) / limit
+            scores = scores + LIMIT_WEIGHT * excess
+
+        return int(np.argmin(scores))
+
+    def describe(self, row):
+        """Meal dict (name plus summed macros) for a combination row."""
+        parts = []
+        for food, portion in zip(self.foods[row], self.portions[row]):
+            if food < 0:
+                continue
+            name = self.database.foods[food]
+            if portion != 1.0:
+                name = f"{name} ({portion:g} serving{'s' if portion > 1 else ''})"
+            parts.append(name)
+
+        meal = {'name': ', '.join(parts)}
+        for macro, value in zip(MACROS, self.macros[row]):
+            meal[macro] = round(float(value))
+        return meal
+
+
+@lru_cache(maxsize=None)
+def get_meal_combinations(meal_type):
+    """Combination table for a meal type, built once per process."""
+    return MealCombinations(load_food_database(), meal_type)
+
+
+def compose_meal(meal_type, targets, health_condition='Healthy', share=1.0):
+    """
+    Picks the foods for one meal slot. `targets` holds calories/protein/carbs/fat and
+    `share` is the slot's fraction of the day, used to split daily health limits.
+    """
+    limits = {
+        nutrient: daily_limit * share
+        for nutrient, daily_limit in HEALTH_LIMITS.get(health_condition, {}).items()
+    }
+    combinations = get_meal_combinations(meal_type)
+    return combinations.describe(combinations.best(targets, limits))
+
+
+def compose_meal_plan(meals, health_condition='Healthy'):
+    """Returns a composed meal dict for each slot dict ({'meal', 'calories', 'protein', ...})."""
+    total_calories = sum(meal['calories'] for meal in meals) or 1
+    return [
+        compose_meal(meal['meal'], meal, health_condition, meal['calories'] / total_calories)
+        for meal in meals
+    ]
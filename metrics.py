@@ -0,0 +1,223 @@
+"""
+In-process timings and counters for the app's hot paths, aggregated into
+Prometheus-style histograms and exported as Prometheus text (a file the node
+exporter's textfile collector can pick up) or shown in the app's admin panel.
+
+Off unless METRICS_ENABLED is set: `timed` then returns the function itself and
+`timer` a shared no-op context manager, so instrumented code pays one attribute
+lookup and nothing else.
+
+    @metrics.timed('ai_meals_seconds', mode='batched')
+    def generate_ai_meals(...): ...
+
+    with metrics.timer('plan_seconds'):
+        ...
+    metrics.count('ai_meal_fallbacks_total', reason='TimeoutError')
+"""
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '').lower() not in ('', '0', 'false', 'no')
+
+# Upper bounds (seconds) of the latency buckets, Prometheus' defaults plus a 30 s bucket for AI calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_TIMER = nullcontext()
+
+
+def _key(name, labels):
+    # Label values are strings on the wire; converting them here also keeps series with
+    # e.g. status=429 and status='APIConnectionError' sortable against each other
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    """A label value escaped for the text exposition format (backslash, double quote, newline)."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+class Histogram:
+    """Counts of observations per bucket (not cumulative until exported), their sum and count."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated inside its bucket like histogram_quantile()."""
+        if not self.count:
+            return float('nan')
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class _Timer:
+    __slots__ = ('registry', 'key', 'start')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.registry._observe(self.key, time.perf_counter() - self.start)
+
+
+class Registry:
+    """Named, labelled histograms and counters; safe to update from any thread."""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        """Adds one observation (seconds, for the latency buckets) to histogram `name`."""
+        if self.enabled:
+            self._observe(_key(name, labels), value)
+
+    def _observe(self, key, value):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name, amount=1, **labels):
+        """Adds `amount` to counter `name`."""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def timer(self, name, **labels):
+        """Context manager timing its block into histogram `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, _key(name, labels))
+
+    def timed(self, name, **labels):
+        """Decorator timing every call into histogram `name`; the function unchanged when disabled."""
+        def decorate(func):
+            if not self.enabled:
+                return func
+            key = _key(name, labels)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._observe(key, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        """
+        One dict per series: histograms with count, mean and p50/p95/p99 in milliseconds,
+        counters with their value. Sorted by name.
+        """
+        with self._lock:
+            histograms = [(key, h.count, h.sum, [h.quantile(q) for q in (0.5, 0.95, 0.99)])
+                          for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        rows = []
+        for (name, labels), count, total, quantiles in histograms:
+            rows.append({
+                'metric': name + _format_labels(labels), 'count': count, 'mean_ms': total / count * 1000,
+                'p50_ms': quantiles[0] * 1000, 'p95_ms': quantiles[1] * 1000, 'p99_ms': quantiles[2] * 1000
+            })
+        for (name, labels), value in counters:
+            rows.append({'metric': name + _format_labels(labels), 'count': value})
+        return sorted(rows, key=lambda row: row['metric'])
+
+    def prometheus_text(self):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(
+                (key, list(h.buckets), list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), buckets, counts, total, count in histograms:
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Writes prometheus_text() to `path` atomically, so a scraper never reads half a file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+            f.write(self.prometheus_text())
+        os.replace(f.name, path)
+
+    def start_file_exporter(self, path, interval=15.0):
+        """Rewrites `path` every `interval` seconds on a daemon thread; returns the thread."""
+        def run():
+            while True:
+                try:
+                    self.write_prometheus(path)
+                except Exception:
+                    logger.exception("Could not write metrics to %s", path)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name='metrics-exporter', daemon=True)
+        thread.start()
+        return thread
+
+
+# The process-wide registry the app and its modules record into
+REGISTRY = Registry()
+observe = REGISTRY.observe
+count = REGISTRY.count
+timer = REGISTRY.timer
+timed = REGISTRY.timed
@@ -0,0 +1,161 @@
+"""
+Write-behind persistence for session state.
+The Streamlit script only marks what changed; a background thread coalesces the
+changes and writes them to the UserStore after a short debounce.
+"""
+import atexit
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PendingWrite:
+    """Changes for one user that have not reached the store yet."""
+
+    def __init__(self):
+        self.fields = {}
+        self.foods = []
+        # Food log entries logged at or after this are deleted before `foods` are added
+        self.clear_since = None
+
+    def clear(self, since):
+        """Drops queued foods logged at or after `since` and widens the pending delete to cover it."""
+        self.foods = [(entry, logged_at) for entry, logged_at in self.foods if logged_at < since]
+        self.clear_since = since if self.clear_since is None else min(self.clear_since, since)
+
+    def merge(self, newer):
+        """Folds a later batch into this one, keeping the order the changes were made in."""
+        if newer.clear_since is not None:
+            self.clear(newer.clear_since)
+        self.foods.extend(newer.foods)
+        self.fields.update(newer.fields)
+
+    def size(self):
+        return len(self.fields) + len(self.foods) + int(self.clear_since is not None)
+
+
+class WriteBehindWriter:
+    """
+    Queues per-user changes and flushes them on a background thread `debounce`
+    seconds after the first change of a burst. Only changed fields are written.
+    """
+
+    def __init__(self, store, debounce=0.5):
+        self.store = store
+        self.debounce = debounce
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flushes = 0
+        self._errors = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _queue(self, user_id):
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = self._pending[user_id] = PendingWrite()
+        return pending
+
+    def mark(self, user_id, fields):
+        """Marks {key: value} profile fields dirty."""
+        with self._lock:
+            self._queue(user_id).fields.update(fields)
+        self._wakeup.set()
+
+    def append_food(self, user_id, entry, logged_at=None):
+        """Queues one food log entry."""
+        with self._lock:
+            self._queue(user_id).foods.append((entry, logged_at or datetime.now()))
+        self._wakeup.set()
+
+    def clear_food_log(self, user_id, since=None):
+        """
+        Queues deleting the user's food log, or only the entries logged at or after
+        `since`; matching entries queued earlier are dropped.
+        """
+        with self._lock:
+            self._queue(user_id).clear(since or datetime.min)
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Let a burst of changes (e.g. a dragged slider) settle into one write
+            time.sleep(self.debounce)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self, user_id=None):
+        """Writes pending changes now, for one user or everyone. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                if user_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    pending = self._pending.pop(user_id, None)
+                    batch = {user_id: pending} if pending else {}
+            if not batch:
+                return
+
+            start = time.perf_counter()
+            for batch_user, pending in batch.items():
+                try:
+                    self.store.write(
+                        batch_user, fields=pending.fields, foods=pending.foods,
+                        clear_since=pending.clear_since
+                    )
+                except Exception:
+                    logger.exception("Write-behind flush failed for user %s, will retry", batch_user)
+                    self._errors += 1
+                    metrics.count('user_store_write_errors_total')
+                    with self._lock:
+                        # Put the batch back in front of anything queued since
+                        newer = self._pending.pop(batch_user, None)
+                        if newer:
+                            pending.merge(newer)
+                        self._pending[batch_user] = pending
+                    self._wakeup.set()
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.observe('user_store_flush_seconds', elapsed_ms / 1000)
+            self._flushes += 1
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def stats(self):
+        """Queue depth (pending changes) and flush latency so far."""
+        with self._lock:
+            queue_depth = sum(pending.size() for pending in self._pending.values())
+            pending_users = len(self._pending)
+        return {
+            'queue_depth': queue_depth,
+            'pending_users': pending_users,
+            'flushes': self._flushes,
+            'errors': self._errors,
+            'last_flush_ms': self._last_flush_ms,
+            'avg_flush_ms': self._total_flush_ms / self._flushes if self._flushes else 0.0,
+            'max_flush_ms': self._max_flush_ms
+        }
+
+
+class SessionFlush:
+    """
+    Kept in a session's state; when Streamlit drops the session and this object is
+    garbage collected, the user's pending changes are flushed.
+    """
+
+    def __init__(self, writer, user_id):
+        self._finalizer = weakref.finalize(self, writer.flush, user_id)
@@ -0,0 +1,133 @@
+"""
+The planner without Streamlit: profile validation, daily targets, meal slots, meals
+composed from meals.csv and the week's workouts. app.py and the HTTP API (api.py)
+both plan through here; only naming meals with AI differs between them.
+
+    profile = validate_profile(request_json)
+    plan = build_plan(profile)
+"""
+from datetime import datetime
+
+from calculators import (
+    calculate_bmr, calculate_calorie_target, calculate_macro_targets, calculate_tdee,
+    generate_exercises, generate_workout_plan, split_meal_targets
+)
+from catalog import ACTIVITY_MULTIPLIERS, MEAL_TEMPLATES
+from meal_composer import compose_meal_plan
+
+# Inclusive integer ranges of the profile form's inputs
+AGES = (5, 100)
+HEIGHTS = (140, 220)
+WEIGHTS = (40, 150)
+
+# Choices offered by the profile form
+GENDERS = ['Male', 'Female', 'Other']
+ACTIVITY_LEVELS = list(ACTIVITY_MULTIPLIERS)
+GOAL_TYPES = ['Weight Loss', 'Weight Maintenance', 'Weight Gain']
+HEALTH_CONDITIONS = ['Healthy', 'Diabetes', 'Hypertension', 'Heart Condition']
+FITNESS_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+
+# Profile field -> its choices (a list) or inclusive integer range (a tuple), and its default
+PROFILE_FIELDS = {
+    'age': (AGES, 25),
+    'gender': (GENDERS, 'Male'),
+    'height': (HEIGHTS, 175),
+    'current_weight': (WEIGHTS, 70),
+    'goal_weight': (WEIGHTS, 65),
+    'activity_level': (ACTIVITY_LEVELS, 'Moderate'),
+    'goal_type': (GOAL_TYPES, 'Weight Loss'),
+    'health_condition': (HEALTH_CONDITIONS, 'Healthy'),
+    'fitness_level': (FITNESS_LEVELS, 'Beginner')
+}
+
+
+class ProfileError(ValueError):
+    """A profile with missing or invalid fields; `errors` maps each field to what is wrong with it."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(f"{field}: {error}" for field, error in errors.items()))
+        self.errors = errors
+
+
+def validate_profile(data):
+    """
+    The PROFILE_FIELDS of `data`, defaults filled in for missing ones. Raises
+    ProfileError naming every field outside the form's choices or ranges.
+    """
+    if not isinstance(data, dict):
+        raise ProfileError({'profile': "expected a JSON object"})
+    profile = {}
+    errors = {}
+    for field, (allowed, default) in PROFILE_FIELDS.items():
+        value = data.get(field, default)
+        if isinstance(allowed, tuple):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+                errors[field] = "must be a whole number"
+            elif not allowed[0] <= value <= allowed[1]:
+                errors[field] = f"must be between {allowed[0]} and {allowed[1]}"
+            else:
+                value = int(value)
+        elif value not in allowed:
+            errors[field] = f"must be one of {', '.join(allowed)}"
+        profile[field] = value
+    if errors:
+        raise ProfileError(errors)
+    return profile
+
+
+def targets(profile):
+    """{'calorie_target', 'protein_target', 'carbs_target', 'fat_target'} for a validated profile."""
+    goal_type = profile['goal_type']
+    bmr = calculate_bmr(profile['current_weight'], profile['height'], profile['age'], profile['gender'])
+    tdee = calculate_tdee(bmr, profile['activity_level'])
+    calorie_target = calculate_calorie_target(profile['current_weight'], profile['goal_weight'], tdee, goal_type)
+    return {'calorie_target': calorie_target, **calculate_macro_targets(calorie_target, goal_type)}
+
+
+def meal_slots(daily_targets):
+    """One unnamed meal dict per slot, from targets() output."""
+    return split_meal_targets(daily_targets['calorie_target'], daily_targets)
+
+
+def compose_meals(meals, goal_type, health_condition):
+    """
+    Names `meals` in place with foods from meals.csv, or with the goal's meal
+    templates if composing fails. Returns the exception in that case, else None.
+    """
+    try:
+        for meal, composed in zip(meals, compose_meal_plan(meals, health_condition)):
+            meal.update(composed)
+        return None
+    except Exception as e:
+        template = MEAL_TEMPLATES.get(goal_type, MEAL_TEMPLATES['Weight Loss'])
+        for meal in meals:
+            meal['name'] = template[meal['meal']]
+        return e
+
+
+def workout_plan(goal_type, health_condition, fitness_level, day=None):
+    """(the week's workouts, exercises for `day`'s workout, today by default; [] without one)."""
+    workouts = generate_workout_plan(goal_type, health_condition, fitness_level)
+    day = day or datetime.now().strftime('%A')
+    today_workout = next((workout for workout in workouts if workout['day'] == day), None)
+    return workouts, generate_exercises(today_workout['type']) if today_workout else []
+
+
+def build_plan(profile, meal_names=None):
+    """
+    The whole plan for a validated profile: targets, 'meals', 'workouts' and today's
+    'exercises'. Meals are named from `meal_names` ({meal_type: name}, e.g. from an
+    AI backend) or composed from meals.csv without it.
+    """
+    plan = targets(profile)
+    meals = meal_slots(plan)
+    if meal_names is None:
+        compose_meals(meals, profile['goal_type'], profile['health_condition'])
+    else:
+        for meal in meals:
+            meal['name'] = meal_names[meal['meal']]
+    plan['meals'] = meals
+    plan['workouts'], plan['exercises'] = workout_plan(
+        profile['goal_type'], profile['health_condition'], profile['fitness_level']
+    )
+    return plan
@@ -0,0 +1,171 @@
+"""
+Food recommendations from users with similar diets, over meals.csv and the app's food log.
+
+Every user is indexed by two vectors: which foods they log (the square root of each
+food's share of their entries, so the dot product of two users is the overlap of
+their diets, 1 for identical ones) and how their calories split between protein,
+carbs and fat. A query pairs the user's own foods with the split of their plan's
+targets, so the nearest users eat like them and already hit the targets they are
+aiming for; the foods those users log, weighted by similarity, are the suggestions.
+
+Splits rather than calorie totals are compared because most users log only part of
+their day: meals.csv averages one entry per logged day, far below any daily target.
+
+The index is exact: a query is one matrix product over every user, about 3 ms per
+hundred thousand users on one core (see benchmarks/recommender.py), so it stays
+within a 10 ms budget up to a few hundred thousand users. Rows that arrive later
+only recompute the vectors of their own users.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Neighbours a recommendation is drawn from, and foods recommended
+NEIGHBORS = 50
+RECOMMENDATIONS = 6
+
+# Weight of the diet overlap against the macro split match; both range over 0..1
+FOOD_WEIGHT = 0.5
+
+# Split difference (in fractions of calories, summed over the macros in quadrature)
+# at which the split match falls to exp(-1/2)
+SPLIT_SCALE = 0.05
+
+MACROS = ['protein', 'carbs', 'fat']
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+# Users the index has room for at first; it doubles when full
+CAPACITY = 1024
+
+
+class FoodRecommender:
+    """
+    kNN index of users' diets over meals.csv-shaped rows. `foods` is the vocabulary
+    that can be recommended (the food database's foods); other foods count towards a
+    user's split only. `append` and `remove` update the index in place. Safe to
+    share between sessions.
+    """
+
+    def __init__(self, rows, foods):
+        self.foods = np.asarray(foods, dtype=str)
+        self._positions = {food.lower(): i for i, food in enumerate(self.foods)}
+        self.users = []
+        self._rows = {}
+        # Per user: entries of each vocabulary food, macro grams and entries of any food
+        self._counts = np.zeros((0, len(self.foods)))
+        self._grams = np.zeros((0, len(MACROS)))
+        self._entries = np.zeros(0)
+        # Per user: the diet vector then the split in SPLIT_SCALE units, and the split's squared
+        # norm (inf for users without entries), so one product scores both parts of a query
+        self._vectors = np.zeros((0, len(self.foods) + len(MACROS)), dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._lock = threading.Lock()
+        self.append(rows)
+
+    def _grow(self, users):
+        capacity = len(self._entries)
+        if users <= capacity:
+            return
+        capacity = max(users, 2 * capacity, CAPACITY)
+        for name in ('_counts', '_grams', '_entries', '_vectors', '_norms'):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+        self._norms[len(self.users):] = np.inf
+
+    def append(self, rows, sign=1):
+        """Adds meals.csv-shaped rows (user_id, food and the macros) to the index (sign=-1 subtracts them)."""
+        if len(rows) == 0:
+            return
+        users = rows['user_id'].astype(str).to_numpy()
+        foods = pd.Series(rows['food'].astype(str).to_numpy()).str.strip().str.lower()
+        foods = foods.map(self._positions).fillna(-1).to_numpy(dtype=np.int64)
+        grams = np.column_stack([
+            pd.to_numeric(rows[macro], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64) for macro in MACROS
+        ])
+        with self._lock:
+            for user in dict.fromkeys(users):
+                if user not in self._rows:
+                    self._rows[user] = len(self.users)
+                    self.users.append(user)
+            self._grow(len(self.users))
+            positions = np.array([self._rows[user] for user in users])
+            known = foods >= 0
+            np.add.at(self._counts, (positions[known], foods[known]), sign)
+            np.add.at(self._grams, positions, sign * grams)
+            np.add.at(self._entries, positions, sign)
+            self._refresh(np.unique(positions))
+
+    def remove(self, rows):
+        """Takes previously appended rows back out of the index."""
+        self.append(rows, sign=-1)
+
+    def _refresh(self, positions):
+        counts = np.maximum(self._counts[positions], 0)
+        totals = counts.sum(axis=1, keepdims=True)
+        splits = self._split(self._grams[positions])
+        self._vectors[positions] = np.hstack([np.sqrt(counts / np.maximum(totals, 1)), splits])
+        self._norms[positions] = np.where(self._entries[positions] > 0, np.square(splits).sum(axis=1), np.inf)
+
+    @staticmethod
+    def _split(grams):
+        """Shares of calories from each macro, in SPLIT_SCALE units."""
+        kcal = np.maximum(grams, 0) * KCAL_PER_GRAM
+        total = kcal.sum(axis=-1, keepdims=True)
+        return np.divide(kcal, total * SPLIT_SCALE, out=np.zeros_like(kcal), where=total > 0)
+
+    def _similarities(self, user_id, targets):
+        """(position of `user_id` or None, similarity of every indexed user to the query, 0 for users without entries)."""
+        position = self._rows.get(str(user_id))
+        foods = len(self.foods)
+        split = self._split(np.array([float(targets[f'{macro}_target']) for macro in MACROS]))
+        query = np.zeros((foods + len(MACROS), 2), dtype=np.float32)
+        if position is not None:
+            query[:foods, 0] = self._vectors[position, :foods]
+        query[foods:, 1] = split
+        count = len(self.users)
+        products = self._vectors[:count] @ query
+        # Squared split distance |s - q|^2 = |s|^2 - 2 s.q + |q|^2
+        distance = self._norms[:count] - 2 * products[:, 1] + np.square(split).sum()
+        scores = FOOD_WEIGHT * products[:, 0] + (1 - FOOD_WEIGHT) * np.exp(-0.5 * np.maximum(distance, 0))
+        if position is not None:
+            scores[position] = 0
+        return position, scores
+
+    def _nearest(self, scores, k):
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        nearest = np.argpartition(-scores, k - 1)[:k]
+        nearest = nearest[np.argsort(-scores[nearest], kind='stable')]
+        return nearest[scores[nearest] > 0]
+
+    def neighbors(self, user_id, targets, k=NEIGHBORS):
+        """
+        The `k` users most similar to `user_id` aiming for `targets` (targets()-style
+        'protein_target', 'carbs_target' and 'fat_target' grams): [(user_id, similarity)], nearest first.
+        """
+        with self._lock:
+            _, scores = self._similarities(user_id, targets)
+            nearest = self._nearest(scores, k)
+            return [(self.users[i], float(scores[i])) for i in nearest]
+
+    def recommend(self, user_id, targets, k=NEIGHBORS, limit=RECOMMENDATIONS):
+        """
+        Up to `limit` foods `user_id` hasn't logged, as [{'food', 'score', 'users'}] best
+        first: 'score' is the similarity-weighted share of the `k` nearest users'
+        entries (see neighbors) that are this food and 'users' how many of them log it.
+        """
+        with self._lock:
+            position, scores = self._similarities(user_id, targets)
+            nearest = self._nearest(scores, k)
+            weights = scores[nearest].astype(np.float64)
+            shares = np.square(self._vectors[nearest, :len(self.foods)], dtype=np.float64)
+            food_scores = weights @ shares / max(weights.sum(), 1e-12)
+            eaters = (shares > 0).sum(axis=0)
+            if position is not None:
+                food_scores[self._counts[position] > 0] = 0
+        ranked = [i for i in np.argsort(-food_scores, kind='stable')[:limit] if food_scores[i] > 0]
+        return [{'food': str(self.foods[i]), 'score': float(food_scores[i]), 'users': int(eaters[i])} for i in ranked]
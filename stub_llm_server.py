@@ -0,0 +1,200 @@
+"""
+Local OpenAI-compatible stub for load-testing the AI meal path without the live service.
+
+Serves POST /v1/chat/completions (plain, JSON-mode and stream=True) with configurable
+latency, injected errors and an optional requests-per-minute limit answered with 429s. Point the app at it with MEAL_BACKEND=stub, or build an
+OpenAI(base_url=..., api_key='stub') client against it.
+
+    python stub_llm_server.py --port 8808 --latency 0.8 --jitter 0.2 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_MEALS = [
+    'Herb Chicken Bowl: Grilled chicken over brown rice with roasted peppers and tahini.',
+    'Salmon Quinoa Plate: Pan-seared salmon with lemon quinoa and steamed greens.',
+    'Veggie Omelette: Three-egg omelette with spinach, mushrooms and feta.',
+    'Lentil Power Salad: Lentils, cucumber, cherry tomatoes and a mustard vinaigrette.',
+    'Greek Yogurt Parfait: Greek yogurt layered with berries, oats and honey.'
+]
+
+
+class StubConfig:
+    """
+    Latency (seconds, mean +/- uniform jitter), error injection, per-token stream delay
+    and an optional `rpm` limit enforced per second, like the live API's rate limiter.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.1, error_rate=0.0, error_status=500, token_delay=0.01, rpm=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_delay = token_delay
+        self.rpm = rpm
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._window = (0, 0)
+        self._lock = threading.Lock()
+
+    def count(self, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(failed)
+
+    def admit(self):
+        """True if the request fits this second's share of `rpm`."""
+        if not self.rpm:
+            return True
+        with self._lock:
+            second = int(time.monotonic())
+            window, used = self._window
+            used = used + 1 if window == second else 1
+            self._window = (second, used)
+            if used <= max(1, self.rpm // 60):
+                return True
+            self.requests += 1
+            self.rate_limited += 1
+            return False
+
+
+def _reply_text(prompt, json_mode):
+    if json_mode:
+        meal_types = re.findall(r'^\s*- (\w+):', prompt, flags=re.MULTILINE)
+        return json.dumps({meal_type: random.choice(STUB_MEALS) for meal_type in meal_types})
+    return random.choice(STUB_MEALS)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        config = self.config
+        if not config.admit():
+            self._send_json(429, {'error': {'message': 'rate limit reached', 'type': 'requests'}}, {'Retry-After': '1'})
+            return
+        time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+
+        failed = random.random() < config.error_rate
+        config.count(failed)
+        if failed:
+            self._send_json(config.error_status, {'error': {'message': 'injected failure', 'type': 'server_error'}})
+            return
+
+        prompt = request['messages'][-1]['content']
+        json_mode = (request.get('response_format') or {}).get('type') == 'json_object'
+        text = _reply_text(prompt, json_mode)
+        completion_id = f"chatcmpl-stub-{random.getrandbits(32):08x}"
+        created = int(time.time())
+        model = request.get('model', 'stub')
+
+        if request.get('stream'):
+            self._stream(text, completion_id, created, model)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': len(prompt.split()),
+                'completion_tokens': len(text.split()),
+                'total_tokens': len(prompt.split()) + len(text.split())
+            }
+        })
+
+    def _stream(self, text, completion_id, created, model):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        tokens = re.findall(r'\S+\s*', text)
+        for i, token in enumerate(tokens):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': token},
+                    'finish_reason': 'stop' if i == len(tokens) - 1 else None
+                }]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(self.config.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_stub_server(host='127.0.0.1', port=0, **config):
+    """Starts the stub on a background thread; returns (server, base_url). Port 0 picks a free one."""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': StubConfig(**config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-llm', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8808)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean seconds before replying')
+    parser.add_argument('--jitter', type=float, default=0.1, help='+/- seconds added uniformly to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status for injected failures')
+    parser.add_argument('--token-delay', type=float, default=0.01, help='seconds between streamed tokens')
+    parser.add_argument('--rpm', type=int, default=None, help='requests per minute before 429s, enforced per second')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, token_delay=args.token_delay, rpm=args.rpm
+    )
+    print(f"Stub LLM server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
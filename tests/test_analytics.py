@@ -0,0 +1,149 @@
+"""IntakeAnalytics rollups against a naive per-row reference, through appends, removals and compaction."""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import IntakeAnalytics, food_log_rows, meal_type_for
+from food_db import NUTRIENTS
+
+CATEGORIES = ['Fruits', 'Grains', 'Meat', 'Dairy']
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner', 'Snack']
+
+
+def random_rows(rng, count, users=('1', '2', '3'), start=datetime(2026, 1, 20)):
+    rows = pd.DataFrame({
+        'date': [start + timedelta(days=int(day)) for day in rng.integers(0, 60, count)],
+        'user_id': rng.choice(list(users), count),
+        'food': 'food',
+        'category': rng.choice(CATEGORIES, count),
+        'meal_type': rng.choice(MEAL_TYPES, count),
+    })
+    for nutrient in NUTRIENTS:
+        rows[nutrient] = rng.integers(0, 8000, count) / 10
+    return rows
+
+
+def reference(rows, user_id):
+    """Per-day, per-week, per-month and per-(month, category) sums of one user, by plain iteration."""
+    daily, weekly, monthly, category = (defaultdict(lambda: np.zeros(len(NUTRIENTS) + 1)) for _ in range(4))
+    week_days, month_days = defaultdict(set), defaultdict(set)
+    for row in rows.itertuples(index=False):
+        if str(row.user_id) != str(user_id):
+            continue
+        day = pd.Timestamp(row.date).normalize()
+        week = day - pd.Timedelta(days=day.weekday())
+        month = day.replace(day=1)
+        values = np.array([getattr(row, nutrient) for nutrient in NUTRIENTS] + [1.0])
+        for totals, key in ((daily, day), (weekly, week), (monthly, month), (category, (month, row.category))):
+            totals[key] += values
+        week_days[week].add(day)
+        month_days[month].add(day)
+    return daily, weekly, monthly, category, week_days, month_days
+
+
+def assert_matches_reference(analytics, rows, user_id):
+    daily, weekly, monthly, category, week_days, month_days = reference(rows, user_id)
+
+    result = analytics.daily(user_id)
+    assert list(result.index) == sorted(daily)
+    for day, values in daily.items():
+        assert result.loc[day, NUTRIENTS].to_numpy() == pytest.approx(values[:-1])
+        assert result.loc[day, 'entries'] == values[-1]
+
+    for result, totals, days in ((analytics.weekly(user_id), weekly, week_days),
+                                 (analytics.monthly(user_id), monthly, month_days)):
+        assert list(result.index) == sorted(totals)
+        for period, values in totals.items():
+            assert result.loc[period, NUTRIENTS].to_numpy() == pytest.approx(values[:-1] / len(days[period]))
+            assert result.loc[period, 'days'] == len(days[period])
+            assert result.loc[period, 'entries'] == values[-1]
+
+    for month in month_days:
+        breakdown = analytics.breakdown(user_id, 'category', month)
+        expected = {name: values for (m, name), values in category.items() if m == month}
+        assert set(breakdown.index) == set(expected)
+        month_calories = sum(values[0] for values in expected.values())
+        for name, values in expected.items():
+            assert breakdown.loc[name, 'calories'] == pytest.approx(values[0])
+            assert breakdown.loc[name, 'calorie_share'] == pytest.approx(values[0] / month_calories)
+        assert list(breakdown['calories']) == sorted(breakdown['calories'], reverse=True)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(11)
+
+
+def test_bulk_rollups_match_reference(rng):
+    rows = random_rows(rng, 2000)
+    analytics = IntakeAnalytics(rows)
+    for user_id in ('1', '2', '3'):
+        assert_matches_reference(analytics, rows, user_id)
+    assert analytics.stats()['rows'] == 2000
+
+
+@pytest.mark.parametrize('compact_rows', [10 ** 6, 50])
+def test_appended_and_removed_rows_match_reference(rng, compact_rows):
+    initial = random_rows(rng, 1000)
+    analytics = IntakeAnalytics(initial, compact_rows=compact_rows)
+    batches = [random_rows(rng, 30, users=('2', '4')) for _ in range(10)]
+    for batch in batches:
+        analytics.append(batch)
+    analytics.remove(batches[3])
+    analytics.remove(initial[initial['user_id'] == '1'].iloc[:100])
+
+    remaining = pd.concat([initial[initial['user_id'] != '1'], initial[initial['user_id'] == '1'].iloc[100:]]
+                          + batches[:3] + batches[4:])
+    for user_id in ('1', '2', '3', '4'):
+        assert_matches_reference(analytics, remaining, user_id)
+    stats = analytics.stats()
+    assert stats['rows'] == len(remaining)
+    if compact_rows == 50:
+        assert stats['recent'] < 50
+
+    analytics.compact()
+    assert analytics.stats()['recent'] == 0
+    assert_matches_reference(analytics, remaining, '2')
+
+
+def test_removing_every_row_of_a_day_drops_it(rng):
+    rows = random_rows(rng, 200, users=('1',))
+    analytics = IntakeAnalytics(rows.iloc[:0])
+    analytics.append(rows)
+    last_day = rows['date'].max()
+    analytics.remove(rows[rows['date'] == last_day])
+    assert last_day not in analytics.daily('1').index
+    analytics.compact()
+    assert last_day not in analytics.daily('1').index
+
+
+def test_daily_window_and_unknown_users(rng):
+    rows = random_rows(rng, 500, users=('1',))
+    analytics = IntakeAnalytics(rows)
+    recent = analytics.daily('1', days=7)
+    latest = rows['date'].max()
+    assert recent.index.min() > latest - pd.Timedelta(days=7) and recent.index.max() == latest
+    assert analytics.daily('missing').empty
+    assert analytics.breakdown('missing').empty
+    assert analytics.breakdown('1', month='1999-01-01').empty
+
+
+def test_food_log_rows_fill_category_and_meal_type():
+    class Database:
+        def profile(self, name):
+            return {'category': 'Fruits'} if name == 'Apple' else None
+
+    records = [
+        ('u1', datetime(2026, 3, 2, 8), {'name': 'Apple', 'calories': 95}),
+        ('u1', '2026-03-02T19:30:00', {'name': 'Stew', 'calories': 600, 'protein': None}),
+        ('u1', datetime(2026, 3, 2, 12), {'name': 'Bar', 'calories': 200, 'category': 'Snacks', 'meal_type': 'Snack'}),
+    ]
+    rows = food_log_rows(records, Database())
+    assert list(rows['category']) == ['Fruits', 'Other', 'Snacks']
+    assert list(rows['meal_type']) == ['Breakfast', 'Dinner', 'Snack']
+    assert rows.loc[1, 'protein'] == 0
+    assert [meal_type_for(datetime(2026, 1, 1, hour)) for hour in (0, 10, 11, 16, 17, 18, 23)] == \
+        ['Breakfast', 'Breakfast', 'Lunch', 'Snack', 'Snack', 'Dinner', 'Dinner']
@@ -0,0 +1,180 @@
+"""app.py end to end through Streamlit's AppTest."""
+import gc
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import llm_client
+import metrics
+from persistence import WriteBehindWriter
+from stub_llm_server import start_stub_server
+from user_store import UserStore
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+REMOTE_PLAN = {
+    'calorie_target': 2100, 'protein_target': 150, 'carbs_target': 210, 'fat_target': 70,
+    'meals': [{'meal': 'Lunch', 'name': 'Remote bowl', 'calories': 700, 'protein': 50, 'carbs': 70, 'fat': 23}],
+    'workouts': [{'day': 'Monday', 'type': 'Remote run', 'duration': 30}],
+    'exercises': [{'name': 'Remote squats', 'sets': 3, 'reps': 10}],
+    'meal_source': 'composer', 'failures': []
+}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An AppTest of app.py whose user data and caches live in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield AppTest.from_file(APP_PATH, default_timeout=60)
+    # Save pending changes while still in tmp_path; the store's path is relative
+    flush_writers()
+    st.cache_resource.clear()
+
+
+def flush_writers():
+    """Flushes the app's write-behind writers, which live in its resource cache."""
+    for writer in [obj for obj in gc.get_objects() if isinstance(obj, WriteBehindWriter)]:
+        writer.flush()
+
+
+@pytest.fixture
+def planner_api():
+    """A planner API answering POST /plan with REMOTE_PLAN; yields (url, received profiles)."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            body = json.dumps(REMOTE_PLAN).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', received
+    server.shutdown()
+
+
+def submit_profile(app):
+    next(button for button in app.button if 'Generate' in str(button.label)).click().run()
+
+
+def test_profile_submit_renders_the_planner_api_plan(app, planner_api, monkeypatch):
+    url, received = planner_api
+    monkeypatch.setenv('PLANNER_API_URL', url)
+    app.run()
+    submit_profile(app)
+
+    assert not app.exception
+    assert len(received) == 1 and received[0]['use_ai'] is False
+    assert received[0]['current_weight'] == app.session_state['current_weight']
+    for key in ['calorie_target', 'protein_target', 'carbs_target', 'fat_target', 'meals', 'workouts', 'exercises']:
+        assert app.session_state[key] == REMOTE_PLAN[key]
+
+
+def test_unreachable_planner_api_plans_in_process(app, monkeypatch):
+    monkeypatch.setenv('PLANNER_API_URL', 'http://127.0.0.1:9')
+    app.run()
+    submit_profile(app)
+
+    assert not app.exception
+    assert any('planning here instead' in warning.value for warning in app.warning)
+    assert app.session_state['meals'] and app.session_state['meals'] != REMOTE_PLAN['meals']
+    assert app.session_state['calorie_target'] > 0
+
+
+def test_reset_clears_todays_log_and_keeps_earlier_days(app, tmp_path):
+    store = UserStore(str(tmp_path / 'user_data.db'))
+    now = datetime.now()
+    store.append_food('default', {'name': 'Oats', 'calories': 350}, now - timedelta(days=1))
+    store.append_food('default', {'name': 'Soup', 'calories': 200}, now)
+    app.run()
+    assert app.session_state['food_log'].daily_calories == 200
+
+    next(button for button in app.button if 'Reset' in str(button.label)).click().run()
+
+    assert not app.exception
+    assert app.session_state['food_log'].daily_calories == 0
+    flush_writers()
+    assert [entry['name'] for _, _, entry in store.food_log_entries('default')] == ['Oats']
+
+
+def fragment_runs(rows):
+    """{fragment name: runs} from metrics.REGISTRY.summary() rows."""
+    return {
+        row['metric'].split('"')[1]: row['count']
+        for row in rows if row['metric'].startswith('fragment_seconds{')
+    }
+
+
+def test_switching_tabs_runs_only_the_opened_tab(app, monkeypatch):
+    monkeypatch.setattr(metrics.REGISTRY, 'enabled', True)
+    monkeypatch.setattr(metrics.REGISTRY, '_histograms', {})
+    app.run()
+    assert fragment_runs(metrics.REGISTRY.summary()) == {'calorie_tracker': 1, 'dashboard_tab': 1}
+
+    for label, fragment in [("📊 Progress", 'progress_tab'), ("🍽️ Nutrition", 'nutrition_tab')]:
+        before = fragment_runs(metrics.REGISTRY.summary())
+        app.session_state['active_tab'] = label
+        app.run()
+        assert not app.exception
+        after = fragment_runs(metrics.REGISTRY.summary())
+        ran = {name for name in after if after[name] != before.get(name, 0)}
+        # The sidebar tracker renders on every full rerun; of the tabs, only the opened one runs
+        assert ran == {'calorie_tracker', fragment}
+
+
+def test_first_render_imports_neither_openai_nor_dotenv(tmp_path):
+    # A fresh interpreter, since the other tests have imported openai already
+    script = textwrap.dedent(f"""
+        import sys
+        from streamlit.testing.v1 import AppTest
+        app = AppTest.from_file({APP_PATH!r}, default_timeout=60)
+        app.run()
+        assert not app.exception, app.exception
+        print(sorted(name for name in ('openai', 'dotenv', 'llm_client') if name in sys.modules))
+    """)
+    env = {key: value for key, value in os.environ.items() if key != 'OPENAI_API_KEY'}
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_sessions_share_one_lazily_built_ai_client(app, monkeypatch):
+    server, url = start_stub_server(latency=0.0, jitter=0.0)
+    monkeypatch.setenv('MEAL_BACKEND', 'stub')
+    monkeypatch.setenv('MEAL_BACKEND_URL', url)
+    other = AppTest.from_file(APP_PATH, default_timeout=60)
+    try:
+        for session in (app, other):
+            session.run()
+            session.checkbox[0].check()
+            submit_profile(session)
+            assert not session.exception
+            assert all(meal['name'] for meal in session.session_state['meals'])
+    finally:
+        server.shutdown()
+
+    gc.collect()
+    clients = [obj for obj in gc.get_objects() if isinstance(obj, llm_client.LLMClient)]
+    assert len(clients) == 1 and clients[0].stats()['calls'] == 2
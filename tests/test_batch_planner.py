@@ -0,0 +1,135 @@
+"""batch_planner must return exactly what the scalar calculators.py chain returns, row by row."""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_planner
+import calculators
+from catalog import MEAL_DISTRIBUTIONS, WORKOUT_TEMPLATES
+from planner import ACTIVITY_LEVELS, GENDERS, GOAL_TYPES, HEALTH_CONDITIONS, PROFILE_FIELDS
+
+# The ends of each form range and a value next to them
+AGES = sorted({*PROFILE_FIELDS['age'][0], PROFILE_FIELDS['age'][0][0] + 1, PROFILE_FIELDS['age'][0][1] - 1, 40})
+HEIGHTS = sorted({*PROFILE_FIELDS['height'][0], PROFILE_FIELDS['height'][0][0] + 1, PROFILE_FIELDS['height'][0][1] - 1})
+LIGHTEST, HEAVIEST = PROFILE_FIELDS['current_weight'][0]
+
+# (current, goal) weights around the deficit/surplus clamps: |difference| * 100 is
+# 0, 100, 250, 300, 500, 600, 1000, 1100 and the full range, in both directions
+WEIGHT_PAIRS = [
+    (70, 70), (70, 69), (69, 70), (72.5, 70), (70, 72.5), (73, 70), (70, 73), (75, 70), (70, 75),
+    (76, 70), (80, 70), (70, 80), (81, 70), (HEAVIEST, LIGHTEST), (LIGHTEST, HEAVIEST)
+]
+
+# Values outside the choices, which the calculators map to their defaults
+UNKNOWN = 'Unknown'
+
+SLOT_FIELDS = ['calories', 'protein', 'carbs', 'fat']
+
+
+def profiles_frame(rows):
+    return pd.DataFrame(rows, columns=batch_planner.PROFILE_COLUMNS)
+
+
+def scalar_plan(current_weight, goal_weight, height, age, gender, activity_level, goal_type, health_condition):
+    """plan()'s columns for one profile, from calculators.py."""
+    bmr = calculators.calculate_bmr(current_weight, height, age, gender)
+    tdee = calculators.calculate_tdee(bmr, activity_level)
+    calorie_target = calculators.calculate_calorie_target(current_weight, goal_weight, tdee, goal_type)
+    macro_targets = calculators.calculate_macro_targets(calorie_target, goal_type)
+    row = {'bmr': bmr, 'tdee': tdee, 'calorie_target': calorie_target, **macro_targets}
+    for meal in calculators.split_meal_targets(calorie_target, macro_targets):
+        for field in SLOT_FIELDS:
+            row[f"{meal['meal'].lower()}_{field}"] = meal[field]
+    row['workout'] = calculators.generate_workout_plan(goal_type, health_condition, 'Beginner')
+    return row
+
+
+def assert_plans_match(rows):
+    plans = batch_planner.plan(profiles_frame(rows))
+    mismatches = []
+    for row, (_, batch) in zip(rows, plans.iterrows()):
+        expected = scalar_plan(*row)
+        for column, value in expected.items():
+            actual = batch_planner.workout_template(batch[column]) if column == 'workout' else batch[column]
+            if actual != value:
+                mismatches.append((row, column, actual, value))
+    assert not mismatches, f"{len(mismatches)} mismatches, first ones: {mismatches[:5]}"
+
+
+def test_every_choice_at_the_range_boundaries():
+    rows = [
+        (current, goal, height, age, gender, activity, goal_type, health)
+        for (current, goal), height, age, gender, activity, goal_type, health in itertools.product(
+            WEIGHT_PAIRS[::2], HEIGHTS[::3], AGES[::2], GENDERS, ACTIVITY_LEVELS, GOAL_TYPES, HEALTH_CONDITIONS
+        )
+    ]
+    assert_plans_match(rows)
+
+
+@pytest.mark.parametrize('gender', GENDERS + [UNKNOWN])
+def test_bmr_and_tdee_over_the_form_grid(gender):
+    weights = sorted({LIGHTEST, LIGHTEST + 1, 70, HEAVIEST - 1, HEAVIEST})
+    grid = list(itertools.product(weights, HEIGHTS, AGES, ACTIVITY_LEVELS + [UNKNOWN]))
+    weight, height, age, activity = (np.array(values, dtype=object) for values in zip(*grid))
+    bmr = batch_planner.calculate_bmr(weight, height, age, np.full(len(grid), gender, dtype=object))
+    tdee = batch_planner.calculate_tdee(bmr, activity)
+    for i, (w, h, a, level) in enumerate(grid):
+        expected_bmr = calculators.calculate_bmr(w, h, a, gender)
+        assert bmr[i] == expected_bmr, (w, h, a, gender)
+        assert tdee[i] == calculators.calculate_tdee(expected_bmr, level), (w, h, a, gender, level)
+
+
+@pytest.mark.parametrize('goal_type', GOAL_TYPES + [UNKNOWN])
+def test_calorie_target_clamps(goal_type):
+    # TDEEs around the 1200 kcal floor of weight loss, for every deficit
+    tdees = [1200.0, 1699.5, 1700.0, 1700.5, 2199.999, 2200.0, 3000.25]
+    cases = [(current, goal, tdee) for (current, goal), tdee in itertools.product(WEIGHT_PAIRS, tdees)]
+    current, goal, tdee = (np.array(values, dtype=np.float64) for values in zip(*cases))
+    batch = batch_planner.calculate_calorie_target(current, goal, tdee, np.full(len(cases), goal_type, dtype=object))
+    expected = [calculators.calculate_calorie_target(c, g, t, goal_type) for c, g, t in cases]
+    assert batch.tolist() == expected
+
+
+@pytest.mark.parametrize('goal_type', GOAL_TYPES + [UNKNOWN])
+def test_rounding_of_macros_and_meal_slots(goal_type):
+    # Quarter-calorie steps put many macro grams and slot values exactly on .5
+    calorie_targets = np.arange(1200, 4000, 0.25)
+    goal_types = np.full(len(calorie_targets), goal_type, dtype=object)
+    macros = batch_planner.calculate_macro_targets(calorie_targets, goal_types)
+    slots = batch_planner.split_meal_targets(calorie_targets, macros)
+    halves = 0
+    for i, calorie_target in enumerate(calorie_targets.tolist()):
+        expected = calculators.calculate_macro_targets(calorie_target, goal_type)
+        assert {macro: int(values[i]) for macro, values in macros.items()} == expected, calorie_target
+        for meal in calculators.split_meal_targets(calorie_target, expected):
+            for field in SLOT_FIELDS:
+                assert slots[f"{meal['meal'].lower()}_{field}"][i] == meal[field], (calorie_target, meal['meal'], field)
+        halves += any((calorie_target * share) % 1 == 0.5 for share in MEAL_DISTRIBUTIONS.values())
+    assert halves > 0
+
+
+def test_workout_assignment_for_every_goal_and_condition():
+    goal_types = list(WORKOUT_TEMPLATES) + GOAL_TYPES + [UNKNOWN]
+    conditions = HEALTH_CONDITIONS + [UNKNOWN]
+    pairs = list(itertools.product(goal_types, conditions))
+    keys = batch_planner.assign_workout_templates(*(np.array(values, dtype=object) for values in zip(*pairs)))
+    for (goal_type, condition), key in zip(pairs, keys):
+        expected = calculators.generate_workout_plan(goal_type, condition, 'Beginner')
+        assert batch_planner.workout_template(batch_planner.WORKOUT_KEYS[key]) == expected
+
+
+def test_float_and_saved_profiles():
+    # Profiles saved before the sliders were bounded, or sent as floats, go through the same formulas
+    rows = [
+        (200.5, 35.0, 230, 3, 'Female', 'Light', 'Weight Loss', 'Diabetes'),
+        (35.0, 200.5, 130, 110, 'Male', 'Very Active', 'Weight Gain', 'Healthy'),
+        (70.25, 70.0, 175.5, 33, 'Other', UNKNOWN, UNKNOWN, UNKNOWN),
+    ]
+    assert_plans_match(rows)
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match='goal_type'):
+        batch_planner.plan(profiles_frame([]).drop(columns=['goal_type']))
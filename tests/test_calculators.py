@@ -0,0 +1,57 @@
+"""The read-only catalog and the memoized calculators handing out copies of it."""
+import pytest
+
+import catalog
+from calculators import (
+    calculate_bmr, calculate_calorie_target, calculate_macro_targets, calculate_tdee, generate_exercises,
+    generate_workout_plan, get_default_meal, get_food_recommendations, split_meal_targets
+)
+
+
+def test_catalog_tables_are_read_only():
+    with pytest.raises(TypeError):
+        catalog.MEAL_DISTRIBUTIONS['Brunch'] = 0.1
+    with pytest.raises(TypeError):
+        catalog.MEAL_TEMPLATES['Weight Loss']['Lunch'] = 'Cake'
+    template = catalog.WORKOUT_TEMPLATES['Weight Loss']['Healthy']
+    assert isinstance(template, tuple)
+    with pytest.raises(TypeError):
+        template[0]['duration'] = 0
+
+
+def test_callers_get_their_own_copies():
+    recommendations = get_food_recommendations('Weight Loss', 'Diabetes')
+    recommendations.append('Cake')
+    recommendations[0] = 'Pie'
+    assert get_food_recommendations('Weight Loss', 'Diabetes') == [
+        *catalog.FOOD_RECOMMENDATIONS['Weight Loss'], *catalog.HEALTH_MODIFIERS['Diabetes']
+    ]
+
+    plan = generate_workout_plan('Weight Loss', 'Healthy', 'Beginner')
+    plan[0]['duration'] = 0
+    plan.pop()
+    fresh = generate_workout_plan('Weight Loss', 'Healthy', 'Beginner')
+    assert fresh[0]['duration'] != 0 and len(fresh) == len(plan) + 1
+
+    exercises = generate_exercises('Cardio')
+    exercises.clear()
+    assert generate_exercises('Cardio')
+
+    macros = calculate_macro_targets(2000, 'Weight Loss')
+    macros['protein_target'] = 0
+    assert calculate_macro_targets(2000, 'Weight Loss')['protein_target'] > 0
+
+    meals = split_meal_targets(2000, calculate_macro_targets(2000, 'Weight Loss'))
+    meals[0]['name'] = 'Cake'
+    assert split_meal_targets(2000, calculate_macro_targets(2000, 'Weight Loss'))[0]['name'] is None
+
+
+def test_calculators_are_memoized_on_their_inputs():
+    calculate_bmr.cache_clear()
+    bmr = calculate_bmr(80, 180, 30, 'Male')
+    assert calculate_bmr(80, 180, 30, 'Male') == bmr
+    assert calculate_bmr.cache_info().hits == 1
+    tdee = calculate_tdee(bmr, 'Moderate')
+    assert tdee == pytest.approx(bmr * catalog.ACTIVITY_MULTIPLIERS['Moderate'])
+    assert calculate_calorie_target(80, 72, tdee, 'Weight Loss') < tdee
+    assert get_default_meal('LUNCH') == catalog.DEFAULT_MEALS['lunch']
@@ -0,0 +1,50 @@
+"""FoodDatabase profiles and indexes over meals.csv-shaped rows."""
+import numpy as np
+import pytest
+
+from food_db import MEALS_CSV, NUTRIENTS, FoodDatabase, load_food_database, read_meals_csv
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return read_meals_csv(MEALS_CSV, nrows=500)
+
+
+@pytest.fixture(scope='module')
+def database(rows):
+    return FoodDatabase(rows)
+
+
+def test_profiles_are_per_food_means(rows, database):
+    food = rows['food'].iloc[0]
+    servings = rows[rows['food'] == food]
+    profile = database.profile(f'  {food.upper()} ')
+
+    assert profile['food'] == food and profile['servings'] == len(servings)
+    for nutrient in NUTRIENTS:
+        assert profile[nutrient] == pytest.approx(servings[nutrient].astype('float64').mean(), abs=0.05)
+    assert profile['category'] == servings['category'].astype(str).mode().iat[0]
+    np.testing.assert_allclose(database.matrix[database.position(food)], [profile[n] for n in NUTRIENTS])
+    assert database.profile('no such food') is None
+
+
+def test_category_and_meal_type_indexes(rows, database):
+    for category in database.by_category:
+        expected = {food for food in database.foods if database.profile(food)['category'] == category}
+        assert set(database.foods_in_category(category)) == expected
+
+    meal_type = str(rows['meal_type'].iloc[0])
+    counts = rows[rows['meal_type'] == meal_type]['food'].astype(str).value_counts()
+    foods = database.foods_for_meal(meal_type)
+    assert set(foods) == set(counts.index)
+    assert counts[foods[0]] == counts.max()
+    assert database.foods_for_meal('Brunch') == []
+
+
+def test_loaded_once_per_process(tmp_path):
+    path = tmp_path / 'meals.csv'
+    with open(MEALS_CSV) as f:
+        path.write_text(''.join(f.readlines()[:51]))
+    first = load_food_database(str(path))
+    assert load_food_database(str(path)) is first
+    assert len(first.rows) == 50
@@ -0,0 +1,114 @@
+"""FoodLog's midnight rollover, compaction of earlier days and history trimming."""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from food_db import NUTRIENTS
+from food_log import FoodLog
+
+DAY = date(2026, 3, 2)
+
+
+def at(days, hour=12, minute=0):
+    return datetime.combine(DAY + timedelta(days=days), datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+def entry(calories, protein=10.0, **nutrients):
+    return {'name': f'food {calories}', 'calories': calories, 'protein': protein, **nutrients}
+
+
+def history_calories(food_log):
+    history = food_log.history()
+    return {timestamp.date(): (row['calories'], row['entries']) for timestamp, row in history.iterrows()}
+
+
+def test_from_records_keeps_today_and_compacts_earlier_days():
+    records = [(at(-2), entry(300)), (at(-2, 20), entry(200)), (at(-1), entry(500)), (at(0, 8), entry(400))]
+    food_log = FoodLog.from_records(records, now=at(0, 9))
+    assert food_log.today() == [entry(400)]
+    assert food_log.daily_calories == 400
+    assert history_calories(food_log) == {DAY - timedelta(days=2): (500, 2), DAY - timedelta(days=1): (500, 1)}
+    assert food_log.history().loc[str(DAY - timedelta(days=2)), 'protein'] == 20
+
+
+def test_rolls_over_at_midnight_only():
+    food_log = FoodLog(DAY)
+    food_log.add(entry(300), at(0, 23, 59))
+    assert not food_log.roll_over(at(0, 23, 59))
+    assert food_log.daily_calories == 300
+
+    food_log.add(entry(150), at(1, 0, 1))
+    assert food_log.day == DAY + timedelta(days=1)
+    assert food_log.today() == [entry(150)]
+    assert history_calories(food_log) == {DAY: (300, 1)}
+    assert not food_log.roll_over(at(1, 0, 2))
+
+
+def test_rollover_after_days_away_compacts_into_the_logged_day():
+    food_log = FoodLog(DAY)
+    food_log.add(entry(300), at(0, 10))
+    food_log.add(entry(100), at(0, 18))
+    assert food_log.roll_over(at(4))
+    assert food_log.today() == [] and food_log.daily_calories == 0
+    assert history_calories(food_log) == {DAY: (400, 2)}
+
+
+def test_late_entry_for_an_earlier_day_goes_to_history():
+    food_log = FoodLog(DAY)
+    food_log.add(entry(300), at(-1, 1))
+    food_log.add(entry(200), at(-3))
+    food_log.add(entry(100), at(-1, 2))
+    assert food_log.today() == []
+    assert history_calories(food_log) == {DAY - timedelta(days=3): (200, 1), DAY - timedelta(days=1): (400, 2)}
+    assert np.all(np.diff(food_log.days.astype(np.int64)) > 0)
+
+
+def test_incremental_log_matches_one_built_from_records():
+    rng = np.random.default_rng(7)
+    draws = zip(rng.integers(-40, 1, 300), rng.integers(0, 24, 300), rng.integers(50, 900, 300), rng.uniform(0, 60, 300))
+    records = sorted(
+        ((at(int(days), int(hour)), entry(int(calories), float(protein))) for days, hour, calories, protein in draws),
+        key=lambda record: record[0]
+    )
+    incremental = FoodLog(records[0][0].date())
+    for logged_at, logged in records:
+        incremental.add(logged, logged_at)
+    incremental.roll_over(at(0, 23))
+    rebuilt = FoodLog.from_records(records, now=at(0, 23))
+
+    assert incremental.today() == rebuilt.today()
+    assert np.array_equal(incremental.days, rebuilt.days)
+    assert np.array_equal(incremental.counts, rebuilt.counts)
+    assert np.allclose(incremental.totals, rebuilt.totals)
+
+
+def test_history_is_trimmed_to_history_days():
+    records = [(at(-days), entry(100 * days)) for days in range(1, 8)]
+    food_log = FoodLog.from_records(records, now=at(0), history_days=3)
+    assert sorted(history_calories(food_log)) == [DAY - timedelta(days=days) for days in (3, 2, 1)]
+
+    food_log.roll_over(at(2))
+    assert sorted(history_calories(food_log)) == [DAY - timedelta(days=1)]
+
+
+def test_history_window():
+    records = [(at(-days), entry(100)) for days in range(1, 11)]
+    food_log = FoodLog.from_records(records, now=at(0))
+    assert len(food_log.history(days=7)) == 7
+    assert list(food_log.history().columns) == NUTRIENTS + ['entries']
+
+
+def test_missing_nutrients_count_as_zero():
+    food_log = FoodLog.from_records([(at(-1), {'name': 'water', 'calories': None})], now=at(0))
+    assert food_log.history().iloc[0][NUTRIENTS].sum() == 0
+    food_log.add({'name': 'tea'}, at(0, 9))
+    assert food_log.daily_calories == 0
+
+
+def test_clear_today_returns_midnight():
+    food_log = FoodLog(DAY)
+    food_log.add(entry(300), at(0, 9))
+    food_log.add(entry(100), at(-1))
+    assert food_log.clear_today() == at(0, 0)
+    assert food_log.today() == []
+    assert history_calories(food_log) == {DAY - timedelta(days=1): (100, 1)}
@@ -0,0 +1,118 @@
+"""FoodIndex ranking: exact, name prefix, word prefix and trigram matches, and portions."""
+import pytest
+
+from food_search import FoodIndex, logged_foods, portion_entry, trigrams
+
+
+def food(name, servings=1, calories=100, **nutrients):
+    return {'food': name, 'category': 'Other', 'servings': servings, 'calories': calories, **nutrients}
+
+
+@pytest.fixture
+def index():
+    return FoodIndex([
+        food('Apple', servings=40),
+        food('Apple Pie', servings=5),
+        food('Pineapple', servings=90),
+        food('Applesauce', servings=2),
+        food('Green Apple', servings=1),
+        food('Orange Juice', servings=30),
+        food('Oat Milk', servings=12),
+        food('Banana', servings=50),
+        food('Bagel', servings=60),
+    ])
+
+
+def names(foods):
+    return [f['food'] for f in foods]
+
+
+def test_exact_then_name_prefix_then_word_prefix(index):
+    assert names(index.search('apple')) == ['Apple', 'Apple Pie', 'Applesauce', 'Green Apple', 'Pineapple']
+
+
+def test_prefix_matches_rank_by_how_often_they_are_logged(index):
+    assert names(index.search('ba')) == ['Bagel', 'Banana']
+
+
+def test_query_is_normalized(index):
+    assert names(index.search('  APPLE   pie '))[0] == 'Apple Pie'
+
+
+def test_initials_of_every_word(index):
+    assert names(index.search('o j')) == ['Orange Juice']
+    assert names(index.search('o m')) == ['Oat Milk']
+
+
+def test_typos_fall_back_to_trigrams_below_prefix_matches(index):
+    assert names(index.search('bananna'))[0] == 'Banana'
+    assert names(index.search('oragne juice')) == ['Orange Juice']
+    results = names(index.search('appl'))
+    assert results[:4] == ['Apple', 'Apple Pie', 'Applesauce', 'Green Apple']
+
+
+def test_unrelated_or_empty_queries_match_nothing(index):
+    assert index.search('xyz') == []
+    assert index.search('   ') == []
+
+
+def test_limit(index):
+    assert len(index.search('a', limit=3)) == 3
+
+
+def test_equal_tier_and_popularity_prefers_shorter_names():
+    index = FoodIndex([food('Rice Pudding'), food('Rice')])
+    assert names(index.search('ric')) == ['Rice', 'Rice Pudding']
+
+
+def test_user_foods_shadow_and_extend_the_shared_index(index):
+    mine = FoodIndex([food('apple', servings=1, calories=80), food('Apricot Bar')], parent=index)
+    results = mine.search('ap')
+    assert [f['calories'] for f in results if f['food'].lower() == 'apple'] == [80]
+    assert 'Apricot Bar' in names(results) and 'Apple Pie' in names(results)
+    assert mine.get('APPLE')['calories'] == 80
+    assert mine.get('banana')['food'] == 'Banana'
+    assert mine.get('durian') is None
+
+
+def test_add_replaces_a_food_with_the_same_name(index):
+    index.add(food('APPLE', servings=41, calories=95))
+    assert [f['calories'] for f in index.search('apple') if f['food'].lower() == 'apple'] == [95]
+    assert len(index.search('apple', limit=20)) == 5
+
+
+def test_trigrams_pad_word_starts():
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+
+
+class Database:
+    def __init__(self, foods):
+        self.foods = {f['food'].lower(): f for f in foods}
+
+    def profile(self, name):
+        return self.foods.get(str(name).strip().lower())
+
+
+def test_logged_foods_are_per_serving_and_counted():
+    database = Database([food('Apple')])
+    log = [
+        {'name': 'Apple', 'calories': 95},
+        {'name': 'Protein shake', 'calories': 300, 'protein': 50, 'servings': 2},
+        {'name': 'protein shake', 'calories': 160, 'protein': 26},
+        {'name': '  ', 'calories': 10},
+    ]
+    foods = logged_foods(log, database)
+    assert len(foods) == 1
+    assert foods[0]['food'] == 'protein shake'
+    assert foods[0]['servings'] == 2
+    assert foods[0]['calories'] == 160 and foods[0]['protein'] == 26
+
+
+def test_portion_entry_scales_nutrients_by_servings_or_calories():
+    oats = food('Oats', calories=150, protein=5.0, carbs=27.0)
+    entry = portion_entry(oats, 1.5)
+    assert (entry['calories'], entry['protein'], entry['carbs'], entry['servings']) == (225, 7.5, 40.5, 1.5)
+
+    entry = portion_entry(oats, 1, calories=300)
+    assert (entry['calories'], entry['protein'], entry['carbs']) == (300, 10.0, 54.0)
+    assert entry['fat'] == 0
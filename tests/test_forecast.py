@@ -0,0 +1,119 @@
+"""Weight forecast bands, goal dates and scenarios, including flat and gaining trends."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast import KCAL_PER_KG, MAX_WEEKS, MIN_WEEKS, QUANTILES, forecast, goal_date, scenario_grid, tdee_line
+
+PROFILE = (80, 72, 175, 30, 'Male', 'Moderate')
+START = '2026-03-02'
+
+
+def maintenance(weight=80):
+    intercept, slope = tdee_line(*PROFILE[2:])
+    return intercept + slope * weight
+
+
+def exact(profile=PROFILE, **options):
+    """A forecast without TDEE or adherence noise: every band is the same trajectory."""
+    return forecast(*profile, draws=1, tdee_error=0, adherence_sd=0, start=START, **options)
+
+
+def simulate(weight, intake, days, adherence=1.0):
+    """Day-by-day energy balance with the calculators' TDEE, in small steps."""
+    steps = 24
+    for _ in range(days * steps):
+        weight += adherence * (intake - maintenance(weight)) / KCAL_PER_KG / steps
+    return weight
+
+
+def test_closed_form_matches_day_by_day_energy_balance():
+    result = exact(intake=2000, weeks=20)
+    weights = result['weight'][0, 1]
+    for week in (1, 5, 20):
+        assert weights[week] == pytest.approx(simulate(80, 2000, 7 * week), abs=0.01)
+    assert len(result['dates']) == 21 and result['dates'][0] == pd.Timestamp(START)
+    assert (result['dates'][1] - result['dates'][0]).days == 7
+
+
+def test_goal_day_is_when_the_trajectory_crosses_the_goal():
+    result = exact(intake=2000, weeks=MAX_WEEKS)
+    days = result['goal_days'][0, 1]
+    assert np.isfinite(days)
+    assert simulate(80, 2000, int(np.floor(days))) > 72 > simulate(80, 2000, int(np.ceil(days)) + 1)
+    assert goal_date(days, START) == pd.Timestamp(START) + pd.Timedelta(days=int(np.ceil(days)))
+
+
+def test_bands_are_ordered_and_widen_with_uncertainty():
+    result = forecast(*PROFILE, intake=1900, adherence=0.8, weeks=30, start=START)
+    weight, goal_days = result['weight'][0], result['goal_days'][0]
+    assert weight.shape == (len(QUANTILES), 31)
+    assert np.all(weight[0] <= weight[1]) and np.all(weight[1] <= weight[2])
+    assert np.all(weight[:, 0] == 80)
+    assert goal_days[0] <= goal_days[1] <= goal_days[2]
+    spread = weight[2] - weight[0]
+    assert spread[-1] > spread[1] > 0
+
+    narrower = forecast(*PROFILE, intake=1900, adherence=0.8, weeks=30, start=START, tdee_error=0.02)
+    assert (narrower['weight'][0, 2] - narrower['weight'][0, 0])[-1] < spread[-1]
+
+
+def test_flat_trend_never_reaches_a_different_goal():
+    result = exact(intake=maintenance(), weeks=52)
+    assert np.allclose(result['weight'], 80)
+    assert np.all(np.isinf(result['goal_days']))
+    assert goal_date(result['goal_days'][0, 1], START) is None
+
+
+def test_already_at_goal_is_day_zero():
+    result = exact(profile=(80, 80) + PROFILE[2:], intake=maintenance())
+    assert np.all(result['goal_days'] == 0)
+    assert goal_date(0.0, START) == pd.Timestamp(START)
+
+
+def test_gaining_trend_reaches_a_higher_goal_only():
+    gain = (70, 75) + PROFILE[2:]
+    result = exact(profile=gain, intake=maintenance(70) + 400, weeks=40)
+    weights = result['weight'][0, 1]
+    assert np.all(np.diff(weights) > 0)
+    assert np.isfinite(result['goal_days'][0, 1])
+
+    wrong_way = exact(profile=(70, 65) + PROFILE[2:], intake=maintenance(70) + 400, weeks=40)
+    assert np.isinf(wrong_way['goal_days'][0, 1])
+
+
+def test_goal_beyond_where_intake_settles_is_never_reached():
+    # 2700 kcal/day settles above 72 kg, so losing 8 kg never happens
+    assert maintenance(72) < 2700 < maintenance(80)
+    assert np.isinf(exact(intake=2700)['goal_days'][0, 1])
+
+
+def test_scenarios_broadcast_and_share_draws():
+    result = forecast(*PROFILE, intake=[1800, 2000, 2200], adherence=[[1.0], [0.7]], start=START)
+    medians = result['goal_days'][:, 1].reshape(2, 3)
+    assert np.all(np.diff(medians, axis=1) > 0)
+    assert np.all(medians[1] > medians[0])
+    again = forecast(*PROFILE, intake=[1800, 2000, 2200], adherence=[[1.0], [0.7]], start=START)
+    assert np.array_equal(result['goal_days'], again['goal_days'])
+
+
+def test_default_length_covers_the_slowest_band_within_bounds():
+    result = forecast(*PROFILE, intake=1900, adherence=0.8, start=START)
+    weeks = len(result['dates']) - 1
+    assert MIN_WEEKS <= weeks <= MAX_WEEKS
+    assert weeks * 7 >= result['goal_days'][0, 2]
+    assert len(exact(intake=maintenance())['dates']) - 1 == MAX_WEEKS
+    assert len(exact(profile=(80, 80) + PROFILE[2:], intake=maintenance())['dates']) - 1 == MIN_WEEKS
+
+
+def test_scenario_grid():
+    grid = scenario_grid(*PROFILE, deficits=[0, 250, 500, 750], adherences=[0.6, 1.0])
+    assert list(grid.index) == [0.6, 1.0] and list(grid.columns) == [0, 250, 500, 750]
+    assert grid[0].isna().all()
+    reached = grid[[250, 500, 750]]
+    assert reached.notna().all().all()
+    assert np.all(np.diff(reached.to_numpy(), axis=1) < 0)
+    assert np.all(reached.loc[0.6] > reached.loc[1.0])
+
+    surplus = scenario_grid(70, 75, *PROFILE[2:], deficits=[-300, 300], adherences=[1.0])
+    assert np.isfinite(surplus.loc[1.0, -300]) and np.isnan(surplus.loc[1.0, 300])
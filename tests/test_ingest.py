@@ -0,0 +1,96 @@
+"""ingest.py's chunk coercion, rejects file and bulk import into the user store."""
+import pandas as pd
+import pytest
+
+import ingest
+from analytics import IntakeAnalytics, food_log_rows
+from food_db import MEALS_CSV, read_meals_csv
+from user_store import UserStore
+
+HEADER = 'Date,User_ID,Food_Item,Category,Calories (kcal),Protein (g),Meal_Type\n'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UserStore(str(tmp_path / 'user_data.db'))
+
+
+def chunk(*rows):
+    columns = ['Date', 'User_ID', 'Food_Item', 'Category', 'Calories (kcal)', 'Protein (g)', 'Meal_Type']
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], dtype=str)
+
+
+def test_rejects_bad_numbers_dates_and_meal_types_with_their_reason():
+    rows, rejected = ingest.coerce_chunk(chunk(
+        ('2025-01-02', 'u1', 'Oats', 'Grains', '350', '12.34', 'breakfast'),
+        ('2025-01-02', 'u1', 'Oats', 'Grains', 'lots', '12', 'Breakfast'),
+        ('2025-01-02', 'u1', 'Oats', 'Grains', '350', '-1', 'Breakfast'),
+        ('yesterday', 'u1', 'Oats', 'Grains', '350', '12', 'Breakfast'),
+        ('2025-01-02', 'u1', 'Oats', 'Grains', '350', '12', 'Brunch'),
+        ('2025-01-02', ' ', 'Oats', 'Grains', '350', '12', 'Breakfast'),
+    ))
+    assert rows.index.tolist() == [0]
+    assert rows.iloc[0]['meal_type'] == 'Breakfast' and rows.iloc[0]['protein'] == 12.3
+    assert rejected['reason'].tolist() == [
+        'bad calories', 'negative nutrient', 'bad date', 'unknown meal type', 'missing user'
+    ]
+    # Rejected rows are the raw input, headers included
+    assert rejected.iloc[0]['Calories (kcal)'] == 'lots'
+
+
+def test_unknown_foods_are_imported_as_other():
+    rows, rejected = ingest.coerce_chunk(chunk(
+        ('2025-01-02', 'u1', 'Grandma\'s stew', None, '600', None, 'Dinner'),
+    ))
+    assert rejected.empty
+    assert rows.iloc[0]['food'] == "Grandma's stew" and rows.iloc[0]['category'] == 'Other'
+    assert rows.iloc[0]['protein'] == 0.0
+
+
+def test_mixed_offset_and_naive_dates_parse_to_naive_local_time():
+    rows, rejected = ingest.coerce_chunk(chunk(
+        ('2025-01-02 08:30', 'u1', 'Oats', None, '350', '12', 'Breakfast'),
+        ('2025-01-02T08:30:00+02:00', 'u1', 'Oats', None, '350', '12', 'Breakfast'),
+        ('2025-01-02T08:30:00Z', 'u1', 'Oats', None, '350', '12', 'Breakfast'),
+        ('2025-01-02 08:30:00-0500', 'u1', 'Oats', None, '350', '12', 'Breakfast'),
+    ))
+    assert rejected.empty
+    assert rows['date'].dt.tz is None
+    assert rows.iloc[0]['date'] == pd.Timestamp('2025-01-02 08:30')
+    expected = pd.Timestamp('2025-01-02 06:30', tz='UTC').tz_convert(ingest.tzlocal()).tz_localize(None)
+    assert rows.iloc[1]['date'] == expected
+
+
+def test_ingest_writes_rejects_and_keeps_analytics_working(tmp_path, store):
+    path = tmp_path / 'meals.csv'
+    path.write_text(HEADER + ''.join([
+        '2025-01-02,u1,Oats,Grains,350,12,Breakfast\n',
+        '2025-01-02T12:00:00+02:00,u1,Soup,Other,200,5,Lunch\n',
+        '2025-01-02T19:00:00Z,u1,Stew,Other,600,30,Dinner\n',
+        'not a date,u1,Oats,Grains,350,12,Breakfast\n',
+        '2025-01-03,u1,Oats,Grains,n/a,12,Breakfast\n',
+    ]))
+    rejects = tmp_path / 'rejects.csv'
+
+    stats = ingest.ingest(str(path), store, chunk_rows=2, rejects_path=str(rejects))
+    assert (stats['rows'], stats['imported'], stats['rejected']) == (5, 3, 2)
+    assert stats['reasons'] == {'bad date': 1, 'bad calories': 1}
+
+    written = pd.read_csv(rejects, dtype=str)
+    assert written['reason'].tolist() == ['bad date', 'bad calories']
+    assert written['Date'].tolist() == ['not a date', '2025-01-03']
+
+    entries = store.food_log_entries('u1')
+    assert [entry['name'] for _, _, entry in entries] == ['Oats', 'Soup', 'Stew']
+    assert all(logged_at.tzinfo is None for _, logged_at, _ in entries)
+
+    analytics = IntakeAnalytics(read_meals_csv(MEALS_CSV, nrows=50))
+    analytics.append(food_log_rows(entries))
+    assert analytics.daily('u1')['calories'].sum() == 1150
+
+
+def test_ingest_rejects_files_missing_required_columns(tmp_path, store):
+    path = tmp_path / 'meals.csv'
+    path.write_text('Date,Food_Item\n2025-01-02,Oats\n')
+    with pytest.raises(ValueError, match='user_id'):
+        ingest.ingest(str(path), store)
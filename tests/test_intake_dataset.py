@@ -0,0 +1,87 @@
+"""convert_csv's rebuild of the columnar intake dataset."""
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import intake_dataset  # noqa: E402
+from food_db import MEALS_CSV, read_meals_csv  # noqa: E402
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'meals.csv'
+    with open(MEALS_CSV) as f:
+        path.write_text(''.join(f.readlines()[:201]))
+    return str(path)
+
+
+def food_log_rows(count):
+    rows = read_meals_csv(MEALS_CSV, nrows=count)
+    rows['user_id'] = 'app-user'
+    return rows
+
+
+def converted(tmp_path, csv_path):
+    path = str(tmp_path / 'intake')
+    intake_dataset.convert_csv(csv_path, path)
+    intake_dataset.write_rows(food_log_rows(5), path, intake_dataset.SOURCE_FOOD_LOG)
+    intake_dataset._write_watermark(path, 42)
+    return path
+
+
+def test_reconversion_keeps_food_log_rows_and_watermark(tmp_path, csv_path):
+    path = converted(tmp_path, csv_path)
+    assert intake_dataset.convert_csv(csv_path, path) == 200
+
+    rows = intake_dataset.read_intake(path)
+    assert (rows['source'] == intake_dataset.SOURCE_CSV).sum() == 200
+    assert (rows['source'] == intake_dataset.SOURCE_FOOD_LOG).sum() == 5
+    assert intake_dataset.exported_food_log_id(path) == 42
+    assert sorted(os.listdir(tmp_path)) == ['intake', 'meals.csv']
+
+
+def test_failed_conversion_leaves_the_old_dataset(tmp_path, csv_path, monkeypatch):
+    path = converted(tmp_path, csv_path)
+    before = intake_dataset.read_intake(path)
+    write_rows = intake_dataset.write_rows
+
+    def fail_on_food_log(rows, target, source=intake_dataset.SOURCE_CSV):
+        if source == intake_dataset.SOURCE_FOOD_LOG:
+            raise OSError("disk full")
+        return write_rows(rows, target, source)
+
+    monkeypatch.setattr(intake_dataset, 'write_rows', fail_on_food_log)
+    with pytest.raises(OSError, match='disk full'):
+        intake_dataset.convert_csv(csv_path, path)
+
+    after = intake_dataset.read_intake(path)
+    assert len(after) == len(before) == 205
+    assert intake_dataset.exported_food_log_id(path) == 42
+    assert sorted(os.listdir(tmp_path)) == ['intake', 'meals.csv']
+
+
+def test_first_conversion(tmp_path, csv_path):
+    path = str(tmp_path / 'intake')
+    assert not intake_dataset.available(path)
+    assert intake_dataset.convert_csv(csv_path, path) == 200
+    assert intake_dataset.available(path)
+    assert intake_dataset.exported_food_log_id(path) == 0
+
+
+def test_failed_watermark_write_keeps_the_previous_one(tmp_path, monkeypatch):
+    path = str(tmp_path / 'intake')
+    intake_dataset._write_watermark(path, 42)
+
+    def interrupted(data, f):
+        f.write('{"last_')
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(intake_dataset.json, 'dump', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        intake_dataset._write_watermark(path, 43)
+    monkeypatch.undo()
+
+    assert intake_dataset.exported_food_log_id(path) == 42
+    assert os.listdir(path) == [intake_dataset.WATERMARK_FILE]
@@ -0,0 +1,293 @@
+"""Circuit breaker, token bucket and retry behaviour of llm_client."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import AsyncLLMClient, CircuitBreaker, CircuitOpenError, LLMClient, TokenBucket
+
+REQUEST = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': 'plan'}], 'max_tokens': 16}
+
+
+class FakeAsyncOpenAI:
+    """Answers chat.completions.create from `replies`: a response, an exception to raise, or None to hang."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, timeout=None, **request):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if reply is None:
+            await asyncio.Event().wait()
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+
+class Clock:
+    """Stands in for llm_client's time module: monotonic() only moves when advanced or slept."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeOpenAI:
+    """Synchronous counterpart of FakeAsyncOpenAI; replies are responses or exceptions to raise."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, timeout=None, **request):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_client, 'time', clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.failure()
+        assert breaker.state == 'closed' and breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open' and breaker.opened == 1
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    clock.sleep(29.9)
+    assert not breaker.allow()
+    clock.sleep(0.1)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == 'closed' and breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    clock.sleep(30)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open' and breaker.opened == 1
+    clock.sleep(29)
+    assert not breaker.allow()
+    clock.sleep(1)
+    assert breaker.allow()
+
+
+def test_released_trial_lets_another_caller_try(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    clock.sleep(30)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_bucket_reserves_without_waiting_up_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60, capacity=3)
+    assert [bucket.reserve(1) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(2) == pytest.approx(3.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60, capacity=3)
+    bucket.reserve(3)
+    clock.sleep(2)
+    assert bucket.reserve(3) == pytest.approx(1.0)
+    clock.sleep(100)
+    assert bucket.reserve(3) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_caps_reservations_at_capacity(clock):
+    bucket = TokenBucket(per_minute=60, capacity=3)
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_refund_shortens_the_next_wait(clock):
+    bucket = TokenBucket(per_minute=60, capacity=3)
+    bucket.reserve(3)
+    assert bucket.reserve(2) == pytest.approx(2.0)
+    bucket.refund(2)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    bucket.refund(100)
+    assert bucket.reserve(3) == 0.0
+
+
+def test_non_retryable_error_does_not_close_an_open_breaker(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    client = LLMClient(FakeOpenAI(APIError(400)), breaker=breaker)
+    breaker.failure()
+    clock.sleep(30)
+    with pytest.raises(APIError):
+        client.create(**REQUEST)
+    assert breaker.state == 'half-open' and breaker.opened == 1
+    assert breaker.allow()
+
+
+def test_non_retryable_error_keeps_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    client = LLMClient(FakeOpenAI(APIError(503), APIError(401)), max_attempts=1, breaker=breaker)
+    for status in (503, 401):
+        with pytest.raises(APIError, match=str(status)):
+            client.create(**REQUEST)
+    assert breaker.failures == 1 and breaker.state == 'closed'
+
+
+def test_retries_server_errors_then_succeeds(clock):
+    client = LLMClient(FakeOpenAI(APIError(503), APIError(429), SimpleNamespace(usage=None)))
+    assert client.create(**REQUEST) is not None
+    assert client.client.calls == 3
+    assert client.stats()['retries'] == 2 and client.breaker.state == 'closed'
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.failure()
+    assert breaker.state == 'half-open'
+    return breaker
+
+
+def test_cancelled_half_open_trial_lets_the_next_call_through():
+    breaker = half_open_breaker()
+    client = AsyncLLMClient(FakeAsyncOpenAI(None, SimpleNamespace(usage=None)), breaker=breaker)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.create(**REQUEST), 0.05)
+        return await client.create(**REQUEST)
+
+    assert asyncio.run(scenario()) is not None
+    assert client.client.calls == 2
+    assert breaker.state == 'closed'
+
+
+def test_async_half_open_admits_a_single_trial():
+    breaker = half_open_breaker()
+    client = AsyncLLMClient(FakeAsyncOpenAI(None), breaker=breaker)
+
+    async def scenario():
+        trial = asyncio.create_task(client.create(**REQUEST))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            await client.create(**REQUEST)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    asyncio.run(scenario())
+    assert breaker.allow()
+
+
+def chunks(*parts, error=None):
+    """A chat stream of `parts`, then `error` raised mid-stream if given."""
+    for part in parts:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+    if error is not None:
+        raise error
+
+
+async def async_chunks(*parts, error=None):
+    for chunk in chunks(*parts, error=error):
+        yield chunk
+
+
+def test_stream_reports_to_the_breaker_when_it_ends():
+    breaker = half_open_breaker()
+    client = LLMClient(FakeOpenAI(chunks('Oat', 'meal')), breaker=breaker)
+    stream = client.create(stream=True, **REQUEST)
+    assert not client.healthy()
+    assert [chunk.choices[0].delta.content for chunk in stream] == ['Oat', 'meal']
+    assert breaker.state == 'closed' and client.healthy()
+
+
+def test_stream_dropped_midway_counts_as_a_failure():
+    breaker = half_open_breaker()
+    client = LLMClient(FakeOpenAI(chunks('Oat', error=ConnectionResetError())), breaker=breaker)
+    with pytest.raises(ConnectionResetError):
+        list(client.create(stream=True, **REQUEST))
+    assert breaker.failures == 2 and client.stats()['failures'] == 1
+
+
+def test_abandoned_stream_frees_the_half_open_trial():
+    breaker = half_open_breaker()
+    client = LLMClient(FakeOpenAI(chunks('Oat', 'meal')), breaker=breaker)
+    stream = client.create(stream=True, **REQUEST)
+    next(stream)
+    assert not breaker.allow()
+    stream.close()
+    assert client.healthy() and breaker.state == 'half-open'
+
+
+def test_async_stream_reports_to_the_breaker_when_it_ends():
+    breaker = half_open_breaker()
+
+    async def scenario(client):
+        stream = await client.create(stream=True, **REQUEST)
+        assert not client.healthy()
+        return [chunk.choices[0].delta.content async for chunk in stream]
+
+    client = AsyncLLMClient(FakeAsyncOpenAI(async_chunks('Oat', 'meal')), breaker=breaker)
+    assert asyncio.run(scenario(client)) == ['Oat', 'meal']
+    assert breaker.state == 'closed'
+
+    breaker = half_open_breaker()
+    client = AsyncLLMClient(FakeAsyncOpenAI(async_chunks('Oat', error=APIError(500))), breaker=breaker)
+    with pytest.raises(APIError):
+        asyncio.run(scenario(client))
+    assert breaker.failures == 2
+
+
+def test_healthy_only_while_a_call_would_be_admitted(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    client = LLMClient(FakeOpenAI(), breaker=breaker)
+    breaker.failure()
+    assert not client.healthy()
+    clock.sleep(30)
+    assert client.healthy()
+    assert breaker.allow()
+    assert not client.healthy() and breaker.state == 'half-open'
@@ -0,0 +1,251 @@
+"""Meal backends: streaming, generate_batched_async's use of the cache and stream_meals."""
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from calculators import get_default_meal
+from meal_backends import (
+    AsyncOpenAIBackend, ComposerBackend, MealBackend, OpenAIBackend, compose_failed, generate_batched_async,
+    generate_batched, generate_concurrent, parse_meal_plan_response, stream_meals
+)
+from meal_cache import MealCache
+
+MEALS = [
+    {'meal': 'Breakfast', 'calories': 500, 'protein': 30, 'carbs': 60, 'fat': 15},
+    {'meal': 'Lunch', 'calories': 700, 'protein': 45, 'carbs': 80, 'fat': 20},
+]
+
+
+def reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.pieces:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.pieces.pop(0)))])
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, content=None, pieces=()):
+        self.content = content
+        self.pieces = pieces
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        self.requests.append(request)
+        if request.get('stream'):
+            return FakeStream(self.pieces)
+        return reply(self.content)
+
+
+class ThreadRecordingCache(MealCache):
+    """MealCache noting which threads read and write it."""
+
+    def __init__(self, path):
+        super().__init__(path, variants=1)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, response):
+        self.threads.add(threading.get_ident())
+        super().put(key, response)
+
+
+def test_async_backend_streams_meal_name():
+    client = FakeAsyncOpenAI(pieces=['Greek ', None, 'yogurt', ' bowl'])
+    backend = AsyncOpenAIBackend(client)
+
+    async def collect():
+        return [piece async for piece in backend.stream_meal(MEALS[0], 'Maintenance', 'None')]
+
+    assert ''.join(asyncio.run(collect())) == 'Greek yogurt bowl'
+    assert client.requests[0]['stream'] is True
+
+
+def test_batched_async_fills_and_reads_cache_off_the_event_loop(tmp_path):
+    cache = ThreadRecordingCache(str(tmp_path / 'meal_cache.db'))
+    content = json.dumps({'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'})
+    client = FakeAsyncOpenAI(content)
+    backend = AsyncOpenAIBackend(client)
+
+    async def plan():
+        names = await generate_batched_async(backend, MEALS, 'Maintenance', 'None', cache=cache)
+        return names, threading.get_ident()
+
+    (meal_names, failures), loop_thread = asyncio.run(plan())
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'}
+    assert failures == {}
+    assert cache.threads and loop_thread not in cache.threads
+
+    (meal_names, failures), _ = asyncio.run(plan())
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'}
+    assert len(client.requests) == 1
+
+
+class Refused(Exception):
+    pass
+
+
+def test_compose_failed_composes_only_the_given_errors():
+    meal_names = {'Breakfast': get_default_meal('Breakfast'), 'Lunch': get_default_meal('Lunch')}
+    failures = {'Breakfast': Refused(), 'Lunch': TimeoutError()}
+
+    left = compose_failed(MEALS, meal_names, failures, 'Healthy', Refused)
+
+    assert list(left) == ['Lunch'] and failures is left
+    assert meal_names['Breakfast'] == ComposerBackend().generate_meal(MEALS[0], None, 'Healthy')
+    assert meal_names['Lunch'] == get_default_meal('Lunch')
+
+
+class FakeStreamingOpenAI:
+    """Streams each meal type's `pieces`; a None piece blocks until `release` is set."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.requests = []
+        self.release = threading.Event()
+        self.closed = {meal_type: threading.Event() for meal_type in pieces}
+        self.sent = dict.fromkeys(pieces, 0)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.requests.append(request)
+        meal_type = next(meal['meal'] for meal in MEALS if f"for {meal['meal']}." in request['messages'][0]['content'])
+        return self.stream(meal_type)
+
+    def stream(self, meal_type):
+        try:
+            for piece in self.pieces[meal_type]:
+                if piece is None:
+                    self.release.wait(5)
+                    continue
+                self.sent[meal_type] += 1
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        finally:
+            self.closed[meal_type].set()
+
+
+def test_stream_meals_reports_text_as_it_arrives():
+    client = FakeStreamingOpenAI({'Breakfast': ['Oat ', 'porridge'], 'Lunch': ['Chicken ', 'wrap ']})
+    seen = []
+
+    meal_names, failures = stream_meals(
+        OpenAIBackend(client), MEALS, 'Maintenance', 'None', on_text=lambda *update: seen.append(update)
+    )
+
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'} and failures == {}
+    assert [text for meal_type, text in seen if meal_type == 'Breakfast'] == ['Oat ', 'Oat porridge']
+    assert [text for meal_type, text in seen if meal_type == 'Lunch'] == ['Chicken ', 'Chicken wrap ']
+    assert all(request['stream'] is True for request in client.requests)
+
+
+def test_stream_meals_times_out_to_the_default_meal_and_stops_the_stream():
+    client = FakeStreamingOpenAI({'Breakfast': ['Oat ', 'porridge'], 'Lunch': ['Chicken ', None, 'wrap', ' with', ' salad']})
+
+    meal_names, failures = stream_meals(OpenAIBackend(client), MEALS, 'Maintenance', 'None', timeout=0.2)
+
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': get_default_meal('Lunch')}
+    assert list(failures) == ['Lunch'] and isinstance(failures['Lunch'], TimeoutError)
+    # The late stream quits at its next token instead of reading on
+    assert not client.closed['Lunch'].is_set()
+    client.release.set()
+    assert client.closed['Lunch'].wait(2) and client.sent['Lunch'] == 2
+
+
+def test_stream_meals_reads_and_fills_the_cache(tmp_path):
+    cache = MealCache(str(tmp_path / 'meal_cache.db'), variants=1)
+    backend = OpenAIBackend(FakeStreamingOpenAI({'Breakfast': ['Oat porridge'], 'Lunch': ['Chicken wrap']}))
+    stream_meals(backend, MEALS[:1], 'Maintenance', 'None', cache=cache)
+
+    client = FakeStreamingOpenAI({'Breakfast': ['Never asked'], 'Lunch': ['Chicken wrap']})
+    meal_names, failures = stream_meals(OpenAIBackend(client), MEALS, 'Maintenance', 'None', cache=cache)
+
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'} and failures == {}
+    assert len(client.requests) == 1
+    lunch_key = cache.make_key('Lunch', 700, 45, 80, 20, 'Maintenance', 'None')
+    assert cache.get(lunch_key) == 'Chicken wrap'
+
+
+class BarrierBackend(MealBackend):
+    """Names a meal only once `parties` calls are in flight together; `hang` meal types never answer in time."""
+
+    def __init__(self, parties, hang=()):
+        self.barrier = threading.Barrier(parties)
+        self.hang = hang
+
+    def generate_meal(self, meal, goal_type, health_condition, timeout=None):
+        if meal['meal'] in self.hang:
+            time.sleep(timeout * 3)
+        else:
+            self.barrier.wait(timeout)
+        return f"{meal['meal']} special"
+
+
+def test_concurrent_sends_every_meal_at_once():
+    meal_names, failures = generate_concurrent(BarrierBackend(len(MEALS)), MEALS, 'Maintenance', 'None', timeout=2)
+    assert meal_names == {'Breakfast': 'Breakfast special', 'Lunch': 'Lunch special'} and failures == {}
+
+
+def test_concurrent_times_out_slow_meals_to_their_default():
+    start = time.monotonic()
+    meal_names, failures = generate_concurrent(
+        BarrierBackend(1, hang={'Lunch'}), MEALS, 'Maintenance', 'None', timeout=0.2
+    )
+    assert time.monotonic() - start < 0.5
+    assert meal_names == {'Breakfast': 'Breakfast special', 'Lunch': get_default_meal('Lunch')}
+    assert isinstance(failures['Lunch'], TimeoutError)
+
+
+class FakeOpenAI:
+    """Answers the batched plan request with `plan` (content or exception) and each single meal with `meal`."""
+
+    def __init__(self, plan, meal='Chicken wrap'):
+        self.plan = plan
+        self.meal = meal
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.requests.append(request)
+        content = self.plan if 'response_format' in request else self.meal
+        if isinstance(content, Exception):
+            raise content
+        return reply(content)
+
+
+def test_parse_meal_plan_response_keeps_valid_slots_only():
+    content = json.dumps({'breakfast ': 'Oat porridge', 'Lunch': '', 'Dinner': 3, 'Extra': 'Cake'})
+    assert parse_meal_plan_response(content, ['Breakfast', 'Lunch', 'Dinner']) == {'Breakfast': 'Oat porridge'}
+    assert parse_meal_plan_response('not json', ['Breakfast']) == {}
+    assert parse_meal_plan_response('["Oats"]', ['Breakfast']) == {}
+
+
+def test_batched_asks_once_and_retries_only_unparsed_slots():
+    client = FakeOpenAI(json.dumps({'Breakfast': 'Oat porridge', 'Lunch': ''}))
+    meal_names, failures = generate_batched(OpenAIBackend(client), MEALS, 'Maintenance', 'None')
+
+    assert meal_names == {'Breakfast': 'Oat porridge', 'Lunch': 'Chicken wrap'} and failures == {}
+    plan_request, meal_request = client.requests
+    assert 'Breakfast' in plan_request['messages'][0]['content'] and 'Lunch' in plan_request['messages'][0]['content']
+    assert 'for Lunch.' in meal_request['messages'][0]['content']
+
+
+def test_batched_failure_gives_every_slot_its_default():
+    error = TimeoutError('slow')
+    meal_names, failures = generate_batched(OpenAIBackend(FakeOpenAI(error)), MEALS, 'Maintenance', 'None')
+    assert meal_names == {meal['meal']: get_default_meal(meal['meal']) for meal in MEALS}
+    assert failures == {'Breakfast': error, 'Lunch': error}
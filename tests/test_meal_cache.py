@@ -0,0 +1,62 @@
+"""MealCache hits, variant filling, expiry and eviction."""
+import time
+
+from meal_cache import MealCache
+
+KEY = MealCache.make_key('Lunch', 700, 45, 80, 20, 'Weight Loss', 'Healthy')
+
+
+def cache(tmp_path, **options):
+    return MealCache(str(tmp_path / 'meal_cache.db'), **options)
+
+
+def test_hits_from_the_first_stored_response(tmp_path):
+    meals = cache(tmp_path, variants=3, refresh=0)
+    assert meals.get(KEY) is None
+    meals.put(KEY, 'Chicken wrap')
+    assert [meals.get(KEY) for _ in range(5)] == ['Chicken wrap'] * 5
+    assert meals.stats()['hits'] == 5 and meals.stats()['misses'] == 1
+
+
+def test_refresh_misses_until_variants_are_filled(tmp_path):
+    meals = cache(tmp_path, variants=3, refresh=1)
+    for name in ('Chicken wrap', 'Lentil soup'):
+        meals.put(KEY, name)
+        assert meals.get(KEY) is None
+    meals.put(KEY, 'Tuna salad')
+    served = {meals.get(KEY) for _ in range(50)}
+    assert served <= {'Chicken wrap', 'Lentil soup', 'Tuna salad'} and None not in served
+
+
+def test_some_lookups_refresh_a_partly_filled_key(tmp_path):
+    meals = cache(tmp_path, variants=3)
+    meals.put(KEY, 'Chicken wrap')
+    served = [meals.get(KEY) for _ in range(200)]
+    assert 0 < served.count(None) < 100
+    assert set(served) == {None, 'Chicken wrap'}
+
+
+def test_expired_rows_miss(tmp_path, monkeypatch):
+    meals = cache(tmp_path, ttl=60, refresh=0)
+    meals.put(KEY, 'Chicken wrap')
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert meals.get(KEY) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    meals = cache(tmp_path, max_entries=2, variants=1)
+    keys = [MealCache.make_key('Lunch', calories, 45, 80, 20, 'Weight Loss', 'Healthy') for calories in (600, 700, 800)]
+    meals.put(keys[0], 'first')
+    meals.put(keys[1], 'second')
+    time.sleep(0.01)
+    assert meals.get(keys[0]) == 'first'
+    meals.put(keys[2], 'third')
+    assert meals.get(keys[1]) is None
+    assert meals.get(keys[0]) == 'first' and meals.get(keys[2]) == 'third'
+    assert meals.stats()['entries'] == 2
+
+
+def test_key_normalizes_meal_type_and_rounding():
+    assert MealCache.make_key('lunch', 700.4, 45, 80, 20, 'Weight Loss', 'Healthy') == KEY
+    assert MealCache.make_key('Lunch', 700, 45, 80, 20, 'Weight Gain', 'Healthy') != KEY
@@ -0,0 +1,56 @@
+"""compose_meal_plan's fit to the daily targets under each health condition's limits."""
+import pytest
+
+import meal_composer
+from calculators import calculate_macro_targets, split_meal_targets
+from food_db import NUTRIENTS
+
+CALORIE_TOLERANCE = 0.25
+
+
+def daily_totals(calorie_target, health_condition):
+    """Summed calories and nutrients of the plan compose_meal_plan picks for a day."""
+    meals = split_meal_targets(calorie_target, calculate_macro_targets(calorie_target, 'Maintenance'))
+    total_calories = sum(meal['calories'] for meal in meals)
+    totals = dict.fromkeys(NUTRIENTS, 0.0)
+    for meal, composed in zip(meals, meal_composer.compose_meal_plan(meals, health_condition)):
+        combinations = meal_composer.get_meal_combinations(meal['meal'])
+        limits = {
+            nutrient: daily_limit * meal['calories'] / total_calories
+            for nutrient, daily_limit in meal_composer.HEALTH_LIMITS.get(health_condition, {}).items()
+        }
+        row = combinations.best(meal, limits)
+        assert combinations.describe(row) == composed
+        for nutrient, value in zip(NUTRIENTS, combinations.nutrients[row]):
+            totals[nutrient] += value
+    return totals
+
+
+@pytest.mark.parametrize('health_condition', ['Healthy', *meal_composer.HEALTH_LIMITS])
+@pytest.mark.parametrize('calorie_target', [1500, 2000, 2800])
+def test_daily_calories_stay_near_target_under_every_condition(calorie_target, health_condition):
+    calories = daily_totals(calorie_target, health_condition)['calories']
+    assert abs(calories - calorie_target) <= CALORIE_TOLERANCE * calorie_target
+
+
+@pytest.mark.parametrize('health_condition', list(meal_composer.HEALTH_LIMITS))
+def test_limit_excess_is_traded_against_calories(health_condition):
+    (nutrient, limit), = meal_composer.HEALTH_LIMITS[health_condition].items()
+    limited = daily_totals(2800, health_condition)[nutrient]
+    assert limit < limited < daily_totals(2800, 'Healthy')[nutrient]
+
+
+@pytest.mark.parametrize('calorie_target', [1200, 1500])
+def test_limits_are_respected_when_achievable(calorie_target):
+    assert daily_totals(calorie_target, 'Hypertension')['sodium'] <= 2300
+
+
+def test_small_excess_gives_way_to_a_close_combination_within_limits():
+    combinations = meal_composer.get_meal_combinations('Lunch')
+    sodium = combinations.nutrients[:, NUTRIENTS.index('sodium')]
+    # The saltiest combination fits its own macros exactly; a limit just under its sodium moves the pick
+    row = int(sodium.argmax())
+    targets = dict(zip(meal_composer.MACROS, combinations.macros[row]))
+    assert combinations.best(targets) == row
+    chosen = combinations.best(targets, {'sodium': sodium[row] * 0.9})
+    assert sodium[chosen] < sodium[row]
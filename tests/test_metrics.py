@@ -0,0 +1,67 @@
+"""Registry aggregation and its Prometheus text export."""
+import time
+
+from metrics import Registry
+
+
+def test_mixed_type_label_values_export():
+    registry = Registry(enabled=True)
+    registry.count('llm_attempt_errors_total', status=429)
+    registry.count('llm_attempt_errors_total', status='APIConnectionError')
+    registry.count('llm_attempt_errors_total', status=429)
+    registry.observe('plan_seconds', 0.2, status=502)
+    registry.observe('plan_seconds', 0.3, status='unreachable')
+
+    text = registry.prometheus_text()
+    assert 'llm_attempt_errors_total{status="429"} 2' in text
+    assert 'llm_attempt_errors_total{status="APIConnectionError"} 1' in text
+    assert 'plan_seconds_count{status="502"} 1' in text
+    assert 'plan_seconds_count{status="unreachable"} 1' in text
+    assert len(registry.summary()) == 4
+
+
+def test_label_values_are_escaped():
+    registry = Registry(enabled=True)
+    registry.count('errors_total', reason='bad "input"\\path\nnext')
+    assert 'errors_total{reason="bad \\"input\\"\\\\path\\nnext"} 1' in registry.prometheus_text()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry(enabled=True)
+    for value in (0.002, 0.02, 0.02, 50.0):
+        registry.observe('plan_seconds', value)
+    lines = registry.prometheus_text().splitlines()
+    assert 'plan_seconds_bucket{le="0.0025"} 1' in lines
+    assert 'plan_seconds_bucket{le="0.025"} 3' in lines
+    assert 'plan_seconds_bucket{le="30.0"} 3' in lines
+    assert 'plan_seconds_bucket{le="+Inf"} 4' in lines
+    assert 'plan_seconds_count 4' in lines
+
+
+def test_disabled_registry_records_nothing():
+    registry = Registry(enabled=False)
+    registry.count('errors_total')
+    with registry.timer('plan_seconds'):
+        pass
+    assert registry.prometheus_text() == '\n'
+
+
+def test_file_exporter_survives_a_failed_write(tmp_path, monkeypatch):
+    registry = Registry(enabled=True)
+    registry.count('errors_total')
+    path = tmp_path / 'metrics.prom'
+    calls = []
+    write = registry.write_prometheus
+
+    def flaky(target):
+        calls.append(target)
+        if len(calls) == 1:
+            raise TypeError("unexportable")
+        write(target)
+
+    monkeypatch.setattr(registry, 'write_prometheus', flaky)
+    registry.start_file_exporter(str(path), interval=0.01)
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.read_text().endswith('errors_total 1\n')
@@ -0,0 +1,158 @@
+"""Write-behind flushing: coalescing, ordering of food log changes and retries after a failed write."""
+import gc
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from persistence import PendingWrite, SessionFlush, WriteBehindWriter
+from user_store import UserStore
+
+T0 = datetime(2026, 3, 2, 12, 0)
+
+
+class RecordingStore(UserStore):
+    """UserStore recording every write() and failing the next `failures` of them."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = []
+        self.failures = 0
+
+    def write(self, user_id, fields=None, foods=None, clear_since=None):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is locked")
+        self.writes.append((user_id, dict(fields or {}), list(foods or []), clear_since))
+        super().write(user_id, fields=fields, foods=foods, clear_since=clear_since)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordingStore(str(tmp_path / 'user_data.db'))
+
+
+@pytest.fixture
+def writer(store):
+    # A debounce longer than any test, so only explicit flush() calls write
+    return WriteBehindWriter(store, debounce=60)
+
+
+def food(name, minutes=0):
+    return {'name': name, 'calories': 100}, T0 + timedelta(minutes=minutes)
+
+
+def logged(store, user_id='u1'):
+    return [(logged_at, entry['name']) for _, logged_at, entry in store.food_log_entries(user_id)]
+
+
+def test_burst_of_changes_is_one_write_of_the_latest_values(store, writer):
+    for weight in range(60, 71):
+        writer.mark('u1', {'current_weight': weight})
+    writer.mark('u1', {'goal_type': 'Weight Gain'})
+    assert store.writes == []
+    writer.flush()
+    assert store.writes == [('u1', {'current_weight': 70, 'goal_type': 'Weight Gain'}, [], None)]
+    assert store.load('u1')['current_weight'] == 70
+    assert writer.stats()['queue_depth'] == 0
+
+
+def test_foods_are_appended_in_logging_order(store, writer):
+    for i, name in enumerate(['oats', 'apple', 'rice']):
+        writer.append_food('u1', *food(name, i))
+    writer.flush()
+    assert [name for _, name in logged(store)] == ['oats', 'apple', 'rice']
+
+
+def test_clear_drops_earlier_queued_foods_and_keeps_later_ones(store, writer):
+    store.write('u1', foods=[food('stored yesterday', -24 * 60)])
+    writer.append_food('u1', *food('before clear'))
+    writer.clear_food_log('u1', since=T0)
+    writer.append_food('u1', *food('after clear', 5))
+    writer.flush()
+    assert [name for _, name in logged(store)] == ['stored yesterday', 'after clear']
+
+
+def test_clear_all_deletes_stored_entries(store, writer):
+    store.write('u1', foods=[food('old', -10 ** 5)])
+    writer.clear_food_log('u1')
+    writer.flush()
+    assert logged(store) == []
+    assert store.writes[-1][3] == datetime.min
+
+
+def test_failed_write_is_retried_ahead_of_newer_changes(store, writer):
+    writer.mark('u1', {'current_weight': 70})
+    writer.append_food('u1', *food('oats'))
+    store.failures = 1
+    writer.flush()
+    assert store.writes == [] and writer.stats()['errors'] == 1
+
+    writer.mark('u1', {'current_weight': 69, 'goal_weight': 65})
+    writer.append_food('u1', *food('apple', 1))
+    writer.flush()
+    assert store.writes == [('u1', {'current_weight': 69, 'goal_weight': 65}, [food('oats'), food('apple', 1)], None)]
+    assert [name for _, name in logged(store)] == ['oats', 'apple']
+
+
+def test_newer_clear_applies_to_a_failed_batch(store, writer):
+    writer.append_food('u1', *food('oats'))
+    store.failures = 1
+    writer.flush()
+    writer.clear_food_log('u1', since=T0)
+    writer.append_food('u1', *food('apple', 1))
+    writer.flush()
+    assert store.writes[-1][2:] == ([food('apple', 1)], T0)
+    assert [name for _, name in logged(store)] == ['apple']
+
+
+def test_failure_of_one_user_does_not_hold_back_others(store, writer):
+    writer.mark('u1', {'age': 30})
+    writer.mark('u2', {'age': 40})
+    store.failures = 1
+    writer.flush()
+    assert [user for user, *_ in store.writes] == ['u2']
+    assert writer.stats()['pending_users'] == 1
+    writer.flush()
+    assert store.load('u1')['age'] == 30
+
+
+def test_flush_of_one_user(store, writer):
+    writer.mark('u1', {'age': 30})
+    writer.mark('u2', {'age': 40})
+    writer.flush('u2')
+    assert store.load('u1') is None and store.load('u2')['age'] == 40
+    assert writer.stats()['pending_users'] == 1
+
+
+def test_background_thread_flushes_after_the_debounce(store):
+    writer = WriteBehindWriter(store, debounce=0.05)
+    writer.mark('u1', {'age': 30})
+    writer.mark('u1', {'age': 31})
+    deadline = time.monotonic() + 5
+    while not store.writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.writes == [('u1', {'age': 31}, [], None)]
+
+
+def test_dropped_session_flushes_its_user(store, writer):
+    session = {'flush': SessionFlush(writer, 'u1')}
+    writer.mark('u1', {'age': 30})
+    session.clear()
+    gc.collect()
+    assert store.load('u1')['age'] == 30
+
+
+def test_pending_merge_keeps_order_and_latest_fields():
+    older = PendingWrite()
+    older.fields = {'age': 30, 'height': 170}
+    older.foods = [food('a'), food('b', 10)]
+    newer = PendingWrite()
+    newer.clear(T0 + timedelta(minutes=5))
+    newer.fields = {'age': 31}
+    newer.foods = [food('c', 20)]
+    older.merge(newer)
+    assert older.fields == {'age': 31, 'height': 170}
+    assert older.foods == [food('a'), food('c', 20)]
+    assert older.clear_since == T0 + timedelta(minutes=5)
+    assert older.size() == 2 + 2 + 1
@@ -0,0 +1,144 @@
+"""FoodRecommender's kNN against a brute-force reference, cold-start users and incremental updates."""
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import recommender
+from recommender import FOOD_WEIGHT, KCAL_PER_GRAM, MACROS, SPLIT_SCALE, FoodRecommender
+
+FOODS = ['Apple', 'Oats', 'Chicken', 'Rice', 'Salmon', 'Yogurt', 'Almonds', 'Broccoli']
+
+# Grams of protein, carbs and fat per entry of each food
+MACRO_GRAMS = {
+    'Apple': (0, 25, 0), 'Oats': (5, 27, 3), 'Chicken': (31, 0, 4), 'Rice': (4, 45, 0),
+    'Salmon': (25, 0, 13), 'Yogurt': (10, 4, 5), 'Almonds': (6, 6, 14), 'Broccoli': (3, 7, 0),
+    'Mystery stew': (20, 20, 20)
+}
+
+TARGETS = {'protein_target': 150, 'carbs_target': 200, 'fat_target': 60}
+
+
+def rows_for(entries):
+    """meals.csv-shaped rows from (user_id, food) pairs."""
+    return pd.DataFrame([
+        {'user_id': user, 'food': food, **dict(zip(MACROS, MACRO_GRAMS[food]))} for user, food in entries
+    ], columns=['user_id', 'food'] + MACROS)
+
+
+def random_entries(rng, users, count):
+    foods = list(MACRO_GRAMS)
+    return [(str(rng.integers(users)), foods[rng.integers(len(foods))]) for _ in range(count)]
+
+
+def split(grams):
+    kcal = [max(g, 0) * k for g, k in zip(grams, KCAL_PER_GRAM)]
+    total = sum(kcal)
+    return [k / total / SPLIT_SCALE if total else 0.0 for k in kcal]
+
+
+def reference_scores(entries, user_id, targets):
+    """Similarity of every other user with entries to the query, one user at a time."""
+    counts, grams = {}, {}
+    for user, food in entries:
+        counts.setdefault(user, Counter())
+        grams.setdefault(user, [0.0, 0.0, 0.0])
+        if food in FOODS:
+            counts[user][food] += 1
+        grams[user] = [g + m for g, m in zip(grams[user], MACRO_GRAMS[food])]
+
+    def diet(user):
+        total = sum(counts[user].values())
+        return {food: math.sqrt(n / total) for food, n in counts[user].items()} if total else {}
+
+    mine = diet(user_id) if user_id in counts else {}
+    query = split([targets[f'{macro}_target'] for macro in MACROS])
+    scores = {}
+    for user in counts:
+        if user == user_id:
+            continue
+        overlap = sum(weight * mine.get(food, 0.0) for food, weight in diet(user).items())
+        distance = sum((a - b) ** 2 for a, b in zip(split(grams[user]), query))
+        scores[user] = FOOD_WEIGHT * overlap + (1 - FOOD_WEIGHT) * math.exp(-0.5 * distance)
+    return scores
+
+
+def assert_neighbors_match(index, entries, user_id, k=10):
+    expected = reference_scores(entries, user_id, TARGETS)
+    found = index.neighbors(user_id, TARGETS, k=k)
+    assert len(found) == min(k, len(expected))
+    for user, score in found:
+        assert score == pytest.approx(expected[user], abs=1e-5)
+    best = sorted(expected.values(), reverse=True)[:k]
+    assert [score for _, score in found] == pytest.approx(best, abs=1e-5)
+
+
+@pytest.fixture
+def entries():
+    return random_entries(np.random.default_rng(3), users=60, count=900)
+
+
+def test_neighbors_match_brute_force(entries):
+    index = FoodRecommender(rows_for(entries), FOODS)
+    for user_id in ('0', '7', '42'):
+        assert_neighbors_match(index, entries, user_id)
+
+
+def test_cold_start_user_is_matched_on_targets_alone(entries):
+    index = FoodRecommender(rows_for(entries), FOODS)
+    assert_neighbors_match(index, entries, 'new user')
+    recommendations = index.recommend('new user', TARGETS)
+    assert recommendations and len(recommendations) <= recommender.RECOMMENDATIONS
+    assert all(r['food'] in FOODS for r in recommendations)
+    scores = [r['score'] for r in recommendations]
+    assert scores == sorted(scores, reverse=True) and all(0 < s <= 1 for s in scores)
+
+
+def test_empty_index_recommends_nothing():
+    index = FoodRecommender(rows_for([]), FOODS)
+    assert index.neighbors('new user', TARGETS) == []
+    assert index.recommend('new user', TARGETS) == []
+
+
+def test_recommendations_skip_foods_the_user_logs():
+    entries = [('me', 'Apple'), ('me', 'Oats')] + [(f'u{i}', food) for i in range(5) for food in ('Apple', 'Oats', 'Yogurt')]
+    index = FoodRecommender(rows_for(entries), FOODS)
+    recommendations = index.recommend('me', TARGETS)
+    assert [r['food'] for r in recommendations] == ['Yogurt']
+    assert recommendations[0]['users'] == 5
+
+
+def test_foods_outside_the_vocabulary_only_count_towards_the_split():
+    index = FoodRecommender(rows_for([('u1', 'Mystery stew'), ('u2', 'Apple')]), FOODS)
+    assert all(r['food'] != 'Mystery stew' for r in index.recommend('new user', TARGETS))
+    assert 'u1' in dict(index.neighbors('new user', TARGETS))
+
+
+def test_appends_and_removals_match_a_rebuilt_index(entries):
+    rng = np.random.default_rng(5)
+    index = FoodRecommender(rows_for(entries[:300]), FOODS)
+    index.append(rows_for(entries[300:]))
+    extra = random_entries(rng, users=80, count=200)
+    index.append(rows_for(extra))
+    index.remove(rows_for(extra))
+    assert_neighbors_match(index, entries, '7')
+    rebuilt = FoodRecommender(rows_for(entries), FOODS)
+    assert index.recommend('7', TARGETS) == pytest.approx(rebuilt.recommend('7', TARGETS))
+
+
+def test_users_without_entries_are_not_neighbors():
+    index = FoodRecommender(rows_for([('u1', 'Apple'), ('u2', 'Oats')]), FOODS)
+    index.remove(rows_for([('u1', 'Apple')]))
+    assert [user for user, _ in index.neighbors('new user', TARGETS)] == ['u2']
+
+
+def test_index_grows_past_its_capacity(monkeypatch):
+    monkeypatch.setattr(recommender, 'CAPACITY', 4)
+    entries = random_entries(np.random.default_rng(9), users=40, count=300)
+    index = FoodRecommender(rows_for(entries[:10]), FOODS)
+    for start in range(10, 300, 10):
+        index.append(rows_for(entries[start:start + 10]))
+    assert len(index.users) == len({user for user, _ in entries})
+    assert_neighbors_match(index, entries, '3')
@@ -0,0 +1,28 @@
+"""A minimal run of the concurrent-session load harness, benchmarks/session_load.py."""
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('websockets')
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'session_load.py')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_one_session_runs_without_script_errors(tmp_path):
+    result = subprocess.run(
+        [sys.executable, SCRIPT, '--sessions', '1', '--duration', '2', '--think', '0.2', '--latency', '0.05',
+         '--port', str(free_port()), '--stub-port', str(free_port())],
+        cwd=tmp_path, capture_output=True, text=True, timeout=180
+    )
+    assert result.returncode == 0, result.stderr
+    assert '1 sessions:' in result.stdout and ', 0 script errors' in result.stdout
+    assert 'server RSS' in result.stdout
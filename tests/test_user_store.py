@@ -0,0 +1,94 @@
+"""UserStore reads and writes, and the legacy user_data.json import."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from user_store import UserStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UserStore(str(tmp_path / 'user_data.db'))
+
+
+def legacy_file(tmp_path, data):
+    path = tmp_path / 'user_data.json'
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def stored_log(store, user_id='u1'):
+    return [(logged_at, entry['name']) for _, logged_at, entry in store.food_log_entries(user_id)]
+
+
+def test_write_and_load_round_trip(store):
+    now = datetime.now().replace(microsecond=0)
+    store.write('u1', fields={'age': 30, 'meals': [{'meal': 'Lunch'}]}, foods=[({'name': 'oats'}, now)])
+    store.save_fields('u1', {'age': 31})
+    data = store.load('u1')
+    assert data['age'] == 31 and data['meals'] == [{'meal': 'Lunch'}]
+    assert data['food_log'] == [(now, {'name': 'oats'})]
+    assert store.load('nobody') is None
+
+
+def test_load_keeps_the_recent_window(store):
+    now = datetime.now()
+    store.append_foods('u1', [({'name': 'old'}, now - timedelta(days=40)), ({'name': 'new'}, now)])
+    assert [entry['name'] for _, entry in store.load('u1', window_days=30)['food_log']] == ['new']
+
+
+def test_clear_since_keeps_earlier_entries(store):
+    day = datetime(2026, 3, 2)
+    store.append_foods('u1', [({'name': 'yesterday'}, day - timedelta(hours=1)), ({'name': 'today'}, day)])
+    store.clear_food_log('u1', since=day)
+    assert stored_log(store) == [(day - timedelta(hours=1), 'yesterday')]
+
+
+def test_legacy_entries_keep_their_dates(store, tmp_path):
+    path = legacy_file(tmp_path, {
+        'age': 42,
+        'food_log': [
+            {'name': 'oats', 'calories': 300, 'date': '2024-05-01'},
+            {'name': 'stew', 'calories': 600, 'logged_at': '2024-05-01T19:30:00'},
+        ]
+    })
+    assert store.import_json('u1', path)
+    assert store.load('u1')['age'] == 42
+    assert stored_log(store) == [(datetime(2024, 5, 1), 'oats'), (datetime(2024, 5, 1, 19, 30), 'stew')]
+
+
+def test_legacy_log_by_day_takes_the_day_of_each_entry(store, tmp_path):
+    path = legacy_file(tmp_path, {'food_log': {
+        '2024-05-01': [{'name': 'oats', 'calories': 300}],
+        '2024-05-02': [{'name': 'rice', 'calories': 400}, {'name': 'tea', 'date': '2024-05-03T08:00:00'}],
+    }})
+    assert store.import_json('u1', path)
+    assert stored_log(store) == [
+        (datetime(2024, 5, 1), 'oats'), (datetime(2024, 5, 2), 'rice'), (datetime(2024, 5, 3, 8), 'tea')
+    ]
+
+
+def test_undated_legacy_entries_are_not_logged_today(store, tmp_path):
+    path = legacy_file(tmp_path, {'name': 'Sam', 'food_log': [
+        {'name': 'Apple', 'calories': 95}, {'name': 'Toast', 'calories': 150, 'date': 'yesterday'}
+    ]})
+    assert store.import_json('u1', path)
+    data = store.load('u1')
+    assert data['name'] == 'Sam' and data['food_log'] == []
+    assert store.food_log_entries('u1') == []
+    assert store.last_food_log_id() == 2
+
+    store.append_food('u1', {'name': 'Pear'}, datetime.now())
+    assert [name for _, name in stored_log(store)] == ['Pear']
+    store.clear_food_log('u1')
+    (count,) = store._connect().execute('SELECT COUNT(*) FROM food_log').fetchone()
+    assert count == 0
+
+
+def test_missing_or_broken_legacy_file(store, tmp_path):
+    assert not store.import_json('u1', str(tmp_path / 'missing.json'))
+    broken = tmp_path / 'broken.json'
+    broken.write_text('{not json')
+    assert not store.import_json('u1', str(broken))
+    assert store.load('u1') is None
@@ -0,0 +1,186 @@
+"""
+Per-user storage for profile fields and the food log, backed by SQLite in WAL mode.
+Profile fields are upserted one row per key and food entries are appended as single
+rows, so a write costs O(changed fields) instead of rewriting the whole history.
+"""
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Food log entries older than this are left on disk when a session loads
+FOOD_LOG_WINDOW_DAYS = 30
+
+# logged_at of food log entries whose date is unknown (legacy imports). It sorts before
+# every date, so such entries never load as today's and date queries skip them
+UNDATED = ''
+
+
+class UserStore:
+    """
+    Thread-safe handle on the user database. Each thread gets its own connection;
+    every write runs in a single transaction, so concurrent sessions and processes
+    never see a half-written profile.
+    """
+
+    def __init__(self, path='user_data.db'):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS profile (
+                    user_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS food_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    logged_at TEXT NOT NULL,
+                    entry TEXT NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS food_log_user_time ON food_log (user_id, logged_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, user_id, window_days=FOOD_LOG_WINDOW_DAYS):
+        """
+        Profile fields plus 'food_log', the (logged_at, entry) pairs of the last
+        `window_days` oldest first, or None if the user is unknown.
+        """
+        conn = self._connect()
+        rows = conn.execute('SELECT key, value FROM profile WHERE user_id = ?', (user_id,)).fetchall()
+        since = (datetime.now() - timedelta(days=window_days)).isoformat()
+        entries = conn.execute(
+            'SELECT logged_at, entry FROM food_log WHERE user_id = ? AND logged_at >= ? ORDER BY id',
+            (user_id, since)
+        ).fetchall()
+        if not rows and not entries:
+            return None
+
+        data = {key: json.loads(value) for key, value in rows}
+        data['food_log'] = [(datetime.fromisoformat(logged_at), json.loads(entry)) for logged_at, entry in entries]
+        return data
+
+    def food_log_entries(self, user_id=None, after_id=0, until_id=None, since=None):
+        """
+        Every dated (user_id, logged_at, entry) in the food log, of one user or all,
+        oldest first. `after_id`/`until_id` limit it to rows inserted in that id range
+        and `since` to entries logged at or after it.
+        """
+        query = 'SELECT user_id, logged_at, entry FROM food_log WHERE id > ? AND logged_at != ?'
+        params = [after_id, UNDATED]
+        if until_id is not None:
+            query += ' AND id <= ?'
+            params.append(until_id)
+        if user_id is not None:
+            query += ' AND user_id = ?'
+            params.append(user_id)
+        if since is not None:
+            query += ' AND logged_at >= ?'
+            params.append(since.isoformat())
+        records = self._connect().execute(query + ' ORDER BY id', params).fetchall()
+        return [(user, datetime.fromisoformat(logged_at), json.loads(entry)) for user, logged_at, entry in records]
+
+    def last_food_log_id(self):
+        """Id of the newest food log row, 0 if there are none."""
+        (last_id,) = self._connect().execute('SELECT COALESCE(MAX(id), 0) FROM food_log').fetchone()
+        return last_id
+
+    def save_fields(self, user_id, fields):
+        """Upserts the given {key: value} profile fields in one transaction."""
+        self.write(user_id, fields=fields)
+
+    def append_food(self, user_id, entry, logged_at=None):
+        """Appends one food log entry."""
+        self.write(user_id, foods=[(entry, logged_at or datetime.now())])
+
+    def append_foods(self, user_id, entries):
+        """Appends many (entry, logged_at) pairs in one transaction."""
+        self.write(user_id, foods=entries)
+
+    def import_food_log(self, records):
+        """Appends (user_id, logged_at, entry) rows of any number of users in one transaction."""
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO food_log (user_id, logged_at, entry) VALUES (?, ?, ?)',
+                ((user_id, logged_at.isoformat(), json.dumps(entry)) for user_id, logged_at, entry in records)
+            )
+
+    def clear_food_log(self, user_id, since=None):
+        """Deletes a user's food log entries, every one or those logged at or after `since`."""
+        self.write(user_id, clear_since=since or datetime.min)
+
+    def write(self, user_id, fields=None, foods=None, clear_since=None):
+        """
+        Applies a batch of changes for one user in a single transaction: optionally
+        deletes food log entries logged at or after `clear_since` (datetime.min for
+        all, undated ones included), then appends (entry, logged_at) pairs (logged_at
+        None for an undated entry), then upserts fields.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if clear_since == datetime.min:
+                conn.execute('DELETE FROM food_log WHERE user_id = ?', (user_id,))
+            elif clear_since is not None:
+                conn.execute(
+                    'DELETE FROM food_log WHERE user_id = ? AND logged_at >= ?', (user_id, clear_since.isoformat())
+                )
+            if foods:
+                conn.executemany(
+                    'INSERT INTO food_log (user_id, logged_at, entry) VALUES (?, ?, ?)',
+                    [(user_id, logged_at.isoformat() if logged_at is not None else UNDATED, json.dumps(entry))
+                     for entry, logged_at in foods]
+                )
+            if fields:
+                conn.executemany(
+                    'INSERT INTO profile (user_id, key, value, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at',
+                    [(user_id, key, json.dumps(value), now) for key, value in fields.items()]
+                )
+
+    def import_json(self, user_id, path):
+        """
+        One-off migration of a legacy user_data.json into this store. Returns True if
+        imported. Food log entries keep the date of their 'date' (or 'logged_at') field,
+        or of the day they are filed under when the log is {date: [entries]}; entries
+        with neither are stored undated rather than as logged today.
+        """
+        try:
+            with open(path, 'r') as f:
+                saved_data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        food_log = saved_data.pop('food_log', None) or []
+        if isinstance(food_log, dict):
+            days = [(_legacy_date(day), entries) for day, entries in food_log.items()]
+        else:
+            days = [(None, food_log)]
+        foods = [
+            (entry, _legacy_date(entry.get('date') or entry.get('logged_at')) or day)
+            for day, entries in days for entry in entries if isinstance(entry, dict)
+        ]
+        self.write(user_id, fields=saved_data, foods=foods)
+        return True
+
+
+def _legacy_date(value):
+    """The datetime of an ISO date or timestamp string from a legacy file, None if it isn't one."""
+    try:
+        return datetime.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None